@@ -13,27 +13,59 @@
 #   Set major variables, including pointers to EGDB sources and feature-layer counterparts.
 #   Make a GUID-based temporary subfolder in script's folder for staging data to be loaded.
 #   Get day of week (U,M,T,W,R,F,S).
+#   (If run w/ --resume after a run that didn't finish, instead: reuse that run's GUID, temporary subfolder, and day of week,
+#    and skip feature layers that run already reloaded; other feature layers pick up after their last finished stage.)
 #   For each of given EGDB sources and feature-layer counterparts:
 #      If current day is a day on which that EGDB source/feature layer is worked:
+#         If skip_unchanged is True, get fingerprint of EGDB source; if it matches the fingerprint from the last
+#         successful reload (kept in EGDB_To_OpenData_state.json), skip the rest of these steps.
+#         If feature layer is reloaded in "delta" mode, compare EGDB source w/ its snapshot from last successful reload to find
+#         added, changed, and deleted rows.
 #         Make a temporary .gdb in temporary subfolder; name the .gdb:
 #            DeleteMe_<Item ID of feature service>.gdb.
-#         Copy EGDB source from EGDB into temporary .gdb.
+#         Copy EGDB source (or, in "delta" mode, only its added and changed rows, picked w/ a cursor) from EGDB into temporary .gdb.
+#            (If EGDB source has more than shard_rows rows, split it into shards by OBJECTID range instead, and copy each
+#             shard into its own temporary .gdb; each shard is zipped and uploaded like a .gdb of its own, several at a time.)
+#            (If EGDB source is a small non-spatial table or point feature class (see staging_engine), instead: read its rows w/ a
+#             cursor straight into a .csv or .geojson in the temporary subfolder, which is uploaded w/out zipping.)
+#            (If asked, project it to the feature layer's spatial reference, snap it to the feature layer's XY resolution, and/or
+#             leave out fields the feature layer doesn't have, while copying it; see the "project" option of layers.)
 #         Capture pre-append record count of feature class or non-spatial table.
-#         Zip the .gdb into a .zip in the temporary subfolder; named the .zip:
-#            DeleteMe_<Item ID of feature service>.gdb.zip.
-#         Upload the .zip to AGO.
+#         Zip the .gdb into a .zip in the temporary subfolder (compressing its files at the same time on several CPU cores);
+#         name the .zip:
+#            DeleteMe_<GUID>.gdb.zip.
+#         Upload the .zip to AGO, in parts. (If the .gdb is bigger than stream_upload_threshold_mb, zip it while uploading it
+#         instead, w/out writing the .zip to disk.)
 #         Capture pre-append record count of feature layer.
 #         Truncate the feature layer.
 #         Append to the feature layer from the uploaded .zip.
+#            (In "delta" mode, instead: append w/ upsert from the uploaded .zip, then delete rows deleted from EGDB source, in
+#             batches of 1000 IDs.)
+#            (If sharded, instead: append from each shard's uploaded .zip, 1 after the other or at the same time.)
+#            (In "swap" mode, truncate+append the hidden feature service that the public view isn't a view of, rebuild its
+#             spatial index, and check its record count; then repoint the public view to it.)
 #         Capture post-append record count of feature layer.
 #         Delete the uploaded .zip (from AGO).
-#   Delete GUID-based temporary subfolder.
+#         If post-append record count matches EGDB source, keep fingerprint of EGDB source in EGDB_To_OpenData_state.json.
+#      (Up to max_workers EGDB sources/feature layers are worked at the same time. If 1 fails, the others carry on.)
+#      (Or, if pipeline is True, the steps are grouped into stages--export, zip, upload, load--and each stage is worked by
+#       its own workers, so that different stages of different EGDB sources/feature layers are worked at the same time.)
+#   (After each stage of each EGDB source/feature layer, keep a checkpoint in EGDB_To_OpenData_journal.json.)
+#   Delete GUID-based temporary subfolder and EGDB_To_OpenData_journal.json (unless a reload failed).
 #   Email a report.
+#   (If run w/ --daemon, instead: after the checks above, keep running as a service. Every daemon_check_seconds, find feature
+#    layers whose schedules fell due and whose time-of-day windows are open, and reload them (the steps above) in a pool of
+#    max_workers workers that stays up, reusing its connections to AGO. Email a report of the reloads done since the last check.
+#    Stop when a file named EGDB_To_OpenData.stop is put in the script's folder.)
 
 #README NOTES
 #   -This script writes its activity into a log file named EGDB_To_OpenData.log
 #    in the script's folder.
 #
+#   -This script writes measurements of each step of each reload (seconds, rows, bytes, retries, rows per second, MB per second)
+#    into EGDB_To_OpenData_metrics.json (last run only) and EGDB_To_OpenData_metrics.csv (1 row per step, added each run) in the
+#    script's folder.
+#
 #   -This script is designed to work w/ feature services that have ONLY 1 feature layer (or hosted table). When getting the
 #    feature layer to truncate and append, it gets the first (should be only) feature layer (or hosted table) of the service.
 #
@@ -45,7 +77,71 @@
 #    feature layer's schema to match the EGDB source before running this script.
 #
 #   -Sometimes an upload task or a delete+append task fails for no apparent reason (maybe due to break in connection?).
-#    Because of this, this script loops through those tasks up to a given maximum number of tries.
+#    Because of this, this script loops through those tasks up to a given maximum number of tries (and tries other calls to AGO
+#    again, too). Each step has its own budget of tries and minutes (see retry_budgets). Between tries, the script waits longer
+#    each time (w/ some randomness, and longer when AGO is throttling requests), so that a short outage or throttling doesn't
+#    use up all tries in a few seconds. Errors that trying again can't fix (e.g., an item that doesn't exist) aren't tried again.
+#    Uploads are done in parts; a part that fails is uploaded again by itself, and a re-tried upload resumes from the last
+#    part that AGO accepted. An upload that's given up is deleted from AGO, so it isn't left behind in content_folder.
+#
+#   -Each worker keeps 1 connection to AGO and reuses it for all of its calls to AGO. A fresh connection is made only when
+#    the connection gets old (see session_max_minutes), fails a health check (see session_check_seconds), or a call fails.
+#    Shards are worked by 1 pool of workers kept for the whole run, so their connections are reused from stage to stage.
+#
+#   -Feature layers can be reloaded at the same time (see max_workers). Each reload has its own temporary .gdb, its own
+#    connection to AGO, its own tries, and its own section in the email report. Its lines in the log file are prefixed w/
+#    the feature-service title in brackets. Copying EGDB sources (arcpy) is done 1 at a time, because arcpy geoprocessing
+#    isn't documented as safe to run from more than 1 thread; the AGO work (uploads, truncate+appends, index rebuilds) overlaps.
+#
+#   -When skip_unchanged is True, this script keeps a fingerprint of each EGDB source in a file named
+#    EGDB_To_OpenData_state.json in the script's folder (written after each successful reload). Deleting that file (or
+#    an item-ID entry in it) makes the next run reload those feature layers even if their EGDB sources haven't changed.
+#    Edits made directly to a feature layer in AGO aren't detected; delete its entry to get it reloaded.
+#
+#   -For feature layers reloaded in "delta" mode, this script keeps a snapshot (a hash of each row, by ID) of each EGDB
+#    source in a subfolder named EGDB_To_OpenData_snapshots in the script's folder. Deleting a snapshot makes the next
+#    reload of that feature layer a truncate+append. Edits made directly to the feature layer in AGO aren't detected.
+#
+#   -EGDB sources w/ more than shard_rows rows are split into shards by OBJECTID range (see shard_rows). The feature layer is
+#    truncated once, and then each shard is appended by itself, so a shard whose append fails is tried again w/out starting
+#    over. If a shard still can't be appended, the feature layer is left w/ only some of its rows (the reload is reported as
+#    failed, and the next run reloads it in full).
+#
+#   -While a feature layer is truncated+appended, it's empty or only partly loaded, and anyone who queries it then gets no rows
+#    or only some rows (for big feature layers, for many minutes). To reload a feature layer w/out that, set it to "swap" mode:
+#    publish 2 hidden feature services w/ the same schema (listed in its "staging_items" option), and share a hosted feature
+#    layer view of 1 of them in place of the feature layer (its item ID goes in layers). Each reload loads the hidden feature
+#    service that the view isn't a view of, rebuilds its spatial index, checks its record count, and then repoints the view to
+#    it (the view's URL and item ID stay the same); the other hidden feature service is loaded next time. If loading or the
+#    record count fails, the view is left as it was. AGO can't repoint a view in 1 request, so the view is w/out its layer for
+#    the second or so between taking its layer out of its definition and putting it back (w/ the same ID, fields, and filters).
+#
+#   -Small non-spatial tables and point feature classes are staged as a .csv or .geojson instead of a file geodatabase (see
+#    staging_engine). Field types of a .csv are taken from the EGDB source, not guessed by AGO. Set a feature layer's "staging"
+#    option to "fgdb" if its data doesn't come through a .csv or .geojson intact (e.g., points whose datum needs a particular
+#    geographic transformation to WGS 1984 that can't be set w/ the "transformation" option).
+#
+#   -AGO projects every appended row that isn't in the feature layer's spatial reference, which makes appends of big feature
+#    classes slow. Set a feature layer's "project" option (and "snap", and "drop_fields") to do that work while the EGDB source
+#    is copied instead, where arcpy does it much faster. The spatial reference, XY resolution, and fields are read from the
+#    feature layer's properties in AGO, so they follow changes to the feature layer w/out changes to this script.
+#
+#   -If a feature layer fails to reload, the other feature layers are still reloaded. The email report is then sent w/
+#    an ERROR subject and the temporary subfolder is left in the script's folder for troubleshooting.
+#
+#   -While it runs, this script keeps a journal of which stages of which feature layers are done in a file named
+#    EGDB_To_OpenData_journal.json in the script's folder (deleted when a run succeeds). To finish a run that failed or was
+#    interrupted, run this script again w/ --resume: feature layers already reloaded are skipped, and the others pick up after
+#    their last finished stage (as long as its temporary .gdb, .zip, or uploaded items are still there). A run w/out --resume
+#    starts over, and deletes what's left of the last run's uploaded items and temporary subfolder. (If the run that's resumed
+#    ran w/ --daemon, the feature layers it was reloading, or that failed, are reloaded, whatever day it is.)
+#
+#   -Run w/ --daemon, this script runs as a service: it starts once (importing arcpy and arcgis, logging in to AGO, and
+#    checking layers), then reloads each feature layer on its own schedule (its "schedule" option, a cron expression; or its
+#    days of week at daemon_default_time) for as long as it runs, so that feature layers can be reloaded several times a day
+#    w/out paying for start-up each time. Changes to layers (or to other major variables) take effect when the service is
+#    started again. To stop it, put a file named EGDB_To_OpenData.stop in the script's folder; reloads underway are finished
+#    first. Start it w/ Task Scheduler "At startup" (w/ "If the task fails, restart every..."), instead of on a schedule.
 
 #HISTORY
 #   Written by Ivan Brown on 2021-09-03, using:
@@ -70,12 +166,80 @@
 #   Modified by Ivan Brown on 2025-12-22 to fix problem where "gis" object (the connection to AGO) seems to sometimes
 #   get overloaded after the spatial-index rebuild when script tries to get feature-layer record count--causing script
 #   to crash; addressed problem by deleting/re-creating the "gis" object after the spatial-index rebuild.
+#
+#   Modified on 2026-10-17 to reload feature layers in a pool of workers (see max_workers), so that feature layers can
+#   be reloaded at the same time, and so that a feature layer that fails to reload no longer stops the whole run.
+#
+#   Modified on 2026-10-17 to split reloading into stages (export, zip, upload, load) and to include a pipeline mode
+#   (see pipeline) in which each stage has its own workers and bounded queue. The .zip is now made once per feature
+#   layer; a re-tried upload uploads the same .zip.
+#
+#   Modified on 2026-10-17 to skip reloading feature layers whose EGDB sources haven't changed since their last
+#   successful reload (see skip_unchanged and fingerprint_method).
+#
+#   Modified on 2026-10-17 to include a "delta" mode (set per feature layer) that appends only added and changed rows
+#   (w/ upsert) and deletes deleted rows, instead of truncating+appending all rows.
+#
+#   Modified on 2026-10-17 to have each worker keep and reuse 1 connection to AGO (checked for age and health), instead
+#   of logging in again before each step. The fix from 2025-12-22 is now a fresh connection only after a call fails.
+#
+#   Modified on 2026-10-17 to compress files of temporary file geodatabases when zipping them (they were stored w/out
+#   compression), compressing several files at the same time (see zip_compression, zip_compression_level, zip_workers).
+#
+#   Modified on 2026-10-17 to upload .zip's in parts that are re-tried 1 by 1, so that a failed upload is resumed instead
+#   of re-zipped and re-uploaded from the start, and to zip big file geodatabases while uploading them (see
+#   upload_part_size_mb and stream_upload_threshold_mb).
+#
+#   Modified on 2026-10-17 to look up each feature service's item once and keep its URLs and layer properties (see
+#   metadata_cache_minutes), going straight to the feature-layer URL afterward instead of looking up the item again.
+#
+#   Modified on 2026-10-17 to check feature services at the same time (and items in batched searches) when the script
+#   starts, and to report all problems found w/ EGDB sources and feature services together (see validation_workers,
+#   validation_batch_size).
+#
+#   Modified on 2026-10-17 to run appends and spatial-index rebuilds as background jobs in AGO that are checked on until
+#   they're done, reporting their real final status and duration instead of guessing from the Extent (see async_jobs).
+#
+#   Modified on 2026-10-17 to measure each step of each reload (seconds, rows, bytes, retries) and write the measurements
+#   into EGDB_To_OpenData_metrics.json and EGDB_To_OpenData_metrics.csv, and to profile 1 chosen reload (see profile_item_id).
+#
+#   Modified on 2026-10-17 to run from a main function (so that EGDB_To_OpenData_Benchmark.py can import the script and run it
+#   against local stand-ins for arcpy and AGO).
+#
+#   Modified on 2026-10-17 to split EGDB sources w/ more than shard_rows rows into shards by OBJECTID range, which are
+#   uploaded at the same time and appended 1 by 1 (or at the same time) after a single truncate, each w/ its own tries
+#   (see shard_rows, shard_workers, shard_parallel_appends).
+#
+#   Modified on 2026-10-17 to wait between tries (exponential backoff w/ jitter; see retry_base_seconds, retry_max_seconds), to
+#   not try again after errors that trying again can't fix, and to give each step its own budget of tries and minutes (see
+#   retry_budgets). Record counts and deletes are now tried again under their own budgets, like other calls to AGO.
+#
+#   Modified on 2026-10-17 to keep a journal of finished stages (EGDB_To_OpenData_journal.json), so that a run that failed or
+#   was interrupted can be finished by running this script w/ --resume, w/out redoing feature layers and stages already done.
+#
+#   Modified on 2026-10-17 to stage small non-spatial tables and point feature classes by reading their rows w/ a cursor into a
+#   .csv or .geojson that's uploaded as it is, instead of making, zipping, and uploading a file geodatabase (see staging_engine,
+#   rows_staging_max_mb, and the "staging" option of layers).
+#
+#   Modified on 2026-10-17 to run as a service w/ --daemon, which keeps its imports, connections to AGO, and checks of layers
+#   between reloads, and reloads each feature layer on a cron-style schedule (the "schedule" option of layers), in a time-of-day
+#   window (see daemon_window), w/ up to max_workers reloads at the same time.
+#
+#   Modified on 2026-10-17 to optionally project feature classes to their feature layers' spatial references (and snap them to
+#   their XY resolutions, and leave out fields the feature layers don't have) while copying them, instead of leaving that work
+#   to AGO's appends (see the "project", "transformation", "snap", and "drop_fields" options of layers).
+#
+#   Modified on 2026-10-17 to include a "swap" mode (set per feature layer) that loads 1 of 2 hidden feature services and then
+#   repoints a public view to it, so that the public view isn't empty or partly loaded while it's reloaded (see README NOTES).
 
 #HOW TO USE
 #   1) Set major variables in section of this script commented as ***** SET MAJOR VARIABLES HERE *****.
 #
 #   2) Run or schedule to run. Run on a machine that has ArcGIS Pro.
 #      Run using this command: <program files>\ArcGIS\Pro\bin\Python\scripts\propy.bat <this script file>
+#      To finish a run that failed or was interrupted, add --resume to the end of that command (see README NOTES).
+#      To run as a service that reloads feature layers on their schedules, add --daemon to the end of that command instead
+#      (see README NOTES).
 
 #******************** SET MAJOR VARIABLES HERE ***********
 
@@ -90,7 +254,7 @@
 #
 #      3: Title of feature service that contains feature layer (must be a non-case-sensitive match for script to work).
 #
-#      4: Item ID of feature service that contains the feature layer.
+#      4: Item ID of feature service that contains the feature layer (in "swap" mode, of the public view; see options below).
 #
 #      5: Day(s) of week (separated by commas) on which feature layer is reloaded. Valid days (represented by single characters) are:
 #            "U" -Sunday
@@ -101,10 +265,55 @@
 #            "F" -Friday
 #            "S" -Saturday
 #
+#      6: (Optional) Dictionary of options for reloading the feature layer. Leave off (or set to {}) to reload by truncating+appending.
+#         Options are:
+#            "mode" -"full" (default) to reload by truncating+appending.
+#                    "delta" to reload by only sending rows that were added or changed (appended w/ upsert) and deleting rows
+#                    that were deleted in the EGDB source since the last successful reload. Rows are matched by "id_field".
+#                    Falls back to truncating+appending when there's no snapshot of the EGDB source yet (first run) or when
+#                    more than delta_max_fraction of rows changed.
+#                    "swap" to reload w/out emptying the feature layer (see README NOTES): the item ID (item 4) is of a hosted
+#                    feature layer view, and the hidden feature service in "staging_items" that it isn't a view of is
+#                    truncated+appended; then the view is repointed to it.
+#
+#            "staging_items" -For "swap" mode, list of the item IDs of the 2 hidden feature services (same schema as the view,
+#                             owned by the AGO user) that the view takes turns being a view of.
+#
+#            "id_field" -For "delta" mode, name of field that holds a stable, unique ID of each row (e.g., a parcel ID). The
+#                        field must be in both the EGDB source and the feature layer, and the feature layer's field must have
+#                        a unique index (needed by AGO for appending w/ upsert).
+#
+#            "staging" -"fgdb", "rows", or "auto" to stage this EGDB source differently than staging_engine says.
+#
+#            "project" -True to project a feature class to the feature layer's spatial reference (read from its properties in
+#                       AGO) while it's copied into the temporary file geodatabase, so that AGO doesn't have to project every
+#                       row while appending. (A .geojson is always WGS 1984; see staging_engine.)
+#
+#            "transformation" -Name of the geographic transformation to project w/ (e.g., "WGS_1984_(ITRF00)_To_NAD_1983"), when
+#                              the EGDB source's datum differs from the feature layer's. Leave off to use arcpy's default.
+#
+#            "snap" -True (w/ "project") to snap coordinates to the feature layer's XY resolution (and use its XY tolerance),
+#                    so that AGO doesn't have to while appending and rebuilding the spatial index.
+#
+#            "drop_fields" -True to leave out fields of the EGDB source that the feature layer doesn't have, instead of
+#                           uploading them for AGO to ignore.
+#
+#            "schedule" -(Only when run as a service, w/ --daemon) When to reload the feature layer, as a cron expression:
+#                        "<minute> <hour> <day of month> <month> <day of week>" (day of week 0-6, 0 is Sunday). Each part is *,
+#                        a number, a range (e.g., 1-5), a list (e.g., 0,30), or a step (e.g., */4 or 8-18/2). For example,
+#                        "0 */4 * * *" reloads every 4 hours, and "15 * * * 1-5" reloads at 15 past every hour on weekdays.
+#                        Takes the place of the days of week (item 5) and daemon_default_time.
+#
+#            "window" -(Only when run as a service) Time-of-day window in which this feature layer's reloads are started, in
+#                      place of daemon_window.
+#
 #   For example:
 #      layers = []
-#      layers.append(["BigCity.sde", "", "BigCity.GISadmin.parcels", "Big City Parcels", "287add0c-2062-4df0-b34b-4782848fbe8f", "T"])
+#      layers.append(["BigCity.sde", "", "BigCity.GISadmin.parcels", "Big City Parcels", "287add0c-2062-4df0-b34b-4782848fbe8f", "T",
+#                     {"mode": "delta", "id_field": "PARCEL_ID"}])
 #      layers.append(["BigCity.sde", "", "BigCity.GISadmin.streets", "Big City Streets", "b14f5e9e-b9fd-4d86-82f8-75450b80418b", "W"])
+#      layers.append(["BigCity.sde", "", "BigCity.GISadmin.addresses", "Big City Addresses", "6c0c9a5e-3c1f-4e8b-9f0a-1d2e3f4a5b6c", "F",
+#                     {"mode": "swap", "staging_items": ["0a1b2c3d4e5f40718293a4b5c6d7e8f9", "f9e8d7c6b5a44392817060f5e4d3c2b1"]}])
 #(Using implicit line joins--defining items over multiple lines--to make the list more readable).
 layers = []
 
@@ -119,14 +328,196 @@ p = ""
 #Set content_folder to folder (folder name) in AGO user's content that is designated for containing temporary file geodatabases.
 content_folder = ""
 
-#Set max_tries to an integer to indicate the maximum number of times script should try each of these 2 tasks:
+#Set max_tries to an integer to indicate the maximum number of times script should try each of these tasks (unless retry_budgets
+#   gives a different number for the task):
 #      -upload source data to AGO.
 #
 #      -truncate-and-append to reload data.
 #
+#      -any other call to AGO (e.g., record counts, deletes, looking up a feature service).
+#
 #   Sometimes something goes wrong during these tasks (maybe a break in connection?). These tasks are tried up to max_tries times
-#   before causing the script to terminate.
+#   before the reload of that feature layer is given up (other feature layers are still reloaded).
 max_tries = 3
+#
+#Set retry_budgets to a dictionary that gives, for each step of a reload, the most times it's tried ("tries") and the most minutes
+#   spent on it, counting the waits between tries ("minutes"). A step that's not listed uses "default". A step that's listed w/out
+#   "tries" is tried up to max_tries times. Steps are: "upload" (the whole upload), "upload_part" (1 part of an upload), "truncate",
+#   "append" (also upsert in "delta" mode), "delete_rows" (each batch of deletes in "delta" mode), "index_rebuild", "pre_count",
+#   "post_count", "swap" (repointing a public view in "swap" mode), "delete" (the uploaded .zip), and "load" (other calls to AGO
+#   while reloading, e.g., looking up the feature service).
+retry_budgets = {"default": {"minutes": 10},
+                 "upload": {"minutes": 120},
+                 "upload_part": {"tries": 5, "minutes": 15},
+                 "append": {"minutes": 240},
+                 "index_rebuild": {"minutes": 120},
+                 "pre_count": {"tries": 5, "minutes": 5},
+                 "post_count": {"tries": 5, "minutes": 5},
+                 "delete": {"tries": 5, "minutes": 5}}
+#
+#Set retry_base_seconds and retry_max_seconds to numbers. Before each try after the first, the script waits a random number of seconds
+#   (so that workers that failed at the same time don't all try again at the same time) up to retry_base_seconds, doubled for each
+#   try so far, but never more than retry_max_seconds. When AGO is throttling requests (e.g., "429 Too Many Requests"), the wait is
+#   at least half of that. Errors that trying again can't fix (e.g., an item that doesn't exist) aren't tried again.
+retry_base_seconds = 2
+retry_max_seconds = 120
+
+#Set session_max_minutes to an integer to indicate how many minutes a connection to AGO is used before a fresh connection is made
+#   (each worker keeps 1 connection to AGO). Keep it below the lifetime of AGO tokens for the AGO user.
+session_max_minutes = 60
+#
+#Set session_check_seconds to an integer. When a connection to AGO hasn't been used for that many seconds, it's checked w/ a quick
+#   request before it's used again (and replaced w/ a fresh connection if the check fails).
+session_check_seconds = 300
+
+#Set metadata_cache_minutes to an integer to indicate how many minutes what's looked up about a feature service (URLs, whether
+#   it has a feature layer or hosted table, indexes) is kept and reused before it's looked up in AGO again.
+metadata_cache_minutes = 60
+
+#Set async_jobs to True to have AGO run each append and spatial-index rebuild as a background job. The script submits the job, then
+#   checks on it (waiting longer between checks each time, up to async_poll_max_seconds) until it's done, and reports the job's
+#   final status and how long it took. Set to False to wait on each append and spatial-index rebuild (a rebuild's request often
+#   times out on big feature layers, and then the script can only guess if the rebuild completed).
+async_jobs = True
+#
+#Set async_poll_max_seconds to an integer to indicate the longest wait (in seconds) between checks on a background job.
+async_poll_max_seconds = 60
+#
+#Set async_timeout_minutes to an integer to indicate how many minutes the script waits for a background job to be done before
+#   giving up on it.
+async_timeout_minutes = 120
+
+#Set profile_item_id to the item ID of 1 feature service (from layers) to profile its reload w/ cProfile. The profile is written into
+#   EGDB_To_OpenData_profile.prof (open it w/ pstats or snakeviz) and EGDB_To_OpenData_profile.txt (slowest functions first) in the
+#   script's folder. Leave as "" to not profile. Profile w/ max_workers = 1 (and pipeline = False) to keep other reloads out of it.
+#   cProfile only profiles the worker that runs each stage, so work done in other workers (shards, and compressing files while
+#   zipping) shows up only as time spent waiting for it. Profile w/ shard_rows = 0 to keep a big EGDB source's work in the profile.
+profile_item_id = ""
+
+#Set validation_workers to an integer to indicate how many feature services are checked at the same time when the script starts.
+#   (EGDB sources are checked 1 at a time, like all arcpy work; see arcpy_lock.)
+validation_workers = 8
+#
+#Set validation_batch_size to an integer to indicate how many item IDs are looked up w/ each search of AGO when the script starts.
+validation_batch_size = 50
+
+#Set max_workers to an integer to indicate the maximum number of feature layers that are reloaded at the same time.
+#   Most of a reload is spent waiting on AGO, so several reloads can overlap. Set to 1 to reload feature layers 1 at a time.
+max_workers = 1
+
+#Set pipeline to True to reload feature layers through a pipeline of stages instead of w/ the pool of max_workers workers.
+#   The stages of a reload use different resources: export (EGDB and local disk), zip (CPU), upload and load (truncate+append,
+#   spatial-index rebuild, record counts; mostly waiting on AGO). In the pipeline, each stage has its own workers, so, for example,
+#   exporting 1 feature layer happens while another is uploaded and yet another is appended. The run then takes about as long as
+#   its slowest stage instead of as long as all stages added together.
+pipeline = False
+#
+#Set pipeline_workers to a dictionary that gives the number of workers of each stage of the pipeline (only used when pipeline is True).
+#   Keep export at 1 (arcpy geoprocessing is done 1 at a time anyway).
+pipeline_workers = {"export": 1, "zip": 1, "upload": 2, "load": 2}
+#
+#Set pipeline_queue_size to an integer to indicate the maximum number of feature layers that can wait in front of each stage of the
+#   pipeline (only used when pipeline is True). Keeps a fast stage (e.g., export) from piling up staged data in front of a slow stage.
+pipeline_queue_size = 2
+
+#Set delta_max_fraction to a number between 0 and 1 to indicate the largest share of rows (added, changed, and deleted rows,
+#   divided by row count of EGDB source) that a "delta" reload handles. If more rows than that changed, the feature layer is
+#   reloaded by truncating+appending instead (faster than upserting most of the rows).
+delta_max_fraction = 0.1
+#
+#Set delta_where_max_chars to an integer to indicate the longest SQL where-clause that a "delta" reload sends to AGO to delete rows
+#   (deleted rows are deleted in batches of 1000 IDs, 1 where-clause per batch). If a batch's where-clause would be longer (very long
+#   text IDs), the feature layer is reloaded by truncating+appending instead.
+delta_where_max_chars = 50000
+
+#Set zip_compression to 1 of these strings to indicate how files of temporary file geodatabases are compressed when zipped for
+#   uploading: "deflated" (default; what AGO expects), "stored" (no compression; fastest zipping, biggest uploads), "bzip2", or "lzma".
+#   Attribute-heavy file geodatabases often compress to a third or less of their size, so uploads take much less time.
+zip_compression = "deflated"
+#
+#Set zip_compression_level to an integer (1 = fastest zipping, 9 = smallest .zip; only used for "deflated" and "bzip2").
+zip_compression_level = 6
+#
+#Set zip_workers to an integer to indicate the maximum number of files compressed at the same time when zipping. Set to 0 to use 1
+#   per CPU core. (Only w/ Python 3.7 through 3.13, whose zipfile this was checked w/; w/ other versions, files are zipped 1 at a
+#   time. See can_copy_zip_entries.)
+zip_workers = 0
+
+#Set upload_part_size_mb to a number to indicate the size (in MB) of the parts that .zip's are uploaded to AGO in. If uploading a part
+#   fails, only that part is uploaded again (see retry_budgets), and a failed upload is resumed from the last part AGO accepted.
+upload_part_size_mb = 20
+#
+#Set stream_upload_threshold_mb to a number. Temporary file geodatabases bigger than that many MB are zipped while they're uploaded,
+#   so that the whole .zip is never written to disk. Set to 0 to always write the .zip to disk before uploading it.
+stream_upload_threshold_mb = 1024
+
+#Set shard_rows to an integer. An EGDB source w/ more rows than that (reloaded by truncating+appending) is split into shards of
+#   about shard_rows rows each, by OBJECTID range. Each shard is copied into its own temporary file geodatabase, and the shards are
+#   uploaded at the same time; then the feature layer is truncated once and each shard is appended. A shard that fails is tried
+#   again by itself (see retry_budgets), instead of starting the whole append over. Set to 0 to never split EGDB sources.
+shard_rows = 1000000
+#
+#Set shard_workers to an integer to indicate how many shards of 1 EGDB source are uploaded (and, if shard_parallel_appends is
+#   True, appended) at the same time.
+shard_workers = 4
+#
+#Set shard_parallel_appends to True to append the shards of 1 EGDB source at the same time (up to shard_workers at a time), or to
+#   False to append them 1 after the other (easier on AGO).
+shard_parallel_appends = False
+
+#Set staging_engine to 1 of these strings to indicate how EGDB sources are staged (copied out of the EGDB to be uploaded to AGO):
+#      "fgdb" -Copy into a temporary file geodatabase, which is zipped and uploaded. Works for every EGDB source.
+#
+#      "rows" -Read rows w/ a cursor and write them straight into a .csv (non-spatial table) or a .geojson (point feature class),
+#              which is uploaded as it is. Skips making, zipping, and (in AGO) unzipping a whole file geodatabase, which is most of
+#              the time spent on a small EGDB source. Only for non-spatial tables and point feature classes (others use "fgdb").
+#              Points are sent as WGS 1984 longitude/latitude (as GeoJSON requires), so the EGDB source's coordinates are
+#              projected w/ arcpy's default geographic transformation (or the feature layer's "transformation" option).
+#
+#      "auto" -"rows" for non-spatial tables and point feature classes whose .csv or .geojson would be up to rows_staging_max_mb
+#              megabytes; "fgdb" for others.
+#   Can be set for 1 feature layer w/ its "staging" option (see layers). Sharded EGDB sources (see shard_rows) always use "fgdb".
+staging_engine = "auto"
+#
+#Set rows_staging_max_mb to a number. W/ staging_engine "auto", EGDB sources whose .csv or .geojson would be more megabytes
+#   than that use "fgdb". The size is estimated from the EGDB source's row count and its first 1000 rows. A .csv or .geojson is
+#   uploaded uncompressed, and is about 3 to 4 times the size of the zipped file geodatabase of the same rows (measured w/
+#   EGDB_To_OpenData_Benchmark.py: 50000 points are a 20.9 MB .geojson or a 5.5 MB .zip; 20000 table rows are a 4.1 MB .csv
+#   or a 1.4 MB .zip). Below a few megabytes, the extra upload takes less time than making, zipping, and (in AGO) unzipping a
+#   file geodatabase; above that, a file geodatabase uploads much less and AGO appends from it faster.
+rows_staging_max_mb = 2
+
+#Set skip_unchanged to True to skip reloading a feature layer when its EGDB source hasn't changed since the feature layer was
+#   last successfully reloaded. A fingerprint of the EGDB source is compared before anything is copied or uploaded. Set to False
+#   to reload every feature layer on its days regardless.
+skip_unchanged = True
+#
+#Set fingerprint_method to 1 of these strings to indicate how the fingerprint of an EGDB source is made (only used when
+#   skip_unchanged is True):
+#      "hash" -Row count plus a hash of every row's OBJECTID, attributes, and geometry. Reads every row of the EGDB source
+#              (much faster than copying+uploading+appending it), and catches every kind of change.
+#
+#      "edit_dates" -Row count, highest OBJECTID, and latest last-edited date, read w/ 3 quick queries. Only for EGDB sources
+#                    that have editor tracking turned on (others fall back to "hash"). Misses changes made w/out editor
+#                    tracking (e.g., loads done w/ editor tracking turned off).
+fingerprint_method = "hash"
+
+#daemon_default_time, daemon_window, daemon_check_seconds
+#   Only used when this script runs as a service (w/ --daemon; see README NOTES). The service keeps running and reloads each
+#   feature layer whenever its schedule says so. Up to max_workers feature layers are reloaded at the same time.
+#
+#Set daemon_default_time to a time of day ("HH:MM", 24-hour clock). A feature layer w/out a "schedule" option (see layers) is
+#   reloaded at that time on each of its days of week (item 5 of its list in layers).
+daemon_default_time = "02:00"
+#
+#Set daemon_window to a time-of-day window ("HH:MM-HH:MM"; e.g., "19:00-06:00" wraps past midnight) in which reloads are started,
+#   or to "" to start reloads at any time. A reload that falls due outside the window waits until the window opens. Can be set
+#   for 1 feature layer w/ its "window" option (see layers).
+daemon_window = ""
+#
+#Set daemon_check_seconds to a number to indicate how many seconds the service waits between checks for feature layers that
+#   are due (and for reloads that are done).
+daemon_check_seconds = 30
 
 #email_server
 #   The host name of the SMTP router to be used for sending email report.
@@ -162,13 +553,65 @@ import time
 import smtplib
 import zipfile
 import uuid
+import threading
+import queue
+import json
+import hashlib
+import datetime
+import struct
+import urllib.parse
+import csv
+import cProfile
+import pstats
+import contextlib
+import random
+import re
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from arcgis.gis import GIS
+from arcgis.features import FeatureLayer, Table
 
 #GLOBAL VARIABLES
 
 #email_content collects info to go into email notifications
 email_content = ""
 
+#note_lock makes sure that only 1 worker at a time writes into the log file (and into email_content)
+note_lock = threading.Lock()
+
+#arcpy_lock makes sure that only 1 worker at a time runs arcpy geoprocessing
+arcpy_lock = threading.Lock()
+
+#state_lock makes sure that only 1 worker at a time writes into the state file (EGDB_To_OpenData_state.json)
+state_lock = threading.Lock()
+
+#reload_state holds what's kept between runs in the state file (see load_state)
+reload_state = {}
+
+#run_journal holds this run's progress, kept in the journal file (EGDB_To_OpenData_journal.json; see save_checkpoint)
+#   journal_lock makes sure that only 1 worker at a time writes into the journal file
+run_journal = {}
+journal_lock = threading.Lock()
+
+#checkpoint_keys are the keys of a job (and of each of its shards' jobs) that are kept in the journal file (see save_checkpoint)
+checkpoint_keys = ["gdb_name", "staging", "rows_path", "gdb_name_for_uploading", "zip_path", "stream_upload", "gdb_item_id", "uploaded", "source_count", "fingerprint", "upload_needed", "skipped"]
+
+#ago_sessions holds, for each worker (thread), its connection to AGO (see get_gis)
+ago_sessions = threading.local()
+
+#shard_pool holds the workers (threads) that work shards (see run_shards). It's made the first time it's needed and kept, so that
+#   its workers keep their connections to AGO (see get_gis) from 1 stage, and 1 job, to the next.
+shard_pool = None
+shard_pool_lock = threading.Lock()
+
+#layer_info_cache holds, for each item ID, what's known about its feature service and feature layer (see get_layer_info)
+layer_info_cache = {}
+layer_info_lock = threading.Lock()
+
+#layer_context holds, for each worker (thread), the title prefix and email-report section of the feature layer it's reloading
+#   (and the job and step being measured; see measure_step)
+layer_context = threading.local()
+
 #FUNCTIONS
 
 #THIS FUNCTION SIMPLY CAPTURES THE CURRENT DATE AND TIME AND
@@ -206,17 +649,25 @@ def tell_the_time():
 #   STRING SHOULD ALSO BE INCLUDED IN EMAIL NOTIFICATION.
 #   ADDS CURRENT TIME TO BEGINNING OF FIRST PARAMETER.
 #   ADDS A \n\n TO FIRST PARAMETER (FOR HARD RETURNS).
+#   IF CALLED BY A WORKER THAT'S RELOADING A FEATURE LAYER, ALSO ADDS THE
+#   FEATURE-SERVICE TITLE (IN BRACKETS) AFTER THE TIME, AND PUTS THE STRING
+#   IN THAT FEATURE LAYER'S SECTION OF THE EMAIL NOTIFICATION.
 def make_note(the_note, print_it = False, email_it = False):
-   the_note = tell_the_time() + "  " + the_note
+   the_note = tell_the_time() + "  " + getattr(layer_context, "prefix", "") + the_note
    the_note += "\n\n"
-   log_file = open(sys.path[0] + "\\EGDB_To_OpenData.log", "a")
-   log_file.write(the_note)
-   log_file.close()
-   if print_it == True:
-      print(the_note)
-   if email_it == True:
-      global email_content
-      email_content += the_note
+   with note_lock:
+      log_file = open(os.path.join(sys.path[0], "EGDB_To_OpenData.log"), "a")
+      log_file.write(the_note)
+      log_file.close()
+      if print_it == True:
+         print(the_note)
+      if email_it == True:
+         the_report = getattr(layer_context, "report", None)
+         if the_report != None:
+            the_report.append(the_note)
+         else:
+            global email_content
+            email_content += the_note
 
 #THIS FUNCTION SENDS A GIVEN MESSAGE TO AN EMAIL DISTRIBUTION-LIST.
 #   THE FIRST ARGUMENT IS THE EMAIL'S SUBJECT STRING.
@@ -243,237 +694,2314 @@ def get_name(the_data_object):
 
 #THIS FUNCTION TAKES A FEATURE-CLASS OR NON-SPATIAL TABLE AND RETURNS ITS ROW COUNT (AS STRING).
 def get_count(the_data_object):
-   return arcpy.GetCount_management(the_data_object)[0]
+   with arcpy_lock:
+      return arcpy.GetCount_management(the_data_object)[0]
+
+#THIS FUNCTION ZIPS THE FILES OF A FOLDER (E.G., A FILE GEODATABASE) INTO A NEW .zip. SKIPS .lock FILES.
+#   THE FILES ARE COMPRESSED AT THE SAME TIME (UP TO zip_workers AT A TIME) W/ zip_compression AND zip_compression_level:
+#   EACH FILE IS FIRST COMPRESSED INTO ITS OWN 1-FILE .zip (A ".part" FILE NEXT TO THE FOLDER), AND THEN THE COMPRESSED
+#   FILES ARE COPIED INTO THE .zip AS THEY ARE, IN ORDER (SEE copy_zip_entry). ONLY A FEW FILES ARE COMPRESSED AHEAD OF
+#   THE FILE BEING COPIED, SO THAT THE ".part" FILES DON'T ADD UP TO THE WHOLE .zip ON DISK.
+#   THE FIRST ARGUMENT IS THE FOLDER. THE SECOND ARGUMENT IS THE PATH OF THE .zip TO MAKE, OR A FILE-LIKE OBJECT TO WRITE
+#   THE .zip INTO (E.G., A PartUploadStream). THE THIRD ARGUMENT IS THE NAME OF THE FOLDER THAT HOLDS THE FILES INSIDE THE .zip.
+#   RETURNS A TUPLE: (SIZE OF FILES BEFORE ZIPPING, SIZE OF .zip), IN BYTES.
+def build_zip(the_folder, zip_path, folder_in_zip):
+   compression = {"stored": zipfile.ZIP_STORED, "deflated": zipfile.ZIP_DEFLATED, "bzip2": zipfile.ZIP_BZIP2, "lzma": zipfile.ZIP_LZMA}[zip_compression]
+   the_files = []
+   for a_file in os.listdir(the_folder):
+      if a_file[len(a_file)- 5:len(a_file)].upper() != '.LOCK':
+         the_files.append(a_file)
+   #THIS INNER FUNCTION COMPRESSES 1 FILE (GIVEN BY ITS POSITION IN the_files) INTO ITS OWN 1-FILE .zip.
+   #   (zlib, bz2, AND lzma LET OTHER THREADS RUN WHILE THEY COMPRESS, SO FILES ARE COMPRESSED ON SEVERAL CPU CORES AT ONCE.)
+   def compress_file(k):
+      part_path = the_folder + "." + str(k) + ".part"
+      with zipfile.ZipFile(part_path, "w", compression, compresslevel = zip_compression_level) as part_zip:
+         part_zip.write(os.path.join(the_folder, the_files[k]), folder_in_zip + "/" + the_files[k])
+      return part_path
+   workers = zip_workers
+   if workers < 1:
+      workers = os.cpu_count() or 1
+   raw_bytes = 0
+   if isinstance(zip_path, str):
+      zip_mode = "x"
+   else:
+      zip_mode = "w"
+   with ThreadPoolExecutor(max_workers = workers) as executor:
+      with zipfile.ZipFile(zip_path, zip_mode) as the_zip:
+         #(IF copy_zip_entry CAN'T BE USED W/ THIS PYTHON'S zipfile, ZIP THE FILES 1 AFTER THE OTHER INSTEAD)
+         if can_copy_zip_entries(the_zip) == False:
+            make_note("Python " + sys.version.split()[0] + " isn't a version that zipping files at the same time was checked w/. Zipping files 1 at a time...", True)
+            for a_file in the_files:
+               the_zip.write(os.path.join(the_folder, a_file), folder_in_zip + "/" + a_file, compression, zip_compression_level)
+               raw_bytes += os.path.getsize(os.path.join(the_folder, a_file))
+            the_files = []
+         the_futures = []
+         k = 0
+         while k < len(the_files):
+            #(KEEP UP TO 2 FILES PER WORKER COMPRESSING AHEAD OF THE FILE BEING COPIED)
+            while len(the_futures) < len(the_files) and len(the_futures) < k + 2 * workers:
+               the_futures.append(executor.submit(compress_file, len(the_futures)))
+            part_path = the_futures[k].result()
+            raw_bytes += copy_zip_entry(part_path, the_zip)
+            os.remove(part_path)
+            k += 1
+   if isinstance(zip_path, str):
+      return raw_bytes, os.path.getsize(zip_path)
+   else:
+      return raw_bytes, zip_path.bytes_written
+
+#THIS FUNCTION RETURNS True IF copy_zip_entry CAN BE USED W/ AN OPEN .zip (A zipfile.ZipFile OPENED FOR WRITING): IF THIS
+#   PYTHON'S zipfile IS OF A VERSION THAT copy_zip_entry WAS CHECKED W/ (PYTHON 3.7 THROUGH 3.13) AND HAS THE INTERNALS THAT
+#   copy_zip_entry USES. OTHERWISE, build_zip ZIPS FILES 1 AFTER THE OTHER W/ ZipFile.write (ONLY PUBLIC zipfile APIS).
+def can_copy_zip_entries(the_zip):
+   if sys.version_info[:2] < (3, 7) or sys.version_info[:2] > (3, 13):
+      return False
+   for a_name in ["fp", "filelist", "NameToInfo", "start_dir", "_didModify"]:
+      if hasattr(the_zip, a_name) == False:
+         return False
+   return hasattr(zipfile, "structFileHeader") == True and hasattr(zipfile, "sizeFileHeader") == True
+
+#THIS FUNCTION COPIES THE (ONLY) FILE OF A 1-FILE .zip INTO AN OPEN .zip, AS IT IS (ALREADY COMPRESSED).
+#   THE FIRST ARGUMENT IS THE PATH OF THE 1-FILE .zip. THE SECOND ARGUMENT IS THE OPEN .zip (A zipfile.ZipFile OPENED FOR WRITING).
+#   RETURNS THE SIZE OF THE FILE BEFORE IT WAS COMPRESSED, IN BYTES.
+#   (zipfile HAS NO PUBLIC WAY TO ADD AN ALREADY-COMPRESSED FILE, SO THIS DOES WHAT ZipFile.write DOES AFTER COMPRESSING:
+#   WRITES THE FILE'S LOCAL HEADER AND DATA, AND ADDS THE FILE TO filelist/NameToInfo FOR THE CENTRAL DIRECTORY. THOSE ARE
+#   zipfile INTERNALS, SO IT'S ONLY USED WHEN can_copy_zip_entries SAYS SO.)
+def copy_zip_entry(part_path, the_zip):
+   with zipfile.ZipFile(part_path, "r") as part_zip:
+      part_info = part_zip.infolist()[0]
+   the_info = zipfile.ZipInfo(part_info.filename, part_info.date_time)
+   the_info.compress_type = part_info.compress_type
+   the_info.external_attr = part_info.external_attr
+   the_info.CRC = part_info.CRC
+   the_info.compress_size = part_info.compress_size
+   the_info.file_size = part_info.file_size
+   the_info.header_offset = the_zip.fp.tell()
+   with open(part_path, "rb") as part_file:
+      #SKIP PAST THE 1-FILE .zip's LOCAL HEADER (FIXED PART, THEN FILE NAME AND EXTRA FIELD) TO THE COMPRESSED DATA
+      part_file.seek(part_info.header_offset)
+      the_header = struct.unpack(zipfile.structFileHeader, part_file.read(zipfile.sizeFileHeader))
+      part_file.seek(the_header[10] + the_header[11], 1)
+      the_zip.fp.write(the_info.FileHeader())
+      bytes_left = part_info.compress_size
+      while bytes_left > 0:
+         the_chunk = part_file.read(min(bytes_left, 1048576))
+         the_zip.fp.write(the_chunk)
+         bytes_left -= len(the_chunk)
+   the_zip.filelist.append(the_info)
+   the_zip.NameToInfo[the_info.filename] = the_info
+   the_zip.start_dir = the_zip.fp.tell()
+   the_zip._didModify = True
+   return part_info.file_size
+
+#THIS FUNCTION RETURNS THE REST URL OF THE AGO USER'S CONTENT (WHERE ITEMS ARE ADDED, UPLOADED, AND DELETED).
+def get_user_content_url():
+   return "https://www.arcgis.com/sharing/rest/content/users/" + urllib.parse.quote(u)
+
+#THIS FUNCTION STARTS A MULTIPART UPLOAD TO AGO BY ADDING AN EMPTY ITEM (IN FOLDER content_folder) THAT THE PARTS ARE UPLOADED TO.
+#   THE FIRST ARGUMENT IS THE CONNECTION TO AGO. THE SECOND ARGUMENT IS THE FILE NAME (E.G., DeleteMe_<GUID>.gdb.zip).
+#   THE THIRD ARGUMENT IS A DICTIONARY OF ITEM PROPERTIES (title, type, description).
+#   RETURNS THE ITEM ID OF THE NEW ITEM.
+def start_upload(gis, file_name, item_properties):
+   folder_url = get_user_content_url()
+   if content_folder != "":
+      folder_id = None
+      for a_folder in gis._con.get(folder_url, {"f": "json"}).get("folders", []):
+         if a_folder.get("title") == content_folder:
+            folder_id = a_folder.get("id")
+      if folder_id == None:
+         raise Exception("Couldn't find folder " + content_folder + " in AGO user's content")
+      folder_url += "/" + folder_id
+   the_params = {"f": "json", "multipart": "true", "filename": file_name}
+   the_params.update(item_properties)
+   the_response = gis._con.post(folder_url + "/addItem", the_params)
+   if the_response.get("success") != True:
+      raise Exception("addItem failed: " + str(the_response))
+   return the_response["id"]
+
+#THIS FUNCTION UPLOADS THE NEXT PART OF A MULTIPART UPLOAD (PART #parts_done + 1) TO THE JOB'S UPLOAD ITEM (gdb_item_id).
+#   IF UPLOADING THE PART FAILS, ONLY THAT PART IS TRIED AGAIN (UNDER THE "upload_part" RETRY BUDGET, BUT NOT PAST THE END OF THE
+#   UPLOAD'S; SEE RetryPolicy), W/ A FRESH CONNECTION TO AGO EACH TIME.
+#   WHEN AGO ACCEPTS THE PART, ADDS 1 TO THE JOB'S parts_done (SO THAT A LATER TRY KNOWS WHERE TO RESUME).
+#   THE FIRST ARGUMENT IS THE JOB. THE SECOND ARGUMENT IS THE FILE NAME. THE THIRD ARGUMENT IS THE BYTES OF THE PART.
+def upload_part(the_job, file_name, the_bytes):
+   part_number = the_job["parts_done"] + 1
+   part_url = get_user_content_url() + "/items/" + the_job["gdb_item_id"] + "/addPart"
+   the_retry = RetryPolicy("upload_part", the_job.get("upload_deadline"))
+   success = False
+   while success == False and the_retry.next_try() == True:
+      if the_retry.tries > 1:
+         add_metric(the_job, "upload", "retries", 1)
+      try:
+         the_response = ago_call(lambda gis: gis._con.post(part_url, {"f": "json", "partNum": part_number}, files = {"file": (file_name, the_bytes)}), False)
+         if the_response.get("success") != True:
+            raise Exception("addPart failed: " + str(the_response))
+         success = True
+      except Exception as e:
+         make_note("Something went wrong w/ uploading part #" + str(part_number) + " (" + repr(e) + ").", True)
+         the_retry.failed(e)
+   if success == False:
+      raise the_retry.last_error
+   the_job["parts_done"] = part_number
+   add_metric(the_job, "upload", "bytes", len(the_bytes))
+
+#THIS FUNCTION FINISHES A MULTIPART UPLOAD: COMMITS THE UPLOADED PARTS INTO 1 FILE AND WAITS (CHECKING EVERY FEW SECONDS)
+#   UNTIL AGO HAS FINISHED PUTTING THE FILE TOGETHER.
+#   THE FIRST ARGUMENT IS THE CONNECTION TO AGO. THE SECOND ARGUMENT IS THE ITEM ID.
+#   THE THIRD ARGUMENT IS A DICTIONARY OF ITEM PROPERTIES (title, type, description).
+#   THE FOURTH ARGUMENT IS WHEN (IN SECONDS, LIKE time.time()) THE UPLOAD IS OUT OF TIME (THE END OF ITS "upload" RETRY BUDGET).
+#   IF AGO HASN'T FINISHED BY THEN, RAISES A TimeoutError (A "timeout" ERROR; SEE classify_error).
+def finish_upload(gis, item_id, item_properties, deadline):
+   item_url = get_user_content_url() + "/items/" + item_id
+   the_params = {"f": "json"}
+   the_params.update(item_properties)
+   the_response = gis._con.post(item_url + "/commit", the_params)
+   if the_response.get("success") != True:
+      raise Exception("commit failed: " + str(the_response))
+   the_status = gis._con.get(item_url + "/status", {"f": "json"}).get("status")
+   while the_status in ["processing", "partial"]:
+      if time.time() + 3 > deadline:
+         raise TimeoutError("uploaded item's status is still " + str(the_status) + " at the end of the upload's retry budget")
+      time.sleep(3)
+      the_status = gis._con.get(item_url + "/status", {"f": "json"}).get("status")
+   if the_status != "completed":
+      raise Exception("uploaded item's status is " + str(the_status))
+
+#THIS FUNCTION DELETES THE JOB'S (PARTLY OR FULLY) UPLOADED ITEM FROM AGO, IF IT HAS ONE, SO THAT IT ISN'T LEFT BEHIND
+#   IN content_folder. TAKES THE JOB.
+def delete_upload(the_job):
+   if the_job.get("gdb_item_id") == None:
+      return
+   try:
+      ago_call(lambda gis: gis._con.post(get_user_content_url() + "/items/" + the_job["gdb_item_id"] + "/delete", {"f": "json"}))
+   except Exception as e:
+      make_note("ALERT - Couldn't delete partly-uploaded item " + the_job["gdb_item_id"] + " from folder " + content_folder + " in AGO (" + repr(e) + "). It should be cleaned up.", True, True)
+   the_job["gdb_item_id"] = None
+
+#THIS CLASS IS A FILE-LIKE OBJECT THAT build_zip CAN WRITE A .zip INTO. INSTEAD OF WRITING THE .zip TO DISK, IT UPLOADS IT
+#   TO THE JOB'S UPLOAD ITEM IN PARTS OF upload_part_size_mb (SEE upload_part), KEEPING ONLY 1 PART IN MEMORY.
+#   CALL close() AFTER THE .zip IS WRITTEN, TO UPLOAD THE LAST (SHORTER) PART.
+class PartUploadStream:
+   def __init__(self, the_job, file_name):
+      self.the_job = the_job
+      self.file_name = file_name
+      self.part_size = int(upload_part_size_mb * 1048576)
+      self.the_buffer = bytearray()
+      self.bytes_written = 0
+   def write(self, the_bytes):
+      self.the_buffer += the_bytes
+      self.bytes_written += len(the_bytes)
+      while len(self.the_buffer) >= self.part_size:
+         upload_part(self.the_job, self.file_name, bytes(self.the_buffer[:self.part_size]))
+         del self.the_buffer[:self.part_size]
+      return len(the_bytes)
+   def flush(self):
+      pass
+   def close(self):
+      if len(self.the_buffer) > 0:
+         upload_part(self.the_job, self.file_name, bytes(self.the_buffer))
+         self.the_buffer = bytearray()
+
+#THIS FUNCTION RETURNS THE CONNECTION TO AGO (GIS OBJECT) OF THE WORKER (THREAD) THAT CALLS IT.
+#   EACH WORKER KEEPS 1 CONNECTION AND REUSES IT (THE CONNECTION KEEPS ITS HTTP CONNECTIONS TO AGO OPEN
+#   AND REUSES THEM), INSTEAD OF LOGGING IN AGAIN BEFORE EACH CALL TO AGO. A FRESH CONNECTION IS MADE:
+#      -IF THE WORKER HAS NO CONNECTION YET (OR IT WAS DROPPED W/ reset_gis),
+#      -IF THE CONNECTION IS OLDER THAN session_max_minutes (SO THAT ITS TOKEN DOESN'T EXPIRE WHILE IN USE),
+#      -OR IF THE CONNECTION HASN'T BEEN USED FOR session_check_seconds AND FAILS A QUICK HEALTH CHECK.
+def get_gis():
+   the_session = getattr(ago_sessions, "session", None)
+   now = time.time()
+   if the_session != None:
+      if now - the_session["connected"] > session_max_minutes * 60:
+         make_note("Connection to AGO is more than " + str(session_max_minutes) + " minutes old (its token may soon expire).", True)
+         the_session = None
+      elif now - the_session["used"] > session_check_seconds:
+         try:
+            the_session["gis"]._con.get("https://www.arcgis.com/sharing/rest/community/self", {"f": "json"})
+         except Exception as e:
+            make_note("Connection to AGO failed health check (" + repr(e) + ").", True)
+            the_session = None
+   if the_session == None:
+      make_note("Making fresh connection to AGO...", True)
+      the_session = {"gis": GIS("https://www.arcgis.com",  username = u, password = p), "connected": now}
+      ago_sessions.session = the_session
+   the_session["used"] = now
+   return the_session["gis"]
+
+#THIS FUNCTION DROPS THE CONNECTION TO AGO OF THE WORKER (THREAD) THAT CALLS IT, SO THAT THE NEXT CALL
+#   OF get_gis MAKES A FRESH ONE. CALLED AFTER A CALL TO AGO FAILS.
+def reset_gis():
+   ago_sessions.session = None
+
+#THIS FUNCTION RETURNS THE ERROR CODE (AN INTEGER) OF A FAILED CALL TO AGO, OR None IF IT HAS NONE (E.G., A BROKEN CONNECTION).
+#   THE CODE IS TAKEN FROM THE EXCEPTION'S HTTP STATUS (IF IT HAS 1) OR FROM THE ERROR THAT AGO RETURNED, WHICH THE ARCGIS API
+#   FOR PYTHON PUTS AT THE END OF THE EXCEPTION'S MESSAGE AS "(Error Code: 400)".
+def get_error_code(the_error):
+   for the_code in [getattr(getattr(the_error, "response", None), "status_code", None), getattr(the_error, "status_code", None), getattr(the_error, "code", None)]:
+      if type(the_code) == int:
+         return the_code
+   the_codes = re.findall(r"\(error code: (\d+)\)", str(the_error), re.IGNORECASE)
+   if len(the_codes) > 0:
+      return int(the_codes[-1])
+   return None
+
+#THIS FUNCTION TELLS WHAT KIND OF ERROR A FAILED TRY HAD, SO THAT IT'S KNOWN IF (AND HOW SOON) IT'S WORTH TRYING AGAIN.
+#   TAKES THE EXCEPTION (OR None IF THE TRY DIDN'T RAISE AN EXCEPTION BUT DIDN'T SUCCEED, E.G., AN APPEND THAT RETURNED False).
+#   THE ERROR IS CLASSIFIED ON ITS ERROR CODE (SEE get_error_code), NOT ON NUMBERS THAT HAPPEN TO BE IN ITS MESSAGE (E.G., AN
+#   OBJECTID OR A COUNT); ONLY AN ERROR W/O A CODE IS CLASSIFIED ON WHAT ITS MESSAGE SAYS. RETURNS 1 OF THESE STRINGS:
+#      "throttle" -AGO IS GETTING TOO MANY REQUESTS (E.G., 429); TRY AGAIN AFTER A LONGER WAIT.
+#      "timeout" -THE REQUEST TIMED OUT.
+#      "transient" -A SERVER ERROR (E.G., 500, 502, 503, 504), A BROKEN CONNECTION, AN EXPIRED TOKEN (498, 499), OR ANYTHING ELSE NOT
+#                   KNOWN TO BE PERMANENT (SOMETIMES TRIES FAIL FOR NO APPARENT REASON; SEE README NOTES).
+#      "permanent" -AN ERROR THAT TRYING AGAIN CAN'T FIX (E.G., 400, 403, 404: AN ITEM THAT DOESN'T EXIST, NO PERMISSION, A BAD REQUEST).
+def classify_error(the_error):
+   if the_error == None:
+      return "transient"
+   the_code = get_error_code(the_error)
+   the_text = repr(the_error).lower()
+   if the_code == 429 or (the_code == None and ("too many requests" in the_text or "throttl" in the_text or "rate limit" in the_text)):
+      return "throttle"
+   if isinstance(the_error, TimeoutError) or the_code == 408 or (the_code == None and ("timed out" in the_text or "timeout" in the_text)):
+      return "timeout"
+   #(AN EXPIRED OR INVALID TOKEN IS FIXED BY THE FRESH CONNECTION THAT'S MADE FOR THE NEXT TRY)
+   if the_code in [498, 499, 500, 502, 503, 504] or (the_code == None and "token" in the_text):
+      return "transient"
+   if the_code in [400, 403, 404] or (the_code == None and ("does not exist" in the_text or "inaccessible" in the_text or "not authorized" in the_text or "permission" in the_text)):
+      return "permanent"
+   return "transient"
+
+#THIS CLASS KEEPS TRACK OF THE TRIES OF 1 STEP (E.G., AN UPLOAD OR A TRUNCATE+APPEND) UNDER ITS RETRY BUDGET (SEE retry_budgets),
+#   AND WAITS BETWEEN TRIES W/ EXPONENTIAL BACKOFF AND JITTER (SEE retry_base_seconds AND retry_max_seconds). USE IT LIKE THIS:
+#      the_retry = RetryPolicy("truncate")
+#      while success == False and the_retry.next_try() == True:
+#         try:
+#            ...
+#         except Exception as e:
+#            the_retry.failed(e)
+#   next_try RETURNS True FOR THE FIRST TRY. FOR EACH TRY AFTER THAT, IT RETURNS False IF THE STEP IS OUT OF TRIES OR TIME, OR IF THE
+#   LAST TRY FAILED W/ A PERMANENT ERROR (SEE classify_error); OTHERWISE, IT WAITS AND THEN RETURNS True.
+#   tries IS THE NUMBER OF TRIES STARTED SO FAR. last_error IS THE EXCEPTION OF THE LAST FAILED TRY (None IF IT HAD NONE).
+#   deadline IS WHEN (IN SECONDS, LIKE time.time()) THE STEP IS OUT OF TIME. A STEP THAT RUNS INSIDE THE TRIES OF ANOTHER STEP
+#   (E.G., 1 PART OF AN UPLOAD) IS GIVEN THE OTHER STEP'S deadline AS ITS SECOND ARGUMENT, SO THAT IT CAN'T OUTLAST IT.
+class RetryPolicy:
+   def __init__(self, step_name, outer_deadline = None):
+      self.step_name = step_name
+      the_budget = {"tries": max_tries, "minutes": 10}
+      the_budget.update(retry_budgets.get("default", {}))
+      the_budget.update(retry_budgets.get(step_name, {}))
+      self.max_tries = the_budget["tries"]
+      self.max_seconds = the_budget["minutes"] * 60
+      self.start_time = time.time()
+      self.deadline = self.start_time + self.max_seconds
+      if outer_deadline != None and outer_deadline < self.deadline:
+         self.deadline = outer_deadline
+         self.max_seconds = max(0, outer_deadline - self.start_time)
+      self.tries = 0
+      self.last_error = None
+   def failed(self, the_error = None):
+      self.last_error = the_error
+   def next_try(self):
+      if self.tries > 0:
+         error_kind = classify_error(self.last_error)
+         if error_kind == "permanent":
+            make_note("That error isn't 1 that trying again can fix. Not trying " + str(self.step_name) + " again.", True)
+            return False
+         if self.tries >= self.max_tries:
+            return False
+         the_cap = min(retry_max_seconds, retry_base_seconds * 2 ** (self.tries - 1))
+         if error_kind == "throttle":
+            the_wait = random.uniform(the_cap / 2, the_cap)
+         else:
+            the_wait = random.uniform(0, the_cap)
+         if time.time() + the_wait > self.deadline:
+            make_note("Out of time for trying " + str(self.step_name) + " again (retry budget is " + str(round(self.max_seconds / 60, 1)) + " minutes).", True)
+            return False
+         make_note("Waiting " + str(round(the_wait, 1)) + " seconds before try #" + str(self.tries + 1) + " (" + error_kind + " error)...", True)
+         time.sleep(the_wait)
+      self.tries += 1
+      self.last_error = None
+      return True
+
+#THIS FUNCTION MAKES A CALL TO AGO W/ THE CONNECTION OF THE WORKER (SEE get_gis).
+#   THE FIRST ARGUMENT IS A FUNCTION THAT TAKES THE CONNECTION AND MAKES THE CALL; FOR EXAMPLE:
+#      ago_call(lambda gis: gis.content.get(item_id))
+#   THE SECOND ARGUMENT (BOOLEAN) INDICATES IF THE CALL IS TRIED AGAIN (W/ A FRESH CONNECTION) WHEN IT FAILS, UNDER THE RETRY
+#   BUDGET OF THE STEP BEING MEASURED (SEE RetryPolicy AND measure_step).
+#   SET IT TO False FOR CALLS THAT AREN'T SAFE TO REPEAT (E.G., APPENDS) OR THAT ARE RE-TRIED BY THE CALLER;
+#   THE CONNECTION IS THEN DROPPED, SO THE CALLER'S NEXT TRY USES A FRESH ONE.
+#   RETURNS WHAT THE CALL RETURNS. IF THE (LAST) TRY FAILS, RAISES ITS EXCEPTION.
+def ago_call(the_call, try_again = True):
+   the_retry = RetryPolicy(getattr(layer_context, "step", None) or "default")
+   while the_retry.next_try() == True:
+      if the_retry.tries > 1 and getattr(layer_context, "step", None) != None:
+         add_metric(layer_context.job, layer_context.step, "retries", 1)
+      try:
+         return the_call(get_gis())
+      except Exception as e:
+         reset_gis()
+         if try_again == False:
+            raise
+         make_note("A call to AGO failed (" + repr(e) + "). It's tried again w/ a fresh connection (if its retry budget allows).", True)
+         the_retry.failed(e)
+   raise the_retry.last_error
+
+#THIS FUNCTION RETURNS A DICTIONARY OF WHAT'S KNOWN ABOUT A FEATURE SERVICE AND ITS FEATURE LAYER (OR HOSTED TABLE):
+#      "title" -TITLE OF THE ITEM.
+#      "layer_count", "table_count" -NUMBER OF FEATURE LAYERS AND HOSTED TABLES IN THE FEATURE SERVICE.
+#      "is_spatial" -True IF THE FEATURE SERVICE HAS 1 FEATURE LAYER; False IF IT HAS A HOSTED TABLE INSTEAD.
+#      "service_url", "layer_url" -URLS OF THE FEATURE SERVICE AND OF ITS (FIRST) FEATURE LAYER OR HOSTED TABLE.
+#      "properties" -PROPERTIES OF THE FEATURE LAYER OR HOSTED TABLE (E.G., ITS indexes).
+#   THE INFO IS KEPT (IN layer_info_cache) FOR metadata_cache_minutes, SO THAT THE ITEM ISN'T LOOKED UP IN AGO AGAIN EACH
+#   TIME IT'S NEEDED. CALL forget_layer_info AFTER CHANGING THE FEATURE LAYER'S DEFINITION.
+#   THE FIRST ARGUMENT IS THE CONNECTION TO AGO. THE SECOND ARGUMENT IS THE ITEM ID OF THE FEATURE SERVICE.
+#   THE THIRD ARGUMENT (OPTIONAL) IS THE ITEM, IF IT'S ALREADY BEEN LOOKED UP (E.G., W/ A SEARCH).
+#   RETURNS None IF THERE'S NO ITEM W/ THAT ID.
+def get_layer_info(gis, item_id, the_item = None):
+   with layer_info_lock:
+      the_info = layer_info_cache.get(item_id)
+   if the_info != None and the_info["expires"] > time.time():
+      return the_info
+   if the_item == None:
+      the_item = gis.content.get(item_id)
+   if the_item == None:
+      return None
+   the_info = {"title": the_item.title, "service_url": the_item.url, "layer_count": len(the_item.layers), "table_count": len(the_item.tables)}
+   the_info["is_spatial"] = the_info["layer_count"] == 1
+   if the_info["layer_count"] > 0:
+      f_layer = the_item.layers[0]
+   elif the_info["table_count"] > 0:
+      f_layer = the_item.tables[0]
+   else:
+      f_layer = None
+   if f_layer != None:
+      the_info["layer_url"] = f_layer.url
+      the_info["properties"] = f_layer.properties
+   the_info["expires"] = time.time() + metadata_cache_minutes * 60
+   with layer_info_lock:
+      layer_info_cache[item_id] = the_info
+   return the_info
+
+#THIS FUNCTION DROPS WHAT'S KEPT ABOUT A FEATURE SERVICE (SEE get_layer_info), SO THAT IT'S LOOKED UP IN AGO AGAIN
+#   THE NEXT TIME IT'S NEEDED. TAKES THE ITEM ID OF THE FEATURE SERVICE.
+def forget_layer_info(item_id):
+   with layer_info_lock:
+      layer_info_cache.pop(item_id, None)
+
+#THIS FUNCTION RETURNS THE FEATURE LAYER (OR HOSTED TABLE) OF A 1-LAYER FEATURE SERVICE, MADE STRAIGHT FROM ITS URL
+#   (SEE get_layer_info) W/OUT LOOKING UP THE ITEM AGAIN.
+#   THE FIRST ARGUMENT IS THE CONNECTION TO AGO. THE SECOND ARGUMENT IS THE ITEM ID OF THE FEATURE SERVICE.
+def get_layer(gis, item_id):
+   the_info = get_layer_info(gis, item_id)
+   if the_info["is_spatial"] == True:
+      return FeatureLayer(the_info["layer_url"], gis = gis)
+   else:
+      return Table(the_info["layer_url"], gis = gis)
+
+#THIS FUNCTION SUBMITS A BACKGROUND JOB TO AGO (SEE async_jobs).
+#   THE FIRST ARGUMENT IS THE CONNECTION TO AGO. THE SECOND ARGUMENT IS THE URL OF THE OPERATION (E.G., .../append).
+#   THE THIRD ARGUMENT IS A DICTIONARY OF THE OPERATION'S PARAMETERS.
+#   RETURNS THE URL TO CHECK THE JOB'S STATUS AT. RAISES AN EXCEPTION IF AGO DIDN'T ACCEPT THE JOB.
+def submit_ago_job(gis, the_url, the_params):
+   the_params = dict(the_params, f = "json")
+   the_params["async"] = "true"
+   the_result = gis._con.post(the_url, the_params)
+   status_url = the_result.get("statusUrl", the_result.get("statusURL"))
+   if status_url == None:
+      raise Exception("AGO didn't accept background job (" + str(the_result) + ").")
+   return status_url
+
+#THIS FUNCTION WAITS FOR A BACKGROUND JOB IN AGO TO BE DONE, CHECKING ON IT W/ LONGER WAITS EACH TIME (2 SECONDS AT FIRST,
+#   UP TO async_poll_max_seconds). WHILE 1 WORKER WAITS, THE OTHER WORKERS GO ON W/ OTHER FEATURE LAYERS.
+#   THE FIRST ARGUMENT IS THE JOB (THE RELOAD OF 1 FEATURE LAYER). THE SECOND ARGUMENT IS WHAT THE BACKGROUND JOB DOES
+#   (E.G., "append"). THE THIRD ARGUMENT IS THE URL TO CHECK THE BACKGROUND JOB'S STATUS AT.
+#   RETURNS True IF THE BACKGROUND JOB COMPLETED. RETURNS False IF IT FAILED OR WASN'T DONE AFTER async_timeout_minutes.
+#   THE BACKGROUND JOB'S FINAL STATUS AND HOW LONG IT TOOK ARE ADDED TO THE JOB'S "ago_jobs" LIST.
+def wait_for_ago_job(the_job, what, status_url):
+   start_time = time.time()
+   the_wait = 2
+   the_status = ""
+   while the_status not in ("completed", "failed", "completedwitherrors", "cancelled"):
+      if time.time() - start_time > async_timeout_minutes * 60:
+         the_status = "timed out (last status " + the_status + ")"
+         break
+      time.sleep(the_wait)
+      the_wait = min(the_wait * 2, async_poll_max_seconds)
+      try:
+         the_result = ago_call(lambda gis: gis._con.get(status_url, {"f": "json"}), False)
+         the_status = str(the_result.get("status", "")).lower()
+      except Exception as e:
+         #(A FAILED CHECK DOESN'T MEAN THE BACKGROUND JOB FAILED; CHECK AGAIN NEXT TIME, W/ A FRESH CONNECTION, INSTEAD OF TRYING
+         #THE CHECK AGAIN UNDER THE STEP'S RETRY BUDGET; THE WAIT IS BOUNDED BY async_timeout_minutes)
+         make_note("Couldn't check on background job (" + repr(e) + ").", True)
+   the_seconds = round(time.time() - start_time, 1)
+   the_job.setdefault("ago_jobs", []).append({"what": what, "status": the_status, "seconds": the_seconds})
+   make_note("Background " + what + " job in AGO is done. Final status: " + the_status + ". Took " + str(the_seconds) + " seconds.", True, True)
+   return the_status == "completed"
+
+#THIS FUNCTION RETURNS True IF THE LAST BACKGROUND JOB OF A JOB (SEE wait_for_ago_job) TIMED OUT. A BACKGROUND APPEND THAT TIMED
+#   OUT MAY STILL BE RUNNING IN AGO, SO IT ISN'T TRIED AGAIN (THAT COULD APPEND ITS ROWS TWICE).
+def ago_job_timed_out(the_job):
+   return len(the_job.get("ago_jobs", [])) > 0 and the_job["ago_jobs"][-1]["status"].startswith("timed out")
+
+#THIS FUNCTION RETURNS WHAT AGO NEEDS TO KNOW ABOUT A JOB'S UPLOADED FILE TO APPEND FROM IT, AS A DICTIONARY OF ARGUMENTS
+#   OF FeatureLayer.append: upload_format ("filegdb", "csv", OR "geojson"; SEE staging_engine), AND source_table_name (NAME OF
+#   THE FEATURE-CLASS OR TABLE IN A FILE GEODATABASE) OR source_info (HOW TO READ A .csv).
+#   A .csv's source_info IS WHAT AGO'S ANALYZE SAYS ABOUT IT, W/ THE TYPE OF EACH COLUMN SET TO THE TYPE OF ITS FIELD IN THE EGDB
+#   SOURCE (SO THAT, E.G., TEXT THAT LOOKS LIKE A NUMBER STAYS TEXT). IT'S KEPT IN THE JOB, SO THAT A .csv IS ANALYZED ONCE.
+#   THE FIRST ARGUMENT IS THE CONNECTION TO AGO. THE SECOND ARGUMENT IS THE JOB. THE THIRD ARGUMENT IS THE ITEM ID OF THE
+#   UPLOADED FILE.
+def get_append_source(gis, the_job, gdb_item_id):
+   i = the_job["layer"]
+   the_staging = the_job.get("staging", "fgdb")
+   if the_staging == "fgdb":
+      return {"upload_format": "filegdb", "source_table_name": get_name(i[2])}
+   if the_staging == "geojson":
+      return {"upload_format": "geojson"}
+   if "source_info" not in the_job:
+      the_params = {"f": "json", "itemid": gdb_item_id, "filetype": "csv", "analyzeParameters": json.dumps({"locationType": "none", "enableGlobalGeocoding": False})}
+      source_info = gis._con.post("https://www.arcgis.com/sharing/rest/content/features/analyze", the_params).get("publishParameters")
+      if source_info == None:
+         raise Exception("AGO couldn't analyze uploaded .csv.")
+      field_types = {"String": "esriFieldTypeString", "Integer": "esriFieldTypeInteger", "SmallInteger": "esriFieldTypeSmallInteger",
+                     "BigInteger": "esriFieldTypeBigInteger", "Double": "esriFieldTypeDouble", "Single": "esriFieldTypeSingle",
+                     "Date": "esriFieldTypeDate", "GUID": "esriFieldTypeGUID"}
+      with arcpy_lock:
+         source_types = {a_field.name.upper(): field_types.get(a_field.type) for a_field in arcpy.ListFields(i[len(i) - 1])}
+      for a_column in source_info.get("layerInfo", {}).get("fields", []):
+         if source_types.get(str(a_column.get("name")).upper()) != None:
+            a_column["type"] = source_types[a_column["name"].upper()]
+      the_job["source_info"] = source_info
+   return {"upload_format": "csv", "source_info": the_job["source_info"]}
 
-try:
-   #MAKE SURE GIVEN EGDB-SOURCES EXIST
-   make_note("Making sure given EGDB sources exist...", True)
+#THIS FUNCTION SUBMITS AN APPEND TO A FEATURE LAYER FROM AN UPLOADED FILE (FILE GEODATABASE, .csv, OR .geojson; SEE
+#   get_append_source) AS A BACKGROUND JOB, AND WAITS FOR IT. AGO ROLLS BACK THE APPEND IF IT FAILS (rollbackOnFailure).
+#   THE FIRST ARGUMENT IS THE JOB. THE SECOND ARGUMENT IS THE ITEM ID OF THE UPLOADED FILE. THE THIRD ARGUMENT (OPTIONAL) IS
+#   THE FIELD TO MATCH ROWS ON FOR AN UPSERT (None FOR A PLAIN APPEND).
+#   ITS CALLS TO AGO AREN'T TRIED AGAIN BY THEMSELVES; THE CALLER TRIES THE WHOLE APPEND AGAIN (SEE append_upload), SO THAT
+#   THE "append" RETRY BUDGET CAPS ALL OF ITS TRIES.
+#   RETURNS True IF THE APPEND COMPLETED.
+def append_in_background(the_job, gdb_item_id, upsert_matching_field = None):
+   the_source = ago_call(lambda gis: get_append_source(gis, the_job, gdb_item_id), False)
+   the_params = {"appendItemId": gdb_item_id, "appendUploadFormat": the_source["upload_format"], "upsert": "false", "rollbackOnFailure": "true"}
+   if "source_table_name" in the_source:
+      the_params["sourceTableName"] = the_source["source_table_name"]
+   if "source_info" in the_source:
+      the_params["appendSourceInfo"] = json.dumps(the_source["source_info"])
+   if upsert_matching_field != None:
+      the_params["upsert"] = "true"
+      the_params["upsertMatchingField"] = upsert_matching_field
+   the_url = ago_call(lambda gis: get_layer_info(gis, the_job.get("load_item_id", the_job["layer"][4])), False)["layer_url"] + "/append"
+   status_url = ago_call(lambda gis: submit_ago_job(gis, the_url, the_params), False)
+   return wait_for_ago_job(the_job, "append", status_url)
+
+#THIS FUNCTION RETURNS A FINGERPRINT (STRING) OF A GIVEN EGDB SOURCE (FEATURE CLASS OR NON-SPATIAL TABLE).
+#   WHEN A ROW OF THE EGDB SOURCE IS ADDED, DELETED, OR CHANGED, THE FINGERPRINT CHANGES (SEE fingerprint_method).
+def get_fingerprint(the_data_object):
+   the_description = arcpy.Describe(the_data_object)
+   oid_field = the_description.OIDFieldName
+   row_count = arcpy.GetCount_management(the_data_object)[0]
+   #IF EDITOR TRACKING IS ON, USE HIGHEST OBJECTID AND LATEST LAST-EDITED DATE (EACH READ W/ A SORTED QUERY THAT RETURNS 1 ROW)
+   edited_field = getattr(the_description, "editedAtFieldName", "")
+   if fingerprint_method == "edit_dates" and getattr(the_description, "editorTrackingEnabled", False) == True and edited_field != "":
+      the_output = "edit_dates:" + row_count
+      for a_field in [oid_field, edited_field]:
+         with arcpy.da.SearchCursor(the_data_object, [a_field], sql_clause = (None, "ORDER BY " + a_field + " DESC")) as cursor:
+            for row in cursor:
+               the_output += ":" + str(row[0])
+               break
+      return the_output
+   #OTHERWISE, HASH EVERY ROW (IN OBJECTID ORDER) W/ ITS ATTRIBUTES AND GEOMETRY
+   fields = ["OID@"]
+   for a_field in arcpy.ListFields(the_data_object):
+      if a_field.type not in ["OID", "Geometry", "Raster", "Blob"]:
+         fields.append(a_field.name)
+   if the_description.dataType == "FeatureClass":
+      fields.append("SHAPE@WKB")
+   the_hash = hashlib.sha256()
+   with arcpy.da.SearchCursor(the_data_object, fields, sql_clause = (None, "ORDER BY " + oid_field)) as cursor:
+      for row in cursor:
+         the_hash.update(repr(row).encode("utf-8"))
+   return "hash:" + row_count + ":" + the_hash.hexdigest()
+
+#THIS FUNCTION RETURNS A DICTIONARY THAT HAS, FOR EACH ROW OF A GIVEN EGDB SOURCE, A HASH OF THE ROW'S ATTRIBUTES AND
+#   GEOMETRY, KEYED ON THE ROW'S VALUE IN A GIVEN ID FIELD (AS STRING). USED TO FIND ROWS ADDED, CHANGED, OR DELETED
+#   SINCE THE LAST RELOAD IN "delta" MODE.
+#   RETURNS None IF THE ID FIELD HAS A VALUE MORE THAN ONCE (OR HAS NULLS), SINCE ROWS THEN CAN'T BE MATCHED.
+def get_row_hashes(the_data_object, id_field):
+   fields = [id_field]
+   for a_field in arcpy.ListFields(the_data_object):
+      if a_field.type not in ["OID", "Geometry", "Raster", "Blob"] and a_field.name.upper() != id_field.upper():
+         fields.append(a_field.name)
+   if arcpy.Describe(the_data_object).dataType == "FeatureClass":
+      fields.append("SHAPE@WKB")
+   row_hashes = {}
+   with arcpy.da.SearchCursor(the_data_object, fields) as cursor:
+      for row in cursor:
+         if row[0] == None or str(row[0]) in row_hashes:
+            return None
+         row_hashes[str(row[0])] = hashlib.sha1(repr(row[1:]).encode("utf-8")).hexdigest()[:16]
+   return row_hashes
+
+#THIS FUNCTION RETURNS A LIST OF SQL WHERE-CLAUSES THAT, TOGETHER, SELECT THE ROWS W/ GIVEN VALUES IN A GIVEN FIELD: 1 WHERE-CLAUSE
+#   FOR EACH BATCH OF 1000 VALUES (SOME DATABASES DON'T ALLOW LONGER IN-LISTS, AND A REQUEST TO AGO HAS TO STAY SMALL).
+#   THE FIRST ARGUMENT IS THE FIELD NAME. THE SECOND ARGUMENT IS A LIST OF VALUES (AS STRINGS).
+#   THE THIRD ARGUMENT IS True IF THE FIELD HOLDS TEXT (VALUES ARE QUOTED) OR False IF IT HOLDS NUMBERS.
+def make_where_clauses(the_field, the_values, is_text):
+   if is_text == True:
+      the_values = ["'" + a_value.replace("'", "''") + "'" for a_value in the_values]
+   the_clauses = []
+   j = 0
+   while j < len(the_values):
+      the_clauses.append(the_field + " IN (" + ",".join(the_values[j:j + 1000]) + ")")
+      j += 1000
+   return the_clauses
+
+#THIS FUNCTION COPIES ONLY THE ROWS W/ GIVEN IDS OF AN EGDB SOURCE INTO A NEW FEATURE CLASS OR TABLE IN A TEMPORARY FILE GEODATABASE
+#   ("delta" MODE). THE ROWS ARE PICKED W/ A CURSOR, NOT W/ A WHERE-CLAUSE (WHICH, FOR MANY IDS, COULD BE TOO LONG FOR THE DATABASE).
+#   THE NEW FEATURE CLASS OR TABLE IS MADE BY COPYING NONE OF THE EGDB SOURCE'S ROWS (PREPARED AS GIVEN; SEE get_preparation), SO
+#   IT HAS THE FIELDS AND SPATIAL REFERENCE THAT A FULL COPY WOULD HAVE. (CALLED W/ arcpy_lock HELD.)
+#   THE FIRST ARGUMENT IS THE EGDB SOURCE. THE SECOND ARGUMENT IS THE PATH OF THE TEMPORARY FILE GEODATABASE. THE THIRD ARGUMENT
+#   IS THE NAME OF THE NEW FEATURE CLASS OR TABLE. THE FOURTH ARGUMENT IS THE ID FIELD. THE FIFTH ARGUMENT IS A SET OF THE IDS (AS
+#   STRINGS). THE SIXTH ARGUMENT IS WHAT get_preparation RETURNED.
+#   RETURNS THE NUMBER OF ROWS COPIED.
+def copy_rows(the_data_object, gdb_path, the_name, id_field, the_ids, preparation):
+   is_spatial = arcpy.Describe(the_data_object).dataType == "FeatureClass"
+   with arcpy.EnvManager(**get_preparation_settings(preparation)):
+      if is_spatial == True:
+         arcpy.conversion.FeatureClassToFeatureClass(the_data_object, gdb_path, the_name, "1=0", get_field_mapping(the_data_object, preparation))
+      else:
+         arcpy.conversion.TableToTable(the_data_object, gdb_path, the_name, "1=0", get_field_mapping(the_data_object, preparation))
+      the_copy = os.path.join(gdb_path, the_name)
+      source_fields = [a_field.name.upper() for a_field in arcpy.ListFields(the_data_object)]
+      fields = [a_field.name for a_field in arcpy.ListFields(the_copy) if a_field.type not in ["OID", "GlobalID", "Geometry", "Raster", "Blob"] and a_field.name.upper() in source_fields]
+      if is_spatial == True:
+         fields.append("SHAPE@")
+      row_count = 0
+      #(THE ID FIELD IS READ LAST, W/ THE FIELDS THAT ARE COPIED; IT'S READ EVEN IF IT'S NOT COPIED, E.G., IF IT'S OBJECTID)
+      with arcpy.da.SearchCursor(the_data_object, fields + [id_field], spatial_reference = arcpy.Describe(the_copy).spatialReference) as search_cursor:
+         with arcpy.da.InsertCursor(the_copy, fields) as insert_cursor:
+            for row in search_cursor:
+               if str(row[len(fields)]) in the_ids:
+                  insert_cursor.insertRow(row[:len(fields)])
+                  row_count += 1
+   return row_count
+
+#THIS FUNCTION RETURNS HOW A JOB'S EGDB SOURCE IS STAGED (SEE staging_engine): "fgdb" (TEMPORARY FILE GEODATABASE), "csv"
+#   (NON-SPATIAL TABLE), OR "geojson" (POINT FEATURE CLASS). TAKES THE JOB. (CALLED W/ arcpy_lock HELD.)
+def get_staging(the_job):
+   i = the_job["layer"]
+   the_engine = i[6].get("staging", staging_engine)
+   if the_engine == "fgdb" or "shards" in the_job:
+      return "fgdb"
+   the_description = arcpy.Describe(i[len(i) - 1])
+   if the_description.dataType != "FeatureClass":
+      the_format = "csv"
+   elif the_description.shapeType == "Point":
+      the_format = "geojson"
+   else:
+      return "fgdb"
+   if the_engine == "auto" and estimate_rows_mb(i[len(i) - 1], the_format) > rows_staging_max_mb:
+      return "fgdb"
+   return the_format
+
+#THIS FUNCTION RETURNS ABOUT HOW MANY MEGABYTES THE .csv OR .geojson OF AN EGDB SOURCE WOULD BE (SEE write_rows), FROM ITS ROW
+#   COUNT AND THE AVERAGE SIZE OF ITS FIRST 1000 ROWS AS THEY'D BE WRITTEN (EACH POINT IS COUNTED AS A TYPICAL LONGITUDE/LATITUDE,
+#   W/OUT PROJECTING IT). THE FIRST ARGUMENT IS THE EGDB SOURCE. THE SECOND ARGUMENT IS "csv" OR "geojson".
+def estimate_rows_mb(the_data_object, the_format):
+   row_count = int(arcpy.GetCount_management(the_data_object)[0])
+   if row_count == 0:
+      return 0
+   fields = [a_field.name for a_field in arcpy.ListFields(the_data_object) if a_field.type not in ["OID", "GlobalID", "Geometry", "Raster", "Blob"]]
+   sample_bytes = 0
+   sample_count = 0
+   with arcpy.da.SearchCursor(the_data_object, fields) as cursor:
+      for row in cursor:
+         if the_format == "csv":
+            sample_bytes += sum([len(str(a_value)) for a_value in row if a_value != None]) + len(fields) + 1
+         else:
+            the_properties = {fields[k]: (0 if isinstance(row[k], datetime.datetime) else row[k]) for k in range(len(fields))}
+            sample_bytes += len(json.dumps({"type": "Feature", "geometry": {"type": "Point", "coordinates": [-123.45678901234567, 45.678901234567891]}, "properties": the_properties}, default = str)) + 2
+            #(A DATE IS WRITTEN AS 13 DIGITS OF MILLISECONDS)
+            sample_bytes += 12 * len([a_value for a_value in row if isinstance(a_value, datetime.datetime)])
+         sample_count += 1
+         if sample_count == 1000:
+            break
+   if sample_count == 0:
+      return 0
+   return sample_bytes / sample_count * row_count / 1048576
+
+#THIS FUNCTION WRITES THE ROWS OF AN EGDB SOURCE (OR THE ROWS SELECTED BY A WHERE-CLAUSE) INTO A .csv (NON-SPATIAL TABLE) OR A
+#   .geojson (POINT FEATURE CLASS), READING THEM W/ A CURSOR AND WRITING EACH ROW AS SOON AS IT'S READ (ROWS AREN'T KEPT IN
+#   MEMORY). WRITES THE FIELDS THAT AN APPEND CAN FILL (NOT OBJECTID, GLOBALID, RASTER, OR BLOB FIELDS). IN A .geojson, EACH
+#   POINT IS WGS 1984 LONGITUDE/LATITUDE AND DATES ARE MILLISECONDS SINCE 1970 (AS AGO GIVES THEM); IN A .csv, DATES ARE
+#   "YYYY-MM-DD HH:MM:SS".
+#   THE FIRST ARGUMENT IS THE EGDB SOURCE. THE SECOND ARGUMENT IS THE PATH OF THE FILE TO WRITE. THE THIRD ARGUMENT IS "csv" OR
+#   "geojson". THE FOURTH ARGUMENT IS THE WHERE-CLAUSE ("" FOR ALL ROWS). THE FIFTH ARGUMENT (OPTIONAL) IS A LIST OF THE
+#   (UPPERCASE) NAMES OF THE ONLY FIELDS TO WRITE (SEE get_preparation). THE SIXTH ARGUMENT (OPTIONAL) IS A LIST OF THE ID FIELD
+#   AND A SET OF IDS (AS STRINGS), TO WRITE ONLY THE ROWS W/ THOSE IDS ("delta" MODE; SEE copy_rows).
+#   RETURNS THE NUMBER OF ROWS WRITTEN.
+def write_rows(the_data_object, the_path, the_format, where_clause, keep_fields = None, keep_ids = None):
+   fields = []
+   for a_field in arcpy.ListFields(the_data_object):
+      if a_field.type not in ["OID", "GlobalID", "Geometry", "Raster", "Blob"] and (keep_fields == None or a_field.name.upper() in keep_fields):
+         fields.append(a_field.name)
+   #(THE ID FIELD, IF ROWS ARE PICKED BY ID, IS READ LAST AND ISN'T WRITTEN AS AN EXTRA COLUMN)
+   id_fields = []
+   if keep_ids != None:
+      id_fields = [keep_ids[0]]
+   row_count = 0
+   if the_format == "csv":
+      with open(the_path, "w", newline = "", encoding = "utf-8") as the_file:
+         the_writer = csv.writer(the_file)
+         the_writer.writerow(fields)
+         with arcpy.da.SearchCursor(the_data_object, fields + id_fields, where_clause) as cursor:
+            for row in cursor:
+               if keep_ids != None and str(row[len(fields)]) not in keep_ids[1]:
+                  continue
+               the_writer.writerow([a_value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(a_value, datetime.datetime) else a_value for a_value in row[:len(fields)]])
+               row_count += 1
+   else:
+      with open(the_path, "w", encoding = "utf-8") as the_file:
+         the_file.write("{\"type\": \"FeatureCollection\", \"features\": [")
+         with arcpy.da.SearchCursor(the_data_object, fields + ["SHAPE@XY"] + id_fields, where_clause, arcpy.SpatialReference(4326)) as cursor:
+            for row in cursor:
+               if keep_ids != None and str(row[len(fields) + 1]) not in keep_ids[1]:
+                  continue
+               the_properties = {}
+               for k in range(len(fields)):
+                  if isinstance(row[k], datetime.datetime):
+                     the_properties[fields[k]] = int((row[k] - datetime.datetime(1970, 1, 1)).total_seconds() * 1000)
+                  else:
+                     the_properties[fields[k]] = row[k]
+               the_geometry = None
+               if row[len(fields)] != None and row[len(fields)][0] != None:
+                  the_geometry = {"type": "Point", "coordinates": list(row[len(fields)])}
+               if row_count > 0:
+                  the_file.write(",")
+               the_file.write("\n" + json.dumps({"type": "Feature", "geometry": the_geometry, "properties": the_properties}, default = str))
+               row_count += 1
+         the_file.write("\n]}\n")
+   return row_count
+
+#THIS FUNCTION RETURNS HOW A JOB'S EGDB SOURCE IS PREPARED WHILE IT'S COPIED (SEE THE "project", "transformation", "snap", AND
+#   "drop_fields" OPTIONS OF layers), AS A DICTIONARY THAT HAS (ONLY FOR THE OPTIONS THAT ARE SET):
+#      "spatial_reference" -THE FEATURE LAYER'S SPATIAL REFERENCE, AS AGO GIVES IT (E.G., {"wkid": 102100, "latestWkid": 3857}).
+#      "snap" -True TO SNAP COORDINATES TO THE FEATURE LAYER'S XY RESOLUTION.
+#      "transformation" -NAME OF THE GEOGRAPHIC TRANSFORMATION TO PROJECT W/.
+#      "keep_fields" -LIST OF THE (UPPERCASE) NAMES OF THE FEATURE LAYER'S FIELDS (ONLY THOSE FIELDS ARE COPIED).
+#   READS THE FEATURE LAYER'S PROPERTIES (SEE get_layer_info), AND THE FEATURE SERVICE'S IF THE FEATURE LAYER'S spatialReference
+#   DOESN'T HAVE ALL THAT'S NEEDED. TAKES THE JOB.
+def get_preparation(the_job):
+   i = the_job["layer"]
+   options = i[6]
+   preparation = {}
+   if options.get("project") != True and options.get("drop_fields") != True:
+      return preparation
+   the_info = ago_call(lambda gis: get_layer_info(gis, i[4]))
+   the_properties = the_info["properties"]
+   #(ONLY THE Describe OF THE EGDB SOURCE WAITS FOR arcpy_lock; THE LOOKUPS IN AGO DON'T HOLD IT UP FOR OTHER WORKERS)
+   if options.get("project") == True:
+      with arcpy_lock:
+         is_feature_class = arcpy.Describe(i[len(i) - 1]).dataType == "FeatureClass"
+   if options.get("project") == True and is_feature_class == True:
+      #(THE SPATIAL REFERENCE IS THE FEATURE LAYER'S spatialReference; WHAT IT DOESN'T HAVE, E.G., xyUnits AND xyTolerance, IS TAKEN
+      #FROM THE FEATURE SERVICE'S spatialReference. THE SPATIAL REFERENCE OF THE FEATURE LAYER'S extent ISN'T USED; IT HAS ONLY A WKID.)
+      snap_keys = ["xyUnits", "xyTolerance"] if options.get("snap") == True else []
+      spatial_reference = dict(the_properties.get("spatialReference") or {})
+      if spatial_reference.get("latestWkid", spatial_reference.get("wkid")) == None and spatial_reference.get("wkt") == None:
+         spatial_reference = {}
+      if len(spatial_reference) == 0 or False in [a_key in spatial_reference for a_key in snap_keys]:
+         service_reference = ago_call(lambda gis: gis._con.get(the_info["service_url"], {"f": "json"})).get("spatialReference") or {}
+         if len(spatial_reference) == 0:
+            spatial_reference = dict(service_reference)
+         for a_key in snap_keys:
+            if a_key not in spatial_reference and a_key in service_reference:
+               spatial_reference[a_key] = service_reference[a_key]
+      if spatial_reference.get("latestWkid", spatial_reference.get("wkid")) == None and spatial_reference.get("wkt") == None:
+         make_note("ALERT - Couldn't read the spatial reference of feature-service " + i[3] + ". Copying EGDB source w/out projecting it.", True, True)
+      else:
+         missing_keys = [a_key for a_key in snap_keys if a_key not in spatial_reference]
+         if len(missing_keys) > 0:
+            make_note("ALERT - Spatial reference of feature-service " + i[3] + " doesn't have " + " or ".join(missing_keys) + ", so the default(s) of the spatial reference are snapped to instead.", True, True)
+         preparation["spatial_reference"] = spatial_reference
+         preparation["snap"] = options.get("snap") == True
+         if options.get("transformation", "") != "":
+            preparation["transformation"] = options["transformation"]
+   elif options.get("transformation", "") != "":
+      #(A .geojson IS PROJECTED TO WGS 1984 W/ THE TRANSFORMATION, EVEN W/OUT "project")
+      preparation["transformation"] = options["transformation"]
+   if options.get("drop_fields") == True and len(the_properties.get("fields") or []) > 0:
+      preparation["keep_fields"] = [str(a_field["name"]).upper() for a_field in the_properties["fields"]]
+   elif options.get("drop_fields") == True:
+      make_note("ALERT - Couldn't read the fields of feature-service " + i[3] + ". Copying EGDB source w/ all of its fields.", True, True)
+   return preparation
+
+#THIS FUNCTION RETURNS THE SETTINGS (AS A DICTIONARY OF arcpy.env SETTINGS, FOR arcpy.EnvManager) THAT PROJECT A COPY OF AN
+#   EGDB SOURCE TO THE FEATURE LAYER'S SPATIAL REFERENCE (AND, IF ASKED, SNAP IT TO THE FEATURE LAYER'S XY RESOLUTION).
+#   THE FEATURE LAYER'S XY RESOLUTION AND TOLERANCE ARE FROM ITS SPATIAL REFERENCE'S xyUnits AND xyTolerance (WHEN AGO GIVES
+#   THEM; OTHERWISE, THE DEFAULTS OF THE SPATIAL REFERENCE ARE USED, WHICH ARE ALSO AGO'S).
+#   TAKES WHAT get_preparation RETURNED. (CALLED W/ arcpy_lock HELD.)
+def get_preparation_settings(preparation):
+   the_settings = {}
+   if "spatial_reference" in preparation:
+      spatial_reference = preparation["spatial_reference"]
+      the_wkid = spatial_reference.get("latestWkid", spatial_reference.get("wkid"))
+      if the_wkid != None:
+         output_reference = arcpy.SpatialReference(the_wkid)
+      else:
+         output_reference = arcpy.SpatialReference()
+         output_reference.loadFromString(spatial_reference["wkt"])
+      if preparation["snap"] == True and spatial_reference.get("xyUnits", 0) > 0:
+         output_reference.XYResolution = 1 / spatial_reference["xyUnits"]
+      if preparation["snap"] == True and spatial_reference.get("xyTolerance", 0) > 0:
+         output_reference.XYTolerance = spatial_reference["xyTolerance"]
+      the_settings["outputCoordinateSystem"] = output_reference
+   if "transformation" in preparation:
+      the_settings["geographicTransformations"] = preparation["transformation"]
+   return the_settings
+
+#THIS FUNCTION RETURNS A FIELD MAPPING (arcpy.FieldMappings) FOR COPYING AN EGDB SOURCE W/ ONLY THE FIELDS THAT THE FEATURE
+#   LAYER HAS (SEE THE "drop_fields" OPTION OF layers), OR "" (COPY ALL FIELDS) IF THERE'S NO LIST OF FIELDS TO KEEP.
+#   THE FIRST ARGUMENT IS THE EGDB SOURCE. THE SECOND ARGUMENT IS WHAT get_preparation RETURNED. (CALLED W/ arcpy_lock HELD.)
+def get_field_mapping(the_data_object, preparation):
+   if "keep_fields" not in preparation:
+      return ""
+   field_mappings = arcpy.FieldMappings()
+   field_mappings.addTable(the_data_object)
+   dropped_fields = []
+   for k in reversed(range(field_mappings.fieldCount)):
+      the_name = field_mappings.getFieldMap(k).getInputFieldName(0)
+      if the_name.upper() not in preparation["keep_fields"]:
+         field_mappings.removeFieldMap(k)
+         dropped_fields.append(the_name)
+   if len(dropped_fields) > 0:
+      make_note("Leaving out " + str(len(dropped_fields)) + " field(s) that the feature layer doesn't have: " + ", ".join(reversed(dropped_fields)) + ".", True)
+   return field_mappings
+
+#THIS FUNCTION RETURNS THE SNAPSHOT (SEE get_row_hashes) KEPT FROM THE LAST SUCCESSFUL RELOAD OF A FEATURE LAYER IN
+#   "delta" MODE. TAKES THE ITEM ID OF THE FEATURE SERVICE. RETURNS None IF THERE'S NO SNAPSHOT.
+def load_snapshot(item_id):
+   snapshot_path = os.path.join(sys.path[0], "EGDB_To_OpenData_snapshots", item_id + ".json")
+   if os.path.exists(snapshot_path) == False:
+      return None
+   with open(snapshot_path, "r") as snapshot_file:
+      return json.load(snapshot_file)
+
+#THIS FUNCTION KEEPS A GIVEN SNAPSHOT (SEE get_row_hashes) OF THE EGDB SOURCE OF A FEATURE LAYER THAT'S RELOADED IN
+#   "delta" MODE. TAKES THE ITEM ID OF THE FEATURE SERVICE AND THE SNAPSHOT. IF THE SNAPSHOT IS None, DELETES THE KEPT
+#   SNAPSHOT (SO THAT THE NEXT RELOAD IS A TRUNCATE+APPEND).
+def save_snapshot(item_id, the_snapshot):
+   snapshot_folder = os.path.join(sys.path[0], "EGDB_To_OpenData_snapshots")
+   snapshot_path = os.path.join(snapshot_folder, item_id + ".json")
+   if the_snapshot == None:
+      if os.path.exists(snapshot_path):
+         os.remove(snapshot_path)
+      return
+   os.makedirs(snapshot_folder, exist_ok = True)
+   with open(snapshot_path + ".tmp", "w") as snapshot_file:
+      json.dump(the_snapshot, snapshot_file)
+   os.replace(snapshot_path + ".tmp", snapshot_path)
+
+#THIS FUNCTION READS THE STATE FILE (EGDB_To_OpenData_state.json IN SCRIPT'S FOLDER) INTO reload_state.
+#   THE STATE FILE HOLDS, FOR EACH ITEM ID, WHAT'S KEPT FROM THE LAST SUCCESSFUL RELOAD OF THAT FEATURE LAYER.
+#   IF THERE'S NO STATE FILE YET, reload_state IS LEFT EMPTY.
+def load_state():
+   global reload_state
+   state_path = os.path.join(sys.path[0], "EGDB_To_OpenData_state.json")
+   if os.path.exists(state_path):
+      with open(state_path, "r") as state_file:
+         reload_state = json.load(state_file)
+
+#THIS FUNCTION KEEPS GIVEN INFO ABOUT A FEATURE LAYER IN reload_state AND WRITES reload_state INTO THE STATE FILE.
+#   THE FIRST ARGUMENT IS THE ITEM ID OF THE FEATURE SERVICE.
+#   THE SECOND ARGUMENT IS A DICTIONARY OF THE INFO TO KEEP (ADDED TO ANY INFO ALREADY KEPT FOR THAT ITEM ID).
+#   (WRITES A TEMPORARY FILE FIRST AND THEN REPLACES THE STATE FILE, SO THAT A CRASH CAN'T LEAVE A HALF-WRITTEN STATE FILE.)
+def save_state(item_id, the_info):
+   state_path = os.path.join(sys.path[0], "EGDB_To_OpenData_state.json")
+   with state_lock:
+      if item_id not in reload_state:
+         reload_state[item_id] = {}
+      reload_state[item_id].update(the_info)
+      with open(state_path + ".tmp", "w") as state_file:
+         json.dump(reload_state, state_file, indent = 1, sort_keys = True)
+      os.replace(state_path + ".tmp", state_path)
+
+#THIS FUNCTION RETURNS THE JOURNAL OF THE LAST RUN (EGDB_To_OpenData_journal.json IN SCRIPT'S FOLDER), OR None IF THERE'S NONE.
+#   THE JOURNAL IS LEFT BEHIND BY A RUN THAT WAS INTERRUPTED OR THAT HAD FEATURE LAYERS FAIL TO RELOAD (SEE save_checkpoint).
+def load_journal():
+   journal_path = os.path.join(sys.path[0], "EGDB_To_OpenData_journal.json")
+   if os.path.exists(journal_path) == False:
+      return None
+   with open(journal_path, "r") as journal_file:
+      return json.load(journal_file)
+
+#THIS FUNCTION WRITES run_journal INTO THE JOURNAL FILE. IF run_journal IS EMPTY, DELETES THE JOURNAL FILE.
+#   (WRITES A TEMPORARY FILE FIRST AND THEN REPLACES THE JOURNAL FILE, SO THAT A CRASH CAN'T LEAVE A HALF-WRITTEN JOURNAL FILE.)
+def save_journal():
+   journal_path = os.path.join(sys.path[0], "EGDB_To_OpenData_journal.json")
+   with journal_lock:
+      if len(run_journal) == 0:
+         if os.path.exists(journal_path):
+            os.remove(journal_path)
+         return
+      with open(journal_path + ".tmp", "w") as journal_file:
+         json.dump(run_journal, journal_file, indent = 1, sort_keys = True)
+      os.replace(journal_path + ".tmp", journal_path)
+
+#THIS FUNCTION KEEPS THE PROGRESS OF A JOB IN THE JOURNAL FILE: THE STAGES IT HAS FINISHED, WHETHER IT'S DONE, AND WHAT'S
+#   NEEDED TO PICK IT UP AGAIN (SEE checkpoint_keys), INCLUDING THE PATHS OF ITS STAGED FILES AND THE ITEM IDS OF ITS UPLOADS.
+#   CALLED AFTER EACH STAGE OF A JOB, AND WHEN AN UPLOAD IS STARTED (SO THAT A RUN THAT DIES MID-UPLOAD DOESN'T LOSE TRACK OF
+#   THE PARTLY-UPLOADED ITEM). TAKES THE JOB.
+def save_checkpoint(the_job):
+   the_checkpoint = {"stages_done": list(the_job["stages_done"]), "done": "load" in the_job["stages_done"] or the_job.get("skipped") == True}
+   for a_key in checkpoint_keys:
+      if a_key in the_job:
+         the_checkpoint[a_key] = the_job[a_key]
+   if "shards" in the_job:
+      the_checkpoint["shards"] = []
+      for shard_job in the_job["shards"]:
+         shard_checkpoint = {"where_clause": shard_job["where_clause"]}
+         for a_key in checkpoint_keys:
+            if a_key in shard_job:
+               shard_checkpoint[a_key] = shard_job[a_key]
+         the_checkpoint["shards"].append(shard_checkpoint)
+   with journal_lock:
+      run_journal["layers"][the_job["layer"][4]] = the_checkpoint
+   save_journal()
+
+#THIS FUNCTION PICKS UP A JOB WHERE AN INTERRUPTED RUN LEFT IT (W/ --resume), FROM ITS CHECKPOINT IN THE JOURNAL OF THAT RUN.
+#   STAGES THAT WERE FINISHED AREN'T RUN AGAIN IF WHAT THEY MADE IS STILL THERE: THE TEMPORARY .gdb OR .csv/.geojson (EXPORT),
+#   THE .zip (ZIP), AND THE UPLOADED ITEM IN AGO (UPLOAD). OTHERWISE, THE JOB STARTS AGAIN FROM THE FIRST STAGE WHOSE RESULT IS
+#   GONE. THE LOAD STAGE IS ALWAYS RUN AGAIN IN FULL (A TRUNCATE+APPEND CAN'T BE PICKED UP PART-WAY). A JOB IN "delta" MODE
+#   STARTS OVER (ITS ROW HASHES AREN'T KEPT IN THE JOURNAL). PARTLY-UPLOADED ITEMS THAT AREN'T PICKED UP ARE DELETED FROM AGO,
+#   AND WHAT THE STAGES THAT RUN AGAIN LEFT IN THE TEMPORARY SUBFOLDER IS DELETED (SEE delete_job_files).
+#   THE FIRST ARGUMENT IS THE JOB. THE SECOND ARGUMENT IS ITS CHECKPOINT.
+def restore_checkpoint(the_job, the_checkpoint):
+   i = the_job["layer"]
+   copy_jobs = [the_job]
+   for a_key in checkpoint_keys:
+      if a_key in the_checkpoint:
+         the_job[a_key] = the_checkpoint[a_key]
+   if "shards" in the_checkpoint:
+      the_job["shards"] = []
+      for k in range(len(the_checkpoint["shards"])):
+         shard_checkpoint = the_checkpoint["shards"][k]
+         shard_job = make_shard_job(the_job, k + 1, len(the_checkpoint["shards"]), shard_checkpoint["where_clause"])
+         for a_key in checkpoint_keys:
+            if a_key in shard_checkpoint:
+               shard_job[a_key] = shard_checkpoint[a_key]
+         the_job["shards"].append(shard_job)
+      copy_jobs = the_job["shards"]
+   stages_done = the_checkpoint["stages_done"]
+   if i[6].get("mode") == "delta":
+      stages_done = []
+   #(FIND THE LAST FINISHED STAGE WHOSE RESULT IS STILL THERE; THE JOB PICKS UP AFTER IT)
+   temp_subfolder = the_job["temp_subfolder"]
+   stages_kept = []
+   if "upload" in stages_done and False not in [copy_job.get("gdb_item_id") != None and ago_call(lambda gis: gis.content.get(copy_job["gdb_item_id"])) != None for copy_job in copy_jobs]:
+      stages_kept = ["export", "zip", "upload"]
+   elif "zip" in stages_done and False not in [os.path.exists(copy_job.get("zip_path", "")) or (copy_job.get("stream_upload") == True and os.path.isdir(os.path.join(temp_subfolder, copy_job["gdb_name"]))) for copy_job in copy_jobs]:
+      stages_kept = ["export", "zip"]
+   elif "export" in stages_done and False not in [os.path.isdir(os.path.join(temp_subfolder, copy_job["gdb_name"])) or os.path.exists(copy_job.get("rows_path", "")) for copy_job in copy_jobs]:
+      stages_kept = ["export"]
+   if "upload" not in stages_kept:
+      for copy_job in copy_jobs:
+         delete_upload(copy_job)
+         copy_job.pop("uploaded", None)
+   #(DELETE WHAT THE STAGES THAT RUN AGAIN LEFT IN THE TEMPORARY SUBFOLDER, SO THAT THEY CAN MAKE IT AGAIN)
+   if "export" not in stages_kept:
+      delete_job_files(the_job)
+   elif "zip" not in stages_kept:
+      delete_job_files(the_job, False)
+   if len(stages_kept) == 0:
+      #(START OVER: A NEW JOB W/ NOTHING PICKED UP)
+      the_job.clear()
+      the_job.update(make_job(i, temp_subfolder))
+   else:
+      make_note("[" + i[3] + "] Picking up reload of feature service " + i[3] + " after stage(s): " + ", ".join(stages_kept) + ".", True)
+   the_job["stages_done"] = stages_kept
+
+#THIS FUNCTION DELETES WHAT A JOB (AND EACH OF ITS SHARDS) LEFT IN THE TEMPORARY SUBFOLDER, SO THAT THE STAGES THAT MADE IT CAN
+#   RUN AGAIN (E.G., arcpy CAN'T CREATE A .gdb THAT'S ALREADY THERE): ITS TEMPORARY .gdb'S AND .csv/.geojson (EXPORT STAGE; ALL
+#   NAMED DeleteMe_<ITEM ID>..., SO THAT THEY'RE FOUND EVEN IF THE JOB THAT MADE THEM WASN'T KEPT IN THE JOURNAL), AND ITS .zip'S
+#   AND ".part" FILES (ZIP STAGE).
+#   THE FIRST ARGUMENT IS THE JOB. THE SECOND ARGUMENT (OPTIONAL) IS False TO DELETE ONLY WHAT THE ZIP STAGE LEFT.
+def delete_job_files(the_job, from_export = True):
+   temp_subfolder = the_job["temp_subfolder"]
+   copy_jobs = [the_job] + the_job.get("shards", [])
+   the_paths = [copy_job.get("zip_path") for copy_job in copy_jobs if copy_job.get("zip_path") != copy_job.get("rows_path")]
+   for a_file in os.listdir(temp_subfolder):
+      if from_export == True and (a_file.startswith("DeleteMe_" + the_job["layer"][4] + ".") or a_file.startswith("DeleteMe_" + the_job["layer"][4] + "_")):
+         the_paths.append(os.path.join(temp_subfolder, a_file))
+      elif a_file.endswith(".part") and True in [a_file.startswith(copy_job["gdb_name"] + ".") for copy_job in copy_jobs]:
+         the_paths.append(os.path.join(temp_subfolder, a_file))
+   for a_path in the_paths:
+      if a_path != None and os.path.isdir(a_path):
+         with arcpy_lock:
+            arcpy.management.Delete(a_path)
+      elif a_path != None and os.path.exists(a_path):
+         os.remove(a_path)
+
+#THIS FUNCTION CLEANS UP AFTER AN INTERRUPTED RUN THAT WON'T BE RESUMED: DELETES FROM AGO THE ITEMS THAT ITS UNFINISHED JOBS
+#   UPLOADED, AND DELETES ITS TEMPORARY SUBFOLDER. TAKES THE JOURNAL OF THAT RUN.
+def clean_up_journal(the_journal):
+   for item_id, the_checkpoint in the_journal["layers"].items():
+      if the_checkpoint["done"] == True:
+         continue
+      for copy_checkpoint in the_checkpoint.get("shards", [the_checkpoint]):
+         if copy_checkpoint.get("gdb_item_id") != None:
+            make_note("Deleting item " + copy_checkpoint["gdb_item_id"] + " (uploaded by the interrupted run) from AGO...", True)
+            delete_upload(dict(copy_checkpoint))
+   temp_subfolder = os.path.join(sys.path[0], the_journal["guid"])
+   if os.path.exists(temp_subfolder):
+      make_note("Deleting temporary subfolder " + the_journal["guid"] + " of the interrupted run...", True)
+      arcpy.management.Delete(temp_subfolder)
+
+#THIS FUNCTION MAKES SURE THAT THE EGDB SOURCE OF EACH LIST IN layers EXISTS, AND APPENDS TO EACH LIST A DICTIONARY OF
+#   OPTIONS (IF IT HAS NONE) AND THE FULL PATH OF ITS EGDB SOURCE. EGDB SOURCES ARE CHECKED 1 AT A TIME (SERIALLY), W/
+#   arcpy_lock HELD (arcpy ISN'T SAFE TO RUN FROM SEVERAL WORKERS AT THE SAME TIME).
+#   RETURNS A LIST OF PROBLEMS FOUND (STRINGS); THE LIST IS EMPTY IF NONE WERE FOUND.
+def check_egdb_sources():
+   problems = []
    for i in layers:
       j = os.path.join(sys.path[0], i[0])
       if i[1] != "":
          j = os.path.join(j, i[1])
       j = os.path.join(j, i[2])
-      if arcpy.Exists(j) == False:
-         make_note("Couldn't find EGDB-source " + i[2] + " (source for feature-layer " + i[3] + "). Script terminated.", True, True)
-         sys.exit()
-      #(APPEND FULL PATH AS NEW ITEM ON LIST)
+      if len(i) > 6 and i[6].get("mode") == "delta" and i[6].get("id_field", "") == "":
+         problems.append("Feature-layer " + i[3] + " is set to \"delta\" mode but has no \"id_field\" option.")
+      if len(i) > 6 and i[6].get("staging", "auto") not in ["fgdb", "rows", "auto"]:
+         problems.append("Feature-layer " + i[3] + " has a \"staging\" option that isn't \"fgdb\", \"rows\", or \"auto\".")
+      if len(i) > 6 and i[6].get("mode") == "swap" and (type(i[6].get("staging_items")) != list or len(set(i[6]["staging_items"])) != 2 or i[4] in i[6]["staging_items"]):
+         problems.append("Feature-layer " + i[3] + " is set to \"swap\" mode but its \"staging_items\" option isn't a list of 2 other item IDs.")
+      if len(i) > 6 and i[6].get("snap") == True and i[6].get("project") != True:
+         problems.append("Feature-layer " + i[3] + " has a \"snap\" option but no \"project\" option.")
+      if len(i) > 6 and "schedule" in i[6]:
+         try:
+            get_schedule(i)
+         except Exception as e:
+            problems.append("Feature-layer " + i[3] + " has a \"schedule\" option that isn't a valid cron expression (" + str(e) + ").")
+      if len(i) > 6 and "window" in i[6]:
+         try:
+            get_window(i[6]["window"])
+         except Exception as e:
+            problems.append("Feature-layer " + i[3] + " has a \"window\" option that isn't valid (" + str(e) + ").")
+      #(IF LIST HAS NO DICTIONARY OF OPTIONS, APPEND AN EMPTY ONE; THEN APPEND FULL PATH AS NEW ITEM ON LIST)
+      if len(i) == 6:
+         i.append({})
       i.append(j)
-         
-   #CONNECT TO ARCGIS ONLINE
-   make_note("Connecting to AGO...", True)   
-   gis = GIS("https://www.arcgis.com",  username = u, password = p)
+      with arcpy_lock:
+         source_exists = arcpy.Exists(j)
+      if source_exists == False:
+         problems.append("Couldn't find EGDB-source " + i[2] + " (source for feature-layer " + i[3] + ").")
+   return problems
 
-   #MAKE SURE GIVEN FEATURE LAYERS EXIST AND ARE IN 1-LAYER FEATURE SERVICES
-   make_note("Making sure given feature layers exist and are in 1-layer feature services...", True)
+#THIS FUNCTION MAKES SURE THAT THE ITEM OF EACH LIST IN layers EXISTS, HAS THE GIVEN TITLE, AND IS A 1-LAYER FEATURE SERVICE.
+#   ITEMS ARE LOOKED UP IN BATCHES (validation_batch_size ITEM IDS PER SEARCH OF AGO), AND THEN THEIR FEATURE SERVICES ARE
+#   LOOKED UP AT THE SAME TIME (UP TO validation_workers AT A TIME). WHAT'S LOOKED UP IS KEPT FOR THE RELOADS (SEE get_layer_info).
+#   (EACH CALL TO AGO IS TRIED AGAIN IF IT FAILS; SEE ago_call.)
+#   RETURNS A LIST OF PROBLEMS FOUND (STRINGS); THE LIST IS EMPTY IF NONE WERE FOUND.
+def check_feature_layers():
+   problems = []
+   #LOOK UP ITEMS IN BATCHES
+   #(IN "swap" MODE, ALSO THE HIDDEN FEATURE SERVICES OF THE PUBLIC VIEW)
+   item_ids = []
    for i in layers:
-      j = gis.content.get(i[4])
+      for item_id in [i[4]] + (i[6]["staging_items"] if i[6].get("mode") == "swap" and type(i[6].get("staging_items")) == list else []):
+         if item_id not in item_ids:
+            item_ids.append(item_id)
+   #(IF A BATCH CAN'T BE SEARCHED FOR, ITS ITEMS ARE LOOKED UP 1 BY 1 BELOW)
+   found_items = {}
+   j = 0
+   while j < len(item_ids):
+      the_batch = item_ids[j:j + validation_batch_size]
+      try:
+         for the_item in ago_call(lambda gis: gis.content.search(query = " OR ".join(["id:" + item_id for item_id in the_batch]), max_items = len(the_batch))):
+            found_items[the_item.id] = the_item
+      except Exception as e:
+         make_note("Couldn't search for batch of " + str(len(the_batch)) + " items (" + repr(e) + "). They're looked up 1 by 1.", True)
+      j += validation_batch_size
+   #THIS INNER FUNCTION LOOKS UP THE FEATURE SERVICE OF 1 ITEM ID
+   #(AN ITEM THAT THE SEARCH DIDN'T RETURN, E.G., BECAUSE IT'S NOT IN THE SEARCH INDEX YET, IS LOOKED UP BY ITSELF; IF IT
+   #CAN'T BE LOOKED UP, ITS ERROR IS RETURNED, SO THE OTHER ITEMS ARE STILL CHECKED AND IT'S REPORTED W/ THE OTHER PROBLEMS)
+   def look_up_item(item_id):
+      try:
+         return ago_call(lambda gis: get_layer_info(gis, item_id, found_items.get(item_id)))
+      except Exception as e:
+         return {"error": repr(e)}
+   with ThreadPoolExecutor(max_workers = validation_workers) as executor:
+      the_infos = dict(zip(item_ids, executor.map(look_up_item, item_ids)))
+   for i in layers:
+      j = the_infos[i[4]]
       if j == None:
-         make_note("Couldn't find item w/ ID " + i[4] + " (given title is + " + i[3] + "). Script terminated.", True, True)
-         sys.exit()
-      if j.title.lower() != i[3].lower():
-         make_note("Item w/ ID " + i[4] + " wasn't matched to an item w/ given title " + i[3] + ". Title w/ that ID is " + j.title + ". Script terminated.", True, True)
-         sys.exit()
-      if len(j.layers) != 1:
+         problems.append("Couldn't find item w/ ID " + i[4] + " (given title is " + i[3] + ").")
+      elif "error" in j:
+         problems.append("Couldn't look up item w/ ID " + i[4] + " (given title is " + i[3] + ") in AGO (" + j["error"] + ").")
+      elif j["title"].lower() != i[3].lower():
+         problems.append("Item w/ ID " + i[4] + " wasn't matched to an item w/ given title " + i[3] + ". Title w/ that ID is " + j["title"] + ".")
+      elif j["layer_count"] != 1:
          #(IF LENGTH OF layers ISN'T 1, SEE IF LENGTH OF tables IS 1, WHICH WOULD BE THE CASE IF FEATURE SERVICE HOSTS A NON-SPATIAL TABLE)
-         if len(j.tables) != 1:
-            make_note("Item w/ ID " + i[4] + " (given title is " + i[3] + ") isn't a 1-layer feature-service as expected. Script terminated.", True, True)
-            sys.exit()      
-   
-   #CREATE A TEMPORARY GUID-NAMED SUBFOLDER IN SCRIPT'S FOLDER TO ASSEMBLE EGDB-SOURCE DATA FOR UPLOAD TO AGO
-   make_note("Creating temporary subfolder to assemble EGDB-source data to be loaded...", True)
-   the_GUID = str(uuid.uuid4())
-   os.mkdir(os.path.join(sys.path[0], the_GUID))
-   temp_subfolder = os.path.join(sys.path[0], the_GUID)
-   make_note("Temporary subfolder for assembly of EGDB-source data is " + the_GUID + ".", True)
-
-   #GET CURRENT DAY OF WEEK
-   s = time.localtime()
-   the_day = s.tm_wday
-   if the_day == 0:
-      the_day = "M"
-   elif the_day == 1:
-      the_day = "T"
-   elif the_day == 2:
-      the_day = "W"
-   elif the_day == 3:
-      the_day = "R"
-   elif the_day == 4:
-      the_day = "F"
-   elif the_day == 5:
-      the_day = "S"
-   else:
-      the_day = "U"
-   make_note("Today is day " + the_day + ".", True)
+         if j["table_count"] != 1:
+            problems.append("Item w/ ID " + i[4] + " (given title is " + i[3] + ") isn't a 1-layer feature-service as expected.")
+      if i[6].get("mode") == "swap" and type(i[6].get("staging_items")) == list:
+         for item_id in i[6]["staging_items"]:
+            if the_infos[item_id] == None:
+               problems.append("Couldn't find item w/ ID " + item_id + " (in \"staging_items\" option of feature-layer " + i[3] + ").")
+            elif "error" in the_infos[item_id]:
+               problems.append("Couldn't look up item w/ ID " + item_id + " (in \"staging_items\" option of feature-layer " + i[3] + ") in AGO (" + the_infos[item_id]["error"] + ").")
+            elif the_infos[item_id]["layer_count"] + the_infos[item_id]["table_count"] != 1:
+               problems.append("Item w/ ID " + item_id + " (in \"staging_items\" option of feature-layer " + i[3] + ") isn't a 1-layer feature-service as expected.")
+   return problems
 
-   #RELOAD EACH FEATURE LAYER
-   make_note("Entering loop to reload each feature layer...", True)
-   for i in layers:
-      #FIND OUT IF FEATURE SERVICE GETS RELOADED TODAY
-      okay_days = i[5].split(",")
-      j = 0
-      while j < len(okay_days):
-         okay_days[j] = okay_days[j].upper().strip()
-         j += 1
-      #IF IT DOES, THEN RELOAD IT
-      if the_day.upper() in okay_days:
-         make_note("Feature service w/ title " + i[3] + " and ID " + i[4] + " gets reloaded today. Starting reload steps.", True, True)
-         #MAKE FILE GEODATABASE
-         #(NAME IT BASED ON ITEM ID OF RELATED FEATURE-SERVICE)
-         gdb_name = "DeleteMe_" + i[4] + ".gdb"
-         make_note("Making temporary geodatabase " + gdb_name + " ...", True)
-         arcpy.management.CreateFileGDB(temp_subfolder, gdb_name)
-         #COPY EGDB SOURCE INTO TEMPORARY FILE GEODTABASE
-         #(IF IT'S A FEATURE CLASS)
-         if arcpy.Describe(i[len(i) - 1]).dataType == "FeatureClass":
-            make_note("Copying EGDB source (a feature class) into temporary file geodatabase " + gdb_name + " ...", True)
-            arcpy.conversion.FeatureClassToFeatureClass(i[len(i) - 1], os.path.join(temp_subfolder, gdb_name), get_name(i[2]))
-         #(OTHERWISE, IT MUST BE A NON-SPATIAL TABLE)
+#THIS FUNCTION RETURNS THE TOTAL SIZE (IN BYTES) OF THE FILES IN A FOLDER (E.G., A FILE GEODATABASE).
+def get_folder_bytes(the_folder):
+   folder_bytes = 0
+   for a_file in os.listdir(the_folder):
+      folder_bytes += os.path.getsize(os.path.join(the_folder, a_file))
+   return folder_bytes
+
+#THIS FUNCTION ADDS AN AMOUNT TO 1 OF THE METRICS OF 1 STEP OF A JOB (SEE measure_step).
+#   THE FIRST ARGUMENT IS THE JOB. THE SECOND ARGUMENT IS THE NAME OF THE STEP. THE THIRD ARGUMENT IS THE NAME OF THE METRIC
+#   ("seconds", "rows", "bytes", OR "retries"). THE FOURTH ARGUMENT IS THE AMOUNT.
+def add_metric(the_job, step_name, metric_name, amount):
+   the_step = the_job["metrics"].setdefault(step_name, {"seconds": 0.0, "rows": 0, "bytes": 0, "retries": 0})
+   the_step[metric_name] += amount
+
+#THIS FUNCTION MEASURES HOW LONG 1 STEP OF A JOB TAKES (TO A FRACTION OF A SECOND). USE IT W/ A with STATEMENT; FOR EXAMPLE:
+#      with measure_step(the_job, "truncate"):
+#         the_result = f_layer.manager.truncate()
+#   WHILE THE STEP RUNS, CALLS TO AGO THAT ARE TRIED AGAIN (SEE ago_call) ARE COUNTED AS RETRIES OF THE STEP. AFTERWARD, THE
+#   JOB AND STEP THAT WERE BEING MEASURED BEFORE (E.G., THE STAGE THAT THE STEP IS PART OF) ARE MEASURED AGAIN.
+@contextlib.contextmanager
+def measure_step(the_job, step_name):
+   outer_job = getattr(layer_context, "job", None)
+   outer_step = getattr(layer_context, "step", None)
+   layer_context.job = the_job
+   layer_context.step = step_name
+   start_time = time.perf_counter()
+   try:
+      yield
+   finally:
+      add_metric(the_job, step_name, "seconds", time.perf_counter() - start_time)
+      layer_context.job = outer_job
+      layer_context.step = outer_step
+
+#THIS FUNCTION WRITES THE METRICS OF A RUN INTO 2 FILES IN THE SCRIPT'S FOLDER (NEXT TO THE LOG FILE):
+#      EGDB_To_OpenData_metrics.json -THIS RUN'S METRICS (REPLACED EACH RUN).
+#      EGDB_To_OpenData_metrics.csv -1 ROW PER STEP OF EACH FEATURE LAYER, ADDED EACH RUN (FOR SEEING TRENDS OVER TIME).
+#   FOR EACH STEP: seconds, rows, bytes, retries, rows_per_second, AND mb_per_second.
+#   THE FIRST ARGUMENT IS THE LIST OF JOBS. THE SECOND ARGUMENT IS WHEN THE RUN STARTED (time.time()).
+def write_metrics(jobs, run_start):
+   run_started = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(run_start))
+   the_metrics = {"run_started": run_started, "run_seconds": round(time.time() - run_start, 3), "layers": []}
+   csv_rows = []
+   for the_job in jobs:
+      i = the_job["layer"]
+      the_steps = {}
+      for step_name, the_step in the_job["metrics"].items():
+         the_step = dict(the_step, seconds = round(the_step["seconds"], 3))
+         the_step["rows_per_second"] = round(the_step["rows"] / the_step["seconds"], 1) if the_step["seconds"] > 0 else 0
+         the_step["mb_per_second"] = round(the_step["bytes"] / 1048576 / the_step["seconds"], 3) if the_step["seconds"] > 0 else 0
+         the_steps[step_name] = the_step
+         csv_rows.append([run_started, i[3], i[4], step_name, the_step["seconds"], the_step["rows"], the_step["bytes"], the_step["retries"], the_step["rows_per_second"], the_step["mb_per_second"]])
+      the_metrics["layers"].append({"title": i[3], "item_id": i[4], "success": the_job["success"], "skipped": the_job.get("skipped") == True, "steps": the_steps, "ago_jobs": the_job.get("ago_jobs", [])})
+   with open(os.path.join(sys.path[0], "EGDB_To_OpenData_metrics.json"), "w") as metrics_file:
+      json.dump(the_metrics, metrics_file, indent = 1)
+   csv_path = os.path.join(sys.path[0], "EGDB_To_OpenData_metrics.csv")
+   is_new = os.path.exists(csv_path) == False
+   with open(csv_path, "a", newline = "") as metrics_file:
+      the_writer = csv.writer(metrics_file)
+      if is_new == True:
+         the_writer.writerow(["run_started", "title", "item_id", "step", "seconds", "rows", "bytes", "retries", "rows_per_second", "mb_per_second"])
+      the_writer.writerows(csv_rows)
+
+#THIS FUNCTION WRITES THE cProfile OUTPUT OF THE FEATURE LAYER CHOSEN W/ profile_item_id INTO EGDB_To_OpenData_profile.prof
+#   AND (AS TEXT, SLOWEST FUNCTIONS FIRST) EGDB_To_OpenData_profile.txt IN THE SCRIPT'S FOLDER.
+#   TAKES THE LIST OF JOBS. DOES NOTHING IF NO JOB WAS PROFILED.
+def write_profile(jobs):
+   profiles = [a_profile for the_job in jobs for a_profile in the_job.get("profiles", [])]
+   if len(profiles) == 0:
+      return
+   the_stats = pstats.Stats(*profiles)
+   the_stats.dump_stats(os.path.join(sys.path[0], "EGDB_To_OpenData_profile.prof"))
+   with open(os.path.join(sys.path[0], "EGDB_To_OpenData_profile.txt"), "w") as profile_file:
+      the_stats.stream = profile_file
+      the_stats.sort_stats("cumulative").print_stats(60)
+
+#THE FOLLOWING FUNCTIONS ARE THE STAGES OF RELOADING 1 FEATURE LAYER (EXPORT, ZIP, UPLOAD, LOAD).
+#   EACH STAGE TAKES A "JOB" (A DICTIONARY THAT HOLDS EVERYTHING ABOUT RELOADING 1 FEATURE LAYER;
+#   SEE make_job) AND RETURNS True IF THE STAGE SUCCEEDED OR False IF IT FAILED. THE STAGES OF A
+#   JOB ARE RUN IN ORDER, BUT EACH STAGE MAY BE RUN BY A DIFFERENT WORKER (SEE run_pipeline).
+
+#THIS FUNCTION MAKES A JOB FOR RELOADING 1 FEATURE LAYER.
+#   THE FIRST ARGUMENT IS THE LAYER'S LIST FROM layers (W/ FULL PATH OF EGDB SOURCE APPENDED).
+#   THE SECOND ARGUMENT IS THE TEMPORARY SUBFOLDER IN WHICH THE TEMPORARY .gdb IS MADE.
+def make_job(i, temp_subfolder):
+   the_job = {}
+   the_job["layer"] = i
+   the_job["temp_subfolder"] = temp_subfolder
+   the_job["gdb_name"] = "DeleteMe_" + i[4] + ".gdb"
+   #(report COLLECTS THE NOTES THAT ARE EMAILED ABOUT THIS FEATURE LAYER; success IS SET WHEN THE JOB IS DONE)
+   the_job["report"] = []
+   the_job["success"] = None
+   #(metrics HOLDS WHAT'S MEASURED ABOUT EACH STEP OF THE RELOAD; SEE measure_step)
+   the_job["metrics"] = {}
+   #(stages_done LISTS THE STAGES THAT ARE FINISHED, SO THAT THEY AREN'T RUN AGAIN WHEN A RUN IS RESUMED; SEE save_checkpoint)
+   the_job["stages_done"] = []
+   return the_job
+
+#THIS FUNCTION MAKES A JOB FOR 1 SHARD OF A JOB (SEE shard_rows). THE SHARD'S JOB HAS ITS OWN TEMPORARY .gdb, .zip, AND UPLOAD,
+#   SO THAT THE ZIP AND UPLOAD STAGES CAN BE RUN ON IT; IT SHARES THE LAYER, EMAIL-REPORT SECTION, AND METRICS OF ITS JOB
+#   (ITS JOB IS ITS "parent").
+#   THE FIRST ARGUMENT IS THE JOB. THE SECOND ARGUMENT IS THE SHARD'S NUMBER. THE THIRD ARGUMENT IS THE NUMBER OF SHARDS.
+#   THE FOURTH ARGUMENT IS THE SQL WHERE-CLAUSE THAT SELECTS THE SHARD'S ROWS.
+def make_shard_job(the_job, shard_number, shard_count, where_clause):
+   shard_job = make_job(the_job["layer"], the_job["temp_subfolder"])
+   shard_job["gdb_name"] = "DeleteMe_" + the_job["layer"][4] + "_" + str(shard_number) + ".gdb"
+   shard_job["report"] = the_job["report"]
+   shard_job["metrics"] = the_job["metrics"]
+   shard_job["shard"] = "shard " + str(shard_number) + " of " + str(shard_count)
+   shard_job["where_clause"] = where_clause
+   shard_job["appended"] = False
+   shard_job["parent"] = the_job
+   return shard_job
+
+#THIS FUNCTION RETURNS THE OBJECTID RANGES THAT SPLIT A GIVEN EGDB SOURCE INTO SHARDS OF ABOUT shard_rows ROWS EACH, AS A LIST
+#   OF SQL WHERE-CLAUSES (E.G., "OBJECTID >= 1 AND OBJECTID < 1000001"). THE LAST RANGE IS LEFT OPEN, SO THAT NO ROW IS MISSED.
+#   (READS ONLY THE OBJECTIDS OF THE EGDB SOURCE, IN ORDER.)
+def get_shard_ranges(the_data_object):
+   oid_field = arcpy.Describe(the_data_object).OIDFieldName
+   first_oids = []
+   k = 0
+   with arcpy.da.SearchCursor(the_data_object, ["OID@"], sql_clause = (None, "ORDER BY " + oid_field)) as cursor:
+      for row in cursor:
+         if k % shard_rows == 0:
+            first_oids.append(row[0])
+         k += 1
+   the_ranges = []
+   for j in range(len(first_oids)):
+      if j + 1 < len(first_oids):
+         the_ranges.append(oid_field + " >= " + str(first_oids[j]) + " AND " + oid_field + " < " + str(first_oids[j + 1]))
+      else:
+         the_ranges.append(oid_field + " >= " + str(first_oids[j]))
+   return the_ranges
+
+#THIS FUNCTION RETURNS THE POOL OF WORKERS THAT WORK SHARDS (shard_pool), MAKING IT THE FIRST TIME. THE POOL HAS ENOUGH WORKERS
+#   FOR shard_workers SHARDS OF EACH JOB BEING RELOADED AT THE SAME TIME (A WORKER IS ONLY STARTED WHEN NO OTHER IS FREE).
+def get_shard_pool():
+   global shard_pool
+   with shard_pool_lock:
+      if shard_pool == None:
+         shard_pool = ThreadPoolExecutor(max_workers = shard_workers * (max_workers + sum(pipeline_workers.values())))
+      return shard_pool
+
+#THIS FUNCTION RUNS A GIVEN FUNCTION ON EACH SHARD OF A JOB THAT HASN'T BEEN DONE YET, UP TO shard_workers SHARDS AT THE SAME
+#   TIME (OR 1 AT A TIME), IN THE WORKERS OF shard_pool (SEE get_shard_pool). WHILE A SHARD IS WORKED, ITS NOTES ARE PREFIXED W/ ITS NUMBER (E.G., "[Big City Parcels] [shard 2 of 5] ").
+#   THE FIRST ARGUMENT IS THE JOB. THE SECOND ARGUMENT IS THE FUNCTION (IT TAKES THE SHARD'S JOB AND RETURNS True IF IT SUCCEEDED).
+#   THE THIRD ARGUMENT IS A FUNCTION THAT TAKES A SHARD'S JOB AND RETURNS True IF THE SHARD IS ALREADY DONE.
+#   THE FOURTH ARGUMENT (BOOLEAN) INDICATES IF SHARDS ARE WORKED AT THE SAME TIME.
+#   RETURNS True IF THE FUNCTION SUCCEEDED ON EVERY SHARD.
+def run_shards(the_job, the_function, is_done, at_same_time = True):
+   the_prefix = getattr(layer_context, "prefix", "")
+   the_step = getattr(layer_context, "step", None)
+   #THIS INNER FUNCTION WORKS 1 SHARD (IN THE WORKER THAT PICKS IT UP)
+   def run_shard(shard_job):
+      layer_context.prefix = the_prefix + "[" + shard_job["shard"] + "] "
+      layer_context.report = the_job["report"]
+      layer_context.job = the_job
+      layer_context.step = the_step
+      try:
+         return the_function(shard_job)
+      except Exception as e:
+         make_note("Something unexpected went wrong (" + repr(e) + ").", True, True)
+         return False
+      finally:
+         layer_context.prefix = ""
+         layer_context.report = None
+         layer_context.job = None
+         layer_context.step = None
+   shards_to_do = [shard_job for shard_job in the_job["shards"] if is_done(shard_job) == False]
+   at_a_time = shard_workers if at_same_time == True else 1
+   the_results = []
+   the_futures = []
+   for shard_job in shards_to_do:
+      #(WAIT FOR A SHARD TO FINISH BEFORE STARTING ANOTHER, SO THAT THIS JOB HAS UP TO at_a_time SHARDS IN THE POOL)
+      if len(the_futures) == at_a_time:
+         done_futures, the_futures = wait(the_futures, return_when = FIRST_COMPLETED)
+         the_futures = list(the_futures)
+         the_results += [a_future.result() for a_future in done_futures]
+      the_futures.append(get_shard_pool().submit(run_shard, shard_job))
+   the_results += [a_future.result() for a_future in the_futures]
+   return False not in the_results
+
+#THIS FUNCTION TRUNCATES THE FEATURE LAYER OF A JOB, TRYING UNDER THE "truncate" RETRY BUDGET.
+#   TAKES THE JOB. RETURNS True IF THE FEATURE LAYER WAS TRUNCATED.
+def truncate_layer(the_job):
+   i = the_job["layer"]
+   the_retry = RetryPolicy("truncate")
+   the_result = None
+   while str(the_result) != "{'success': True}" and the_retry.next_try() == True:
+      make_note("Try #" + str(the_retry.tries) + " -  Truncating feature-layer of feature-service " + i[3] + " ...", True, True)
+      try:
+         with measure_step(the_job, "truncate"):
+            the_result = ago_call(lambda gis: get_layer(gis, the_job.get("load_item_id", i[4])).manager.truncate(), False)
+         if str(the_result) != "{'success': True}":
+            make_note("Something went wrong with truncation.", True)
+            the_retry.failed()
+      except Exception as e:
+         make_note("Something went wrong with truncation (" + repr(e) + ").", True)
+         the_retry.failed(e)
+   add_metric(the_job, "truncate", "retries", the_retry.tries - 1)
+   return str(the_result) == "{'success': True}"
+
+#THIS FUNCTION APPENDS THE UPLOADED FILE OF A JOB (OR OF 1 SHARD OF A JOB) TO ITS FEATURE LAYER, TRYING UNDER THE "append" RETRY
+#   BUDGET. (EACH APPEND IS SENT W/ ROLLBACK ON FAILURE, SO A FAILED APPEND CAN BE TRIED AGAIN W/OUT TRUNCATING AGAIN. A BACKGROUND
+#   APPEND THAT TIMED OUT ISN'T TRIED AGAIN, SINCE IT MAY STILL BE RUNNING IN AGO; SEE ago_job_timed_out.)
+#   THE FIRST ARGUMENT IS THE JOB. THE SECOND ARGUMENT SAYS WHAT'S APPENDED (FOR NOTES). THE THIRD ARGUMENT (OPTIONAL) IS THE
+#   FIELD TO MATCH ROWS ON FOR AN UPSERT (None FOR A PLAIN APPEND).
+#   CALL IT INSIDE measure_step(the_job, "append"), SO THAT ITS TIME IS MEASURED AS THE "append" STEP.
+#   RETURNS True IF THE APPEND COMPLETED.
+def append_upload(the_job, the_name, upsert_matching_field = None):
+   i = the_job["layer"]
+   gdb_item_id = the_job["gdb_item_id"]
+   appended = False
+   the_retry = RetryPolicy("append")
+   while appended == False and the_retry.next_try() == True:
+      make_note("Try #" + str(the_retry.tries) + " - Appending " + the_name + "...", True, True)
+      try:
+         if async_jobs == True:
+            the_result = append_in_background(the_job, gdb_item_id, upsert_matching_field)
          else:
-            make_note("Copying EGDB source (a non-spatial table) into temporary file geodatabase " + gdb_name + "...", True)
-            arcpy.conversion.TableToTable(i[len(i) - 1], os.path.join(temp_subfolder, gdb_name), get_name(i[2]))
-         #UPLOAD ZIP TO AGO####################
-         success = False
-         counter = 0
-         gdb_properties={'title':gdb_name, 'type':'File Geodatabase', 'overwrite':True, 'description':'A temporary file for reloading data of feature service ' + i[3] + ', which has Item-ID ' + i[4] + '. This file can be deleted after reload.'}
-         while success == False and counter < max_tries:
-            try:
-               #ZIP THE FILE GEODATABASE
-               make_note("Zipping temporary file geodatabase...", True)
-               #(GIVING THE FILE GEODATABASE IN THE ZIP A DIFFERENT GUID-BASED NAME TO MAKE SURE NAME IS UNIQUE IN AGO)
-               gdb_name_for_uploading = "DeleteMe_" + str(uuid.uuid4()) + ".gdb"
-               zip_path = os.path.join(temp_subfolder, gdb_name_for_uploading + ".zip")
-               the_zip = zipfile.ZipFile(zip_path, 'x')
-               gdb_files = os.listdir(os.path.join(temp_subfolder, gdb_name))
-               for a_file in gdb_files:
-                  if a_file[len(a_file)- 5:len(a_file)].upper() != '.LOCK':
-                     the_zip.write(os.path.join(temp_subfolder, gdb_name, a_file), os.path.join(gdb_name_for_uploading, a_file))
-               the_zip.close()
-               make_note("Making fresh connection to AGO...", True)
-               del gis
-               gis = GIS("https://www.arcgis.com",  username = u, password = p)
-               make_note("Try #" + str(counter + 1) + " - Uploading zipped temporary geodatabase " + gdb_name_for_uploading + ".zip to AGO...", True)
-               gdb_item = gis.content.add(item_properties=gdb_properties, data=zip_path, folder=content_folder)
-               #(CAPTURE ITEM ID OF THE UPLOADED GEODATABASE)
-               gdb_item_id = gdb_item.id
-               success = True
-            except:
-               make_note("Something went wrong w/ uploading.", True)
-            counter += 1
-         if success == False:
-            make_note("A problem occurred when uploading zipped EGDB-source data to AGO for feature-service " + i[3] + "--tried " + str(max_tries) + " times. Script terminated. Clean up temporary .gdb's from folder " + content_folder + " in AGO (if there).", True, True)
-            sys.exit()
-         if counter > 1:
-            make_note("ALERT - It took " + str(counter) + " tries to successfully upload zipped temporary geodatabase to AGO for feature-service " + i[3] + ". This likely left some temporary .gdb's in folder " + content_folder + " in AGO. Check folder for cleanup.", True, True)
-         ####################
-         #CAPTURE PRE-APPEND RECORD-COUNT OF EGDB SOURCE
-         make_note("Record count of EGDB source " + get_name(i[2]) + " is " + get_count(i[len(i) - 1]) + ".", True, True)
-         #DETERMINE IF FEATURE SERVICE HAS A SPATIAL LAYER OR A NON-SPATIAL LAYER (NON-SPATIAL TABLE)
-         if len(gis.content.get(i[4]).layers) == 1:
-            is_spatial = True
+            #(NEITHER CALL IS TRIED AGAIN BY ITSELF; THIS LOOP TRIES BOTH AGAIN, UNDER THE "append" RETRY BUDGET)
+            the_source = ago_call(lambda gis: get_append_source(gis, the_job, gdb_item_id), False)
+            the_result = ago_call(lambda gis: get_layer(gis, the_job.get("load_item_id", i[4])).append(item_id = gdb_item_id, upsert = upsert_matching_field != None, upsert_matching_field = upsert_matching_field, rollback = True, **the_source), False)
+         if the_result == True:
+            appended = True
+         elif async_jobs == True and ago_job_timed_out(the_job) == True:
+            make_note("ALERT - Background append of " + the_name + " timed out and may still be running in AGO. Not trying it again.", True, True)
+            break
          else:
-            is_spatial = False
-         #CAPTURE PRE-APPEND RECORD-COUNT OF FEATURE LAYER
-         if is_spatial == True:
-            pre_append_feature_layer_count = str(gis.content.get(i[4]).layers[0].query(return_count_only = True))
+            make_note("Something went wrong with the append.", True)
+            the_retry.failed()
+      except Exception as e:
+         make_note("Something went wrong with the append (" + repr(e) + ").", True)
+         the_retry.failed(e)
+   add_metric(the_job, "append", "retries", the_retry.tries - 1)
+   return appended
+
+#THIS FUNCTION APPENDS 1 SHARD (FROM ITS UPLOADED .zip) TO THE FEATURE LAYER OF ITS JOB (SEE append_upload). IF A SHARD'S ROWS
+#   STILL GET APPENDED TWICE, THE RECORD COUNT CHECKED BY load_shards CATCHES IT.
+#   TAKES THE SHARD'S JOB. RETURNS True IF THE SHARD WAS APPENDED.
+def append_shard(shard_job):
+   shard_job["appended"] = append_upload(shard_job, shard_job["shard"] + " (" + shard_job["where_clause"] + ")")
+   if shard_job["appended"] == True:
+      make_note("Appended " + shard_job["shard"] + ".", True, True)
+   return shard_job["appended"]
+
+#THIS FUNCTION RELOADS THE FEATURE LAYER OF A SHARDED JOB: TRUNCATES IT ONCE (UNDER THE "truncate" RETRY BUDGET), THEN APPENDS EACH
+#   SHARD (SEE append_shard), 1 AFTER THE OTHER OR AT THE SAME TIME (SEE shard_parallel_appends), THEN CHECKS THAT THE FEATURE
+#   LAYER'S RECORD COUNT MATCHES THE EGDB SOURCE'S (A SHARD APPENDED TWICE OR ONLY PARTLY FAILS THE RELOAD).
+#   TAKES THE JOB. RETURNS True IF THE FEATURE LAYER WAS TRUNCATED, EVERY SHARD WAS APPENDED, AND THE RECORD COUNTS MATCH.
+def load_shards(the_job):
+   i = the_job["layer"]
+   if truncate_layer(the_job) == False:
+      return False
+   make_note("Appending " + str(len(the_job["shards"])) + " shards" + (" at the same time" if shard_parallel_appends == True else ", 1 after the other") + "...", True, True)
+   with measure_step(the_job, "append"):
+      success = run_shards(the_job, append_shard, lambda shard_job: shard_job["appended"], shard_parallel_appends)
+   if success == True:
+      add_metric(the_job, "append", "rows", int(the_job["source_count"]))
+   else:
+      make_note(str(len([shard_job for shard_job in the_job["shards"] if shard_job["appended"] == False])) + " of " + str(len(the_job["shards"])) + " shards couldn't be appended.", True, True)
+      return False
+   with measure_step(the_job, "post_count"):
+      loaded_count = str(ago_call(lambda gis: get_layer(gis, the_job.get("load_item_id", i[4])).query(return_count_only = True)))
+   if loaded_count != the_job["source_count"]:
+      make_note("ALERT - After appending all shards, record count of feature layer (" + loaded_count + ") doesn't match record count of EGDB source (" + the_job["source_count"] + "), so a shard may have been appended twice.", True, True)
+      return False
+   return True
+
+#THIS FUNCTION RETURNS THE NAME OF A FEATURE SERVICE (AS IT'S GIVEN IN THE DEFINITION OF A VIEW), FROM ITS URL
+#   (E.G., .../rest/services/<NAME>/FeatureServer).
+def get_service_name(service_url):
+   return service_url.split("/rest/services/")[1].split("/")[0]
+
+#THIS FUNCTION RETURNS THE DEFINITION OF THE LAYER (OR TABLE) OF A VIEW, AS ITS ADMIN ENDPOINT GIVES IT (W/ adminLayerInfo, WHICH
+#   SAYS WHICH FEATURE SERVICE IT'S A VIEW OF). IT'S ALWAYS READ FROM AGO (NOT KEPT; SEE get_layer_info), SO IT'S UP TO DATE.
+#   THE FIRST ARGUMENT IS THE CONNECTION TO AGO. THE SECOND ARGUMENT IS THE ITEM ID OF THE VIEW.
+def get_view_definition(gis, item_id):
+   the_url = get_layer_info(gis, item_id)["layer_url"].replace("/rest/services/", "/rest/admin/services/")
+   return gis._con.get(the_url, {"f": "json"})
+
+#THIS FUNCTION RETURNS THE PART OF A VIEW'S DEFINITION (SEE get_view_definition) THAT NAMES THE FEATURE SERVICE AND LAYER IT'S A
+#   VIEW OF (sourceServiceName, sourceLayerId). AGO GIVES THAT PART EITHER IN viewLayerDefinition ITSELF OR IN ITS "table".
+#   (CHANGING WHAT'S RETURNED CHANGES THE DEFINITION.) RETURNS AN EMPTY DICTIONARY IF IT'S NOT A VIEW'S DEFINITION.
+def get_view_table(the_definition):
+   view_definition = the_definition.get("adminLayerInfo", {}).get("viewLayerDefinition", {})
+   return view_definition.get("table", view_definition)
+
+#THIS FUNCTION RETURNS THE ITEM ID OF THE HIDDEN FEATURE SERVICE THAT A JOB IN "swap" MODE LOADS: THE 1 OF THE 2 IN THE
+#   "staging_items" OPTION OF layers THAT THE PUBLIC VIEW (ITEM ID IN layers) ISN'T A VIEW OF RIGHT NOW.
+#   THE FIRST ARGUMENT IS THE CONNECTION TO AGO. THE SECOND ARGUMENT IS THE JOB.
+#   RAISES AN EXCEPTION IF THE PUBLIC VIEW ISN'T A VIEW OF EITHER HIDDEN FEATURE SERVICE.
+def get_swap_target(gis, the_job):
+   i = the_job["layer"]
+   source_name = get_view_table(get_view_definition(gis, i[4])).get("sourceServiceName")
+   staging_names = [get_service_name(get_layer_info(gis, item_id)["service_url"]) for item_id in i[6]["staging_items"]]
+   if source_name not in staging_names:
+      raise Exception("Public view of feature-service " + i[3] + " is a view of " + str(source_name) + ", not of either feature service in its \"staging_items\" option.")
+   return i[6]["staging_items"][1 - staging_names.index(source_name)]
+
+#THIS FUNCTION REPOINTS THE PUBLIC VIEW OF A JOB IN "swap" MODE TO A GIVEN HIDDEN FEATURE SERVICE: TAKES THE VIEW'S LAYER OUT OF
+#   THE VIEW'S DEFINITION AND PUTS IT BACK (SAME ID, NAME, FIELDS, FILTERS, AND SO ON) AS A VIEW OF THE HIDDEN FEATURE SERVICE'S
+#   LAYER. THE VIEW'S ITEM ID AND URL DON'T CHANGE, AND THE VIEW IS W/OUT ITS LAYER ONLY BETWEEN THOSE 2 REQUESTS.
+#   IF AGO DOESN'T PUT THE VIEW'S LAYER BACK, IT'S PUT BACK AS IT WAS (A VIEW OF THE OTHER HIDDEN FEATURE SERVICE), AND AN
+#   EXCEPTION IS RAISED. IF PUTTING IT BACK AS IT WAS FAILS TOO, THE VIEW IS LEFT W/OUT ITS LAYER: AN ALERT NAMES BOTH HIDDEN
+#   FEATURE SERVICES (SO THE VIEW CAN BE FIXED MANUALLY), THE JOB'S view_broken IS SET TO True (SO IT'S NOT TRIED AGAIN), AND AN
+#   EXCEPTION IS RAISED. NOT SAFE TO REPEAT (SEE ago_call).
+#   THE FIRST ARGUMENT IS THE CONNECTION TO AGO. THE SECOND ARGUMENT IS THE JOB. THE THIRD ARGUMENT IS THE ITEM ID OF THE HIDDEN
+#   FEATURE SERVICE.
+def swap_view(gis, the_job, item_id):
+   i = the_job["layer"]
+   target_info = get_layer_info(gis, item_id)
+   old_definition = get_view_definition(gis, i[4])
+   #(OF adminLayerInfo, ONLY viewLayerDefinition IS GIVEN WHEN A VIEW'S LAYER IS ADDED)
+   old_definition["adminLayerInfo"] = {"viewLayerDefinition": old_definition["adminLayerInfo"]["viewLayerDefinition"]}
+   new_definition = json.loads(json.dumps(old_definition))
+   get_view_table(new_definition).update({"sourceServiceName": get_service_name(target_info["service_url"]), "sourceLayerId": target_info["properties"]["id"]})
+   admin_url = get_layer_info(gis, i[4])["service_url"].replace("/rest/services/", "/rest/admin/services/")
+   the_result = gis._con.post(admin_url + "/deleteFromDefinition", {"f": "json", "deleteFromDefinition": json.dumps({"layers": [{"id": old_definition["id"]}]})})
+   if the_result.get("success") != True:
+      raise Exception("AGO didn't take the layer out of the public view (" + str(the_result) + ").")
+   try:
+      the_result = gis._con.post(admin_url + "/addToDefinition", {"f": "json", "addToDefinition": json.dumps({"layers": [new_definition]})})
+   except Exception as e:
+      the_result = {"error": repr(e)}
+   if the_result.get("success") != True:
+      try:
+         restore_result = gis._con.post(admin_url + "/addToDefinition", {"f": "json", "addToDefinition": json.dumps({"layers": [old_definition]})})
+      except Exception as e:
+         restore_result = {"error": repr(e)}
+      if restore_result.get("success") != True:
+         the_job["view_broken"] = True
+         make_note("ALERT - AGO didn't repoint public view of feature-service " + i[3] + " (" + str(the_result) + "), and didn't put it back as it was (" + str(restore_result) + "), so the public view has no layer. Fix it manually: add its layer back as a view of feature service " + str(get_view_table(old_definition).get("sourceServiceName")) + " (as it was) or of " + get_service_name(target_info["service_url"]) + " (just loaded).", True, True)
+         raise Exception("AGO didn't repoint the public view (" + str(the_result) + ") or put it back as it was (" + str(restore_result) + ").")
+      raise Exception("AGO didn't repoint the public view (" + str(the_result) + "). It was put back as it was.")
+   #(THE VIEW'S DEFINITION CHANGED, SO DROP WHAT'S KEPT ABOUT IT)
+   forget_layer_info(i[4])
+
+#EXPORT STAGE: COPIES EGDB SOURCE INTO A TEMPORARY FILE GEODATABASE (OR WRITES ITS ROWS INTO A .csv OR .geojson; SEE staging_engine).
+def export_stage(the_job):
+   i = the_job["layer"]
+   temp_subfolder = the_job["temp_subfolder"]
+   gdb_name = the_job["gdb_name"]
+   make_note("Starting reload steps of feature service w/ title " + i[3] + " and ID " + i[4] + ".", True, True)
+   options = i[6]
+   #IN "delta" MODE, GET HASH OF EACH ROW OF EGDB SOURCE (FINGERPRINT IS MADE FROM THOSE HASHES)
+   if options.get("mode") == "delta":
+      make_note("Reading EGDB source to find rows added, changed, or deleted since last successful reload...", True)
+      with arcpy_lock:
+         row_hashes = get_row_hashes(i[len(i) - 1], options["id_field"])
+      if row_hashes == None:
+         make_note("ALERT - Field " + options["id_field"] + " of EGDB source " + get_name(i[2]) + " has null or repeated values, so rows can't be matched for a \"delta\" reload. Reloading by truncating+appending instead.", True, True)
+      else:
+         the_job["row_hashes"] = row_hashes
+         the_job["fingerprint"] = "delta:" + str(len(row_hashes)) + ":" + hashlib.sha256(json.dumps(row_hashes, sort_keys = True).encode("utf-8")).hexdigest()
+   #SKIP RELOAD IF EGDB SOURCE HASN'T CHANGED SINCE LAST SUCCESSFUL RELOAD
+   if skip_unchanged == True:
+      make_note("Getting fingerprint of EGDB source to see if it has changed since last successful reload...", True)
+      if "fingerprint" not in the_job:
+         with arcpy_lock:
+            the_job["fingerprint"] = get_fingerprint(i[len(i) - 1])
+      last_reload = reload_state.get(i[4], {})
+      if last_reload.get("source") == i[len(i) - 1] and last_reload.get("fingerprint") == the_job["fingerprint"]:
+         make_note("EGDB source " + get_name(i[2]) + " hasn't changed since feature layer was last reloaded (" + last_reload.get("reloaded", "") + "). Skipping reload.", True, True)
+         the_job["skipped"] = True
+         return True
+   #IN "delta" MODE, COMPARE ROWS OF EGDB SOURCE W/ SNAPSHOT FROM LAST SUCCESSFUL RELOAD
+   where_clause = ""
+   if "row_hashes" in the_job:
+      snapshot = load_snapshot(i[4])
+      if snapshot == None:
+         make_note("There's no snapshot of EGDB source from a previous \"delta\" reload. Reloading by truncating+appending this time.", True, True)
+      else:
+         row_hashes = the_job["row_hashes"]
+         upsert_ids = [a_key for a_key in row_hashes if snapshot.get(a_key) != row_hashes[a_key]]
+         delete_ids = [a_key for a_key in snapshot if a_key not in row_hashes]
+         make_note("Since last successful reload, " + str(len(upsert_ids)) + " rows of EGDB source were added or changed and " + str(len(delete_ids)) + " rows were deleted.", True, True)
+         if len(upsert_ids) + len(delete_ids) == 0:
+            make_note("No rows to send. Skipping reload.", True, True)
+            the_job["skipped"] = True
+            return True
+         if len(upsert_ids) + len(delete_ids) > delta_max_fraction * max(len(row_hashes), 1):
+            make_note("That's more than " + str(delta_max_fraction * 100) + "% of rows. Reloading by truncating+appending instead.", True, True)
          else:
-            pre_append_feature_layer_count = str(gis.content.get(i[4]).tables[0].query(return_count_only = True))
-         make_note("Before reloading, record count of feature layer in feature-service " + i[3] + " is " + pre_append_feature_layer_count + ".", True, True)
-         #TRUNCATE+APPEND FEATURE LAYER####################
-         success = False
-         counter = 0
-         while success == False and counter < max_tries:
-            try:
-               make_note("Making fresh connection to AGO...", True)
-               del gis
-               gis = GIS("https://www.arcgis.com",  username = u, password = p)
-               make_note("Try #" + str(counter + 1) + " -  Truncating+appending feature-layer of feature-service " + i[3] + " ...", True, True)
-               if is_spatial == True:
-                  f_layer = gis.content.get(i[4]).layers[0]
-               else:
-                  f_layer = gis.content.get(i[4]).tables[0]
-               #TRUNCATE
-               make_note("First, truncating...", True)
-               the_result = f_layer.manager.truncate()
-               if str(the_result) != "{'success': True}":
-                  make_note("Something went wrong with truncation.", True)
+            #(FIND OUT IF ID FIELD HOLDS TEXT, SO THAT VALUES IN WHERE-CLAUSES ARE QUOTED)
+            with arcpy_lock:
+               id_type = [a_field.type for a_field in arcpy.ListFields(i[len(i) - 1]) if a_field.name.upper() == options["id_field"].upper()][0]
+            is_text = id_type in ["String", "GUID", "GlobalID"]
+            #(DELETED ROWS ARE DELETED IN BATCHES, 1 WHERE-CLAUSE PER BATCH; ADDED AND CHANGED ROWS ARE PICKED W/ A CURSOR, W/OUT A
+            #   WHERE-CLAUSE; SEE copy_rows)
+            delete_clauses = make_where_clauses(options["id_field"], delete_ids, is_text)
+            if max([len(a_clause) for a_clause in delete_clauses] + [0]) > delta_where_max_chars:
+               make_note("IDs of deleted rows are too long to delete them in batches of 1000 (see delta_where_max_chars). Reloading by truncating+appending instead.", True, True)
+            else:
+               the_job["delta"] = {"upsert_ids": upsert_ids, "delete_ids": delete_ids, "delete_clauses": delete_clauses, "is_text": is_text}
+               if len(upsert_ids) == 0:
+                  #(NOTHING TO COPY OR UPLOAD; ONLY DELETES)
+                  the_job["upload_needed"] = False
+   #SPLIT A BIG EGDB SOURCE INTO SHARDS BY OBJECTID RANGE (SEE shard_rows)
+   if the_job.get("upload_needed") != False and "delta" not in the_job and shard_rows > 0 and int(get_count(i[len(i) - 1])) > shard_rows:
+      with arcpy_lock:
+         shard_ranges = get_shard_ranges(i[len(i) - 1])
+      make_note("EGDB source has more than " + str(shard_rows) + " rows. Splitting it into " + str(len(shard_ranges)) + " shards by OBJECTID range.", True, True)
+      the_job["shards"] = [make_shard_job(the_job, k + 1, len(shard_ranges), shard_ranges[k]) for k in range(len(shard_ranges))]
+   if the_job.get("upload_needed") != False:
+      #(FIND OUT HOW TO PREPARE THE COPY FOR THE FEATURE LAYER BEFORE WAITING FOR arcpy_lock, SO THAT ITS LOOKUPS IN AGO DON'T
+      #HOLD THE LOCK; SEE get_preparation)
+      preparation = get_preparation(the_job)
+      #(WAIT FOR ANY OTHER WORKER'S ARCPY GEOPROCESSING TO FINISH)
+      with arcpy_lock:
+         #STAGE A SMALL NON-SPATIAL TABLE OR POINT FEATURE CLASS AS A .csv OR .geojson, W/OUT A FILE GEODATABASE (SEE staging_engine)
+         the_job["staging"] = get_staging(the_job)
+         if the_job["staging"] != "fgdb":
+            the_job["rows_path"] = os.path.join(temp_subfolder, "DeleteMe_" + i[4] + "." + the_job["staging"])
+            make_note("Writing rows of EGDB source into " + os.path.basename(the_job["rows_path"]) + " ...", True)
+            start_time = time.time()
+            #(ONLY THE TRANSFORMATION APPLIES, SINCE A .csv HAS NO GEOMETRY AND A .geojson IS ALWAYS WGS 1984)
+            with arcpy.EnvManager(**get_preparation_settings({k: preparation[k] for k in preparation if k == "transformation"})):
+               if "delta" in the_job:
+                  row_count = write_rows(i[len(i) - 1], the_job["rows_path"], the_job["staging"], "", preparation.get("keep_fields"), [options["id_field"], set(the_job["delta"]["upsert_ids"])])
                else:
-                  #APPEND
-                  make_note("Appending...", True)
-                  the_result = f_layer.append(item_id = gdb_item_id, upload_format = "filegdb", source_table_name = get_name(i[2]), upsert=False)
-                  if the_result != True:
-                     make_note("Something went wrong with the append.", True)
+                  row_count = write_rows(i[len(i) - 1], the_job["rows_path"], the_job["staging"], where_clause, preparation.get("keep_fields"))
+            make_note("Wrote " + str(row_count) + " rows (" + str(round(os.path.getsize(the_job["rows_path"]) / 1048576, 1)) + " MB) in " + str(round(time.time() - start_time, 1)) + " seconds.", True)
+         #(A SHARDED EGDB SOURCE IS COPIED INTO 1 TEMPORARY FILE GEODATABASE PER SHARD)
+         else:
+            for copy_job in the_job.get("shards", [the_job]):
+               gdb_name = copy_job["gdb_name"]
+               where_clause = copy_job.get("where_clause", where_clause)
+               make_note("Making temporary geodatabase " + gdb_name + " ...", True)
+               arcpy.management.CreateFileGDB(temp_subfolder, gdb_name)
+               #COPY EGDB SOURCE (OR, IN "delta" MODE, ITS ADDED AND CHANGED ROWS; OR 1 SHARD OF IT) INTO TEMPORARY FILE GEODTABASE
+               #(IN "delta" MODE, PICK THE ROWS W/ A CURSOR; SEE copy_rows)
+               if "delta" in the_job:
+                  make_note("Copying " + str(len(the_job["delta"]["upsert_ids"])) + " added or changed rows of EGDB source into temporary file geodatabase " + gdb_name + " ...", True)
+                  copy_rows(i[len(i) - 1], os.path.join(temp_subfolder, gdb_name), get_name(i[2]), options["id_field"], set(the_job["delta"]["upsert_ids"]), preparation)
+               #(IF IT'S A FEATURE CLASS)
+               #(PROJECTED TO THE FEATURE LAYER'S SPATIAL REFERENCE AND W/ ONLY THE FEATURE LAYER'S FIELDS, IF ASKED; SEE get_preparation)
+               elif arcpy.Describe(i[len(i) - 1]).dataType == "FeatureClass":
+                  if "spatial_reference" in preparation:
+                     make_note("Copying EGDB source (a feature class) into temporary file geodatabase " + gdb_name + ", projected to feature layer's spatial reference " + json.dumps(preparation["spatial_reference"]) + (" and snapped to its XY resolution" if preparation["snap"] == True else "") + " ...", True)
                   else:
-                     success = True
-            except:
-               make_note("Something went wrong with truncating+appending.", True)
-            counter += 1
-         if success == False:
-            make_note("A problem occurred when truncating+appending feature-service " + i[3] + "--tried " + str(max_tries) + " times. Script terminated.", True, True)
-            sys.exit()
+                     make_note("Copying EGDB source (a feature class) into temporary file geodatabase " + gdb_name + " ...", True)
+                  with arcpy.EnvManager(**get_preparation_settings(preparation)):
+                     arcpy.conversion.FeatureClassToFeatureClass(i[len(i) - 1], os.path.join(temp_subfolder, gdb_name), get_name(i[2]), where_clause, get_field_mapping(i[len(i) - 1], preparation))
+               #(OTHERWISE, IT MUST BE A NON-SPATIAL TABLE)
+               else:
+                  make_note("Copying EGDB source (a non-spatial table) into temporary file geodatabase " + gdb_name + "...", True)
+                  arcpy.conversion.TableToTable(i[len(i) - 1], os.path.join(temp_subfolder, gdb_name), get_name(i[2]), where_clause, get_field_mapping(i[len(i) - 1], preparation))
+   #CAPTURE PRE-APPEND RECORD-COUNT OF EGDB SOURCE
+   the_job["source_count"] = get_count(i[len(i) - 1])
+   make_note("Record count of EGDB source " + get_name(i[2]) + " is " + the_job["source_count"] + ".", True, True)
+   add_metric(the_job, "export", "rows", int(the_job["source_count"]))
+   if the_job.get("staging", "fgdb") != "fgdb":
+      add_metric(the_job, "export", "bytes", os.path.getsize(the_job["rows_path"]))
+   elif the_job.get("upload_needed") != False:
+      for copy_job in the_job.get("shards", [the_job]):
+         add_metric(the_job, "export", "bytes", get_folder_bytes(os.path.join(temp_subfolder, copy_job["gdb_name"])))
+   return True
+
+#ZIP STAGE: ZIPS THE TEMPORARY FILE GEODATABASE INTO A .zip IN THE TEMPORARY SUBFOLDER.
+#   THE .zip IS MADE ONCE; IF THE UPLOAD HAS TO BE RE-TRIED, THE SAME .zip IS UPLOADED AGAIN.
+#   IF THE TEMPORARY FILE GEODATABASE IS BIGGER THAN stream_upload_threshold_mb, NO .zip IS MADE HERE;
+#   INSTEAD, THE UPLOAD STAGE ZIPS IT WHILE UPLOADING IT. A .csv OR .geojson ISN'T ZIPPED (AGO DOESN'T APPEND FROM A ZIPPED ONE).
+def zip_stage(the_job):
+   if the_job.get("upload_needed") == False:
+      return True
+   if the_job.get("staging", "fgdb") != "fgdb":
+      #(GIVING THE FILE A GUID-BASED NAME TO MAKE SURE NAME IS UNIQUE IN AGO; IT'S UPLOADED FROM WHERE IT WAS WRITTEN)
+      the_job["gdb_name_for_uploading"] = "DeleteMe_" + str(uuid.uuid4()) + "." + the_job["staging"]
+      the_job["zip_path"] = the_job["rows_path"]
+      return True
+   #(A SHARDED JOB ZIPS EACH SHARD; EACH .zip IS ALREADY MADE ON SEVERAL CPU CORES)
+   if "shards" in the_job:
+      return run_shards(the_job, zip_stage, lambda shard_job: "zip_path" in shard_job or shard_job.get("stream_upload") == True, False)
+   temp_subfolder = the_job["temp_subfolder"]
+   gdb_name = the_job["gdb_name"]
+   #(GIVING THE FILE GEODATABASE IN THE ZIP A DIFFERENT GUID-BASED NAME TO MAKE SURE NAME IS UNIQUE IN AGO)
+   gdb_name_for_uploading = "DeleteMe_" + str(uuid.uuid4()) + ".gdb"
+   the_job["gdb_name_for_uploading"] = gdb_name_for_uploading
+   #FIND OUT IF THE FILE GEODATABASE IS BIG ENOUGH TO BE ZIPPED WHILE UPLOADING
+   gdb_bytes = get_folder_bytes(os.path.join(temp_subfolder, gdb_name))
+   if stream_upload_threshold_mb > 0 and gdb_bytes > stream_upload_threshold_mb * 1048576:
+      make_note("Temporary file geodatabase is " + str(round(gdb_bytes / 1048576, 1)) + " MB. It will be zipped while it's uploaded (w/out making a .zip on disk).", True)
+      the_job["stream_upload"] = True
+      return True
+   #ZIP THE FILE GEODATABASE
+   make_note("Zipping temporary file geodatabase...", True)
+   zip_path = os.path.join(temp_subfolder, gdb_name_for_uploading + ".zip")
+   start_time = time.time()
+   raw_bytes, zipped_bytes = build_zip(os.path.join(temp_subfolder, gdb_name), zip_path, gdb_name_for_uploading)
+   make_note("Zipped " + str(round(raw_bytes / 1048576, 1)) + " MB into " + str(round(zipped_bytes / 1048576, 1)) + " MB (saved " + str(round((raw_bytes - zipped_bytes) / 1048576, 1)) + " MB) in " + str(round(time.time() - start_time, 1)) + " seconds.", True)
+   the_job["zip_path"] = zip_path
+   add_metric(the_job, "zip", "bytes", raw_bytes)
+   return True
+
+#UPLOAD STAGE: UPLOADS THE .zip (OR .csv/.geojson) TO AGO IN PARTS OF upload_part_size_mb (SEE upload_part), TRYING UNDER THE
+#   "upload" RETRY BUDGET. A TRY THAT FAILS PART-WAY IS RESUMED BY THE NEXT TRY FROM THE LAST PART THAT AGO ACCEPTED (THE .zip
+#   ISN'T MADE AGAIN, AND NO EXTRA ITEM IS ADDED TO AGO). IF THE .zip IS ZIPPED WHILE IT'S UPLOADED (SEE zip_stage), A FAILED TRY CAN'T BE
+#   RESUMED; ITS PARTLY-UPLOADED ITEM IS DELETED AND THE NEXT TRY STARTS OVER.
+def upload_stage(the_job):
+   if the_job.get("upload_needed") == False:
+      return True
+   #(A SHARDED JOB UPLOADS ITS SHARDS AT THE SAME TIME, UP TO shard_workers AT A TIME)
+   #(IF A SHARD COULDN'T BE UPLOADED, THE RELOAD IS GIVEN UP, SO THE SHARDS THAT WERE UPLOADED ARE DELETED FROM AGO)
+   if "shards" in the_job:
+      if run_shards(the_job, upload_stage, lambda shard_job: shard_job.get("uploaded") == True) == True:
+         return True
+      for shard_job in the_job["shards"]:
+         delete_upload(shard_job)
+      return False
+   i = the_job["layer"]
+   gdb_name = the_job["gdb_name"]
+   gdb_name_for_uploading = the_job["gdb_name_for_uploading"]
+   the_staging = the_job.get("staging", "fgdb")
+   if the_staging == "fgdb":
+      file_name = gdb_name_for_uploading + ".zip"
+      what = "zipped temporary geodatabase"
+   else:
+      #(A .csv OR .geojson IS UPLOADED AS IT IS)
+      file_name = gdb_name_for_uploading
+      what = "staged rows"
+   success = False
+   the_retry = RetryPolicy("upload")
+   #(THE PARTS' TRIES DON'T GO PAST THE END OF THE UPLOAD'S RETRY BUDGET; SEE upload_part)
+   the_job["upload_deadline"] = the_retry.deadline
+   gdb_properties={'title':gdb_name if the_staging == "fgdb" else file_name, 'type':{"fgdb": "File Geodatabase", "csv": "CSV", "geojson": "GeoJson"}[the_staging], 'description':'A temporary file for reloading data of feature service ' + i[3] + ', which has Item-ID ' + i[4] + '. This file can be deleted after reload.'}
+   while success == False and the_retry.next_try() == True:
+      counter = the_retry.tries
+      try:
+         #ADD THE ITEM (IF NOT ADDED BY AN EARLIER TRY), THEN UPLOAD THE PARTS THAT AGO DOESN'T HAVE YET
+         if the_job.get("gdb_item_id") == None:
+            make_note("Try #" + str(counter) + " - Uploading " + what + " " + file_name + " to AGO (in parts of " + str(upload_part_size_mb) + " MB)...", True)
+            the_job["gdb_item_id"] = ago_call(lambda gis: start_upload(gis, file_name, gdb_properties), False)
+            the_job["parts_done"] = 0
+            #(KEEP THE NEW ITEM'S ID IN THE JOURNAL, SO THAT IT'S CLEANED UP IF THE RUN DIES BEFORE THE UPLOAD IS DONE)
+            save_checkpoint(the_job.get("parent", the_job))
          else:
-            make_note("Successful truncate+append.", True, True)
-         #IF IT'S A FEATURE LAYER (SPATIAL), REBUILD SPATIAL INDEX
-         if is_spatial == True:
-            make_note("Feature layer is spatial. Need to rebuild its spatial index.", True)
-            try:
-               make_note("Making fresh connection to AGO...", True)
-               del gis
-               gis = GIS("https://www.arcgis.com",  username = u, password = p)
-               f_layer = gis.content.get(i[4]).layers[0]
-               make_note("Sending request to ArcGIS Online for rebuilding spatial index...", True, True)
-               #GET INDEXES, FIND Spatial INDEX, REBUILD VIA update_definition()
-               the_list = f_layer.properties.get("indexes")
-               found_it = False
-               inner_counter = 0
-               while inner_counter < len(the_list) and found_it == False:
-                  if the_list[inner_counter].get("indexType") == "Spatial":
-                     found_it = True
-                     #NOTE: SOMETIMES THE RESPONSE FROM update_definition() TIMES OUT, BUT THE INDEX REBUILD COMPLETES.
-                     #      A TIMEOUT SCENARIO CAUSES A BAILOUT FROM THE try TO THE except.
-                     f_layer.manager.update_definition({"indexes":[the_list[inner_counter]]})
-                  inner_counter += 1
-            except:
-               pass
-            #TRY TO READ THE SUBLAYER'S Extent PROPERTY. AN Extent THAT'S NOT NULL IS A SIGN THAT THE SPATIAL INDEX IS REBUILT.
-            try:
-               make_note("Sublayer's Extent property after sending spatial-index rebuild request:  " + str(f_layer.query(return_extent_only = True)), True, True)
-            except:
-               make_note("After sending request for spatial-index rebuild, tried to read the Extent property of the sublayer, but that read failed. ...", True, True)
-               make_note("...That can happen if:", True, True)
-               make_note("......the spatial-index rebuild is still running,", True, True)
-               make_note("......the feature layer's supportsReturningQueryExtent property is false,", True, True)
-               make_note("......or something else went wrong.", True, True)
-               make_note("...Check the sublayer's Extent property in REST. If it's not null, the spatial-index rebuild has likely completed.", True, True)
-         ####################
-         #CAPTURE POST-APPEND RECORD-COUNT OF FEATURE LAYER
-         make_note("Making fresh connection to AGO...", True)
-         del gis
-         gis = GIS("https://www.arcgis.com",  username = u, password = p)
-         if is_spatial == True:
-            post_append_feature_layer_count = str(gis.content.get(i[4]).layers[0].query(return_count_only = True))
+            make_note("Try #" + str(counter) + " - Resuming upload of " + what + " " + file_name + " to AGO after part #" + str(the_job["parts_done"]) + "...", True)
+         if the_job.get("stream_upload") == True:
+            start_time = time.time()
+            the_stream = PartUploadStream(the_job, file_name)
+            raw_bytes, zipped_bytes = build_zip(os.path.join(the_job["temp_subfolder"], gdb_name), the_stream, gdb_name_for_uploading)
+            the_stream.close()
+            make_note("Zipped+uploaded " + str(round(raw_bytes / 1048576, 1)) + " MB as " + str(round(zipped_bytes / 1048576, 1)) + " MB in " + str(round(time.time() - start_time, 1)) + " seconds.", True)
          else:
-            post_append_feature_layer_count = str(gis.content.get(i[4]).tables[0].query(return_count_only = True))
-         make_note("After reloading, record count of feature layer in feature-service " + i[3] + " is " + post_append_feature_layer_count + ".", True, True)
-         #DELETE TEMPORARY FILE GEODATABASE FROM AGO
+            with open(the_job["zip_path"], "rb") as zip_file:
+               zip_file.seek(the_job["parts_done"] * int(upload_part_size_mb * 1048576))
+               the_bytes = zip_file.read(int(upload_part_size_mb * 1048576))
+               while len(the_bytes) > 0:
+                  upload_part(the_job, file_name, the_bytes)
+                  the_bytes = zip_file.read(int(upload_part_size_mb * 1048576))
+         #(COMMIT THE PARTS INTO 1 FILE AND WAIT FOR AGO TO FINISH)
+         ago_call(lambda gis: finish_upload(gis, the_job["gdb_item_id"], gdb_properties, the_retry.deadline), False)
+         success = True
+      except Exception as e:
+         make_note("Something went wrong w/ uploading (" + repr(e) + ").", True)
+         the_retry.failed(e)
+         if the_job.get("stream_upload") == True:
+            delete_upload(the_job)
+   add_metric(the_job, "upload", "retries", counter - 1)
+   if success == False:
+      make_note("A problem occurred when uploading zipped EGDB-source data to AGO for feature-service " + i[3] + "--tried " + str(counter) + " times. Reload given up.", True, True)
+      delete_upload(the_job)
+      return False
+   if counter > 1:
+      make_note("ALERT - It took " + str(counter) + " tries to successfully upload " + what + " to AGO for feature-service " + i[3] + ".", True, True)
+   the_job["uploaded"] = True
+   return True
+
+#LOAD STAGE: TRUNCATES+APPENDS THE FEATURE LAYER FROM THE UPLOADED .zip, REBUILDS ITS SPATIAL INDEX,
+#   AND DELETES THE UPLOADED .zip FROM AGO. W/ async_jobs, THE APPEND AND REBUILD ARE BACKGROUND JOBS IN AGO.
+def load_stage(the_job):
+   i = the_job["layer"]
+   gdb_name = the_job["gdb_name"]
+   gdb_name_for_uploading = ", ".join([copy_job.get("gdb_name_for_uploading", "") for copy_job in the_job.get("shards", [the_job])])
+   gdb_item_id = the_job.get("gdb_item_id")
+   #IN "swap" MODE, LOAD THE HIDDEN FEATURE SERVICE THAT THE PUBLIC VIEW ISN'T A VIEW OF (SEE get_swap_target), WHILE THE PUBLIC
+   #   VIEW KEEPS SHOWING THE OTHER 1; OTHERWISE, LOAD THE FEATURE SERVICE ITSELF
+   if i[6].get("mode") == "swap":
+      the_job["load_item_id"] = ago_call(lambda gis: get_swap_target(gis, the_job))
+      for shard_job in the_job.get("shards", []):
+         shard_job["load_item_id"] = the_job["load_item_id"]
+      make_note("Public view stays as it is while hidden feature service w/ ID " + the_job["load_item_id"] + " is loaded.", True, True)
+   load_item_id = the_job.get("load_item_id", i[4])
+   #DETERMINE IF FEATURE SERVICE HAS A SPATIAL LAYER OR A NON-SPATIAL LAYER (NON-SPATIAL TABLE)
+   is_spatial = ago_call(lambda gis: get_layer_info(gis, load_item_id))["is_spatial"]
+   #CAPTURE PRE-APPEND RECORD-COUNT OF FEATURE LAYER
+   with measure_step(the_job, "pre_count"):
+      pre_append_feature_layer_count = str(ago_call(lambda gis: get_layer(gis, i[4]).query(return_count_only = True)))
+   make_note("Before reloading, record count of feature layer in feature-service " + i[3] + " is " + pre_append_feature_layer_count + ".", True, True)
+   #TRUNCATE+APPEND FEATURE LAYER####################
+   #(A SHARDED JOB IS TRUNCATED ONCE, THEN ITS SHARDS ARE APPENDED, EACH W/ ITS OWN TRIES; SEE load_shards)
+   #(OTHERWISE, EACH CALL TO AGO IS TRIED UNDER ITS OWN RETRY BUDGET: "truncate", "append", "delete_rows"; SEE RetryPolicy)
+   if "shards" in the_job:
+      success = load_shards(the_job)
+   elif "delta" in the_job:
+      #IN "delta" MODE, APPEND ADDED AND CHANGED ROWS W/ UPSERT, THEN DELETE DELETED ROWS
+      #(BOTH ARE SAFE TO RE-TRY: UPSERTING A ROW AGAIN OR DELETING AN ALREADY-DELETED ROW CHANGES NOTHING)
+      the_delta = the_job["delta"]
+      make_note("Upserting+deleting changed rows of feature-layer of feature-service " + i[3] + " ...", True, True)
+      success = True
+      if len(the_delta["upsert_ids"]) > 0:
+         with measure_step(the_job, "append"):
+            success = append_upload(the_job, str(len(the_delta["upsert_ids"])) + " added or changed rows w/ upsert", i[6]["id_field"])
+         if success == True:
+            add_metric(the_job, "append", "rows", len(the_delta["upsert_ids"]))
+      if success == True and len(the_delta["delete_ids"]) > 0:
+         make_note("Deleting " + str(len(the_delta["delete_ids"])) + " deleted rows in " + str(len(the_delta["delete_clauses"])) + " batch(es)...", True)
+         #(EACH BATCH IS 1 REQUEST, TRIED AGAIN BY ITSELF UNDER THE "delete_rows" RETRY BUDGET; SEE ago_call)
+         try:
+            with measure_step(the_job, "delete_rows"):
+               for a_clause in the_delta["delete_clauses"]:
+                  the_result = ago_call(lambda gis: get_layer(gis, load_item_id).delete_features(where = a_clause))
+                  if False in [a_result.get("success") for a_result in the_result.get("deleteResults", [])]:
+                     make_note("Something went wrong with deleting rows.", True)
+                     success = False
+                     break
+         except Exception as e:
+            make_note("Something went wrong with deleting rows (" + repr(e) + ").", True)
+            success = False
+         if success == True:
+            add_metric(the_job, "delete_rows", "rows", len(the_delta["delete_ids"]))
+   else:
+      make_note("Truncating+appending feature-layer of feature-service " + i[3] + " ...", True, True)
+      success = truncate_layer(the_job)
+      if success == True:
+         with measure_step(the_job, "append"):
+            success = append_upload(the_job, "feature-layer of feature-service " + i[3])
+         if success == True:
+            add_metric(the_job, "append", "rows", int(the_job["source_count"]))
+   if success == False:
+      make_note("A problem occurred when truncating+appending (or upserting+deleting) feature-service " + i[3] + " (see tries above). Reload given up. Clean up temporary .gdb " + gdb_name_for_uploading + " from folder " + content_folder + " in AGO.", True, True)
+      return False
+   elif "delta" in the_job:
+      make_note("Successful upsert+delete.", True, True)
+   else:
+      make_note("Successful truncate+append.", True, True)
+   #IF IT'S A FEATURE LAYER (SPATIAL), REBUILD SPATIAL INDEX
+   #(W/ async_jobs, THE REBUILD IS A BACKGROUND JOB THAT'S WAITED FOR, SO ITS REAL FINAL STATUS IS KNOWN)
+   if is_spatial == True and async_jobs == True:
+      make_note("Feature layer is spatial. Need to rebuild its spatial index.", True)
+      try:
+         the_info = ago_call(lambda gis: get_layer_info(gis, load_item_id))
+         the_list = [an_index for an_index in the_info["properties"].get("indexes", []) if an_index.get("indexType") == "Spatial"]
+         if len(the_list) == 0:
+            make_note("ALERT - Couldn't find the spatial index of feature-service " + i[3] + ". Spatial index not rebuilt.", True, True)
+         else:
+            make_note("Submitting spatial-index rebuild to ArcGIS Online as a background job...", True, True)
+            the_url = the_info["layer_url"].replace("/rest/services/", "/rest/admin/services/") + "/updateDefinition"
+            #(THE DEFINITION IS ABOUT TO CHANGE, SO DROP WHAT'S KEPT ABOUT THE FEATURE LAYER)
+            forget_layer_info(load_item_id)
+            with measure_step(the_job, "index_rebuild"):
+               status_url = ago_call(lambda gis: submit_ago_job(gis, the_url, {"updateDefinition": json.dumps({"indexes": the_list[:1]})}), False)
+               rebuild_completed = wait_for_ago_job(the_job, "spatial-index rebuild", status_url)
+            if rebuild_completed == False:
+               make_note("ALERT - Spatial-index rebuild of feature-service " + i[3] + " didn't complete. Rebuild it manually.", True, True)
+      except Exception as e:
+         make_note("ALERT - A problem occurred w/ submitting spatial-index rebuild of feature-service " + i[3] + " (" + repr(e) + "). Rebuild it manually.", True, True)
+   elif is_spatial == True:
+      make_note("Feature layer is spatial. Need to rebuild its spatial index.", True)
+      try:
+         f_layer = ago_call(lambda gis: get_layer(gis, load_item_id))
+         make_note("Sending request to ArcGIS Online for rebuilding spatial index...", True, True)
+         #GET INDEXES (KEPT BY get_layer_info), FIND Spatial INDEX, REBUILD VIA update_definition()
+         the_list = ago_call(lambda gis: get_layer_info(gis, load_item_id))["properties"].get("indexes")
+         found_it = False
+         inner_counter = 0
+         while inner_counter < len(the_list) and found_it == False:
+            if the_list[inner_counter].get("indexType") == "Spatial":
+               found_it = True
+               #NOTE: SOMETIMES THE RESPONSE FROM update_definition() TIMES OUT, BUT THE INDEX REBUILD COMPLETES.
+               #      A TIMEOUT SCENARIO CAUSES A BAILOUT FROM THE try TO THE except.
+               #(THE DEFINITION IS ABOUT TO CHANGE, SO DROP WHAT'S KEPT ABOUT THE FEATURE LAYER)
+               forget_layer_info(load_item_id)
+               with measure_step(the_job, "index_rebuild"):
+                  f_layer.manager.update_definition({"indexes":[the_list[inner_counter]]})
+            inner_counter += 1
+      except:
+         #(A TIMED-OUT REQUEST CAN LEAVE THE CONNECTION TO AGO IN A BAD STATE; SEE HISTORY, 2025-12-22. SO, USE A FRESH ONE.)
+         reset_gis()
+      #TRY TO READ THE SUBLAYER'S Extent PROPERTY. AN Extent THAT'S NOT NULL IS A SIGN THAT THE SPATIAL INDEX IS REBUILT.
+      try:
+         make_note("Sublayer's Extent property after sending spatial-index rebuild request:  " + str(ago_call(lambda gis: get_layer(gis, load_item_id).query(return_extent_only = True))), True, True)
+      except:
+         make_note("After sending request for spatial-index rebuild, tried to read the Extent property of the sublayer, but that read failed. ...", True, True)
+         make_note("...That can happen if:", True, True)
+         make_note("......the spatial-index rebuild is still running,", True, True)
+         make_note("......the feature layer's supportsReturningQueryExtent property is false,", True, True)
+         make_note("......or something else went wrong.", True, True)
+         make_note("...Check the sublayer's Extent property in REST. If it's not null, the spatial-index rebuild has likely completed.", True, True)
+   ####################
+   #IN "swap" MODE, CHECK RECORD COUNT OF HIDDEN FEATURE SERVICE, THEN REPOINT THE PUBLIC VIEW TO IT (SEE swap_view)
+   #(THE FEATURE SERVICE THAT THE PUBLIC VIEW WAS A VIEW OF IS THE 1 LOADED NEXT TIME)
+   if load_item_id != i[4]:
+      with measure_step(the_job, "post_count"):
+         loaded_count = str(ago_call(lambda gis: get_layer(gis, load_item_id).query(return_count_only = True)))
+      if loaded_count != the_job["source_count"]:
+         make_note("ALERT - Record count of hidden feature service w/ ID " + load_item_id + " (" + loaded_count + ") doesn't match record count of EGDB source (" + the_job["source_count"] + "). Public view of feature-service " + i[3] + " left as it was. Reload given up. Clean up temporary .gdb " + gdb_name_for_uploading + " from folder " + content_folder + " in AGO.", True, True)
+         return False
+      #(EACH TRY READS THE VIEW'S DEFINITION AGAIN, SO A TRY AFTER A FAILED 1 REPOINTS THE VIEW FROM WHEREVER IT WAS LEFT)
+      swapped = False
+      the_retry = RetryPolicy("swap")
+      while swapped == False and the_retry.next_try() == True:
+         make_note("Try #" + str(the_retry.tries) + " - Repointing public view of feature-service " + i[3] + " to hidden feature service w/ ID " + load_item_id + "...", True, True)
+         try:
+            with measure_step(the_job, "swap"):
+               ago_call(lambda gis: swap_view(gis, the_job, load_item_id), False)
+            swapped = True
+         except Exception as e:
+            make_note("Something went wrong with repointing the public view (" + repr(e) + ").", True)
+            the_retry.failed(e)
+            #(A VIEW LEFT W/OUT ITS LAYER IS FIXED MANUALLY; SEE swap_view)
+            if the_job.get("view_broken") == True:
+               break
+      add_metric(the_job, "swap", "retries", the_retry.tries - 1)
+      if swapped == False:
+         make_note("ALERT - A problem occurred w/ repointing public view of feature-service " + i[3] + " (see tries above). Check which feature service it's a view of in AGO. Reload given up. Clean up temporary .gdb " + gdb_name_for_uploading + " from folder " + content_folder + " in AGO.", True, True)
+         return False
+      make_note("Successful swap.", True, True)
+   #CAPTURE POST-APPEND RECORD-COUNT OF FEATURE LAYER
+   #(IF THE CONNECTION TO AGO FAILS HERE, ago_call MAKES A FRESH ONE AND TRIES AGAIN)
+   with measure_step(the_job, "post_count"):
+      post_append_feature_layer_count = str(ago_call(lambda gis: get_layer(gis, i[4]).query(return_count_only = True)))
+   make_note("After reloading, record count of feature layer in feature-service " + i[3] + " is " + post_append_feature_layer_count + ".", True, True)
+   #DELETE TEMPORARY FILE GEODATABASE (OR, IF SHARDED, EACH SHARD'S TEMPORARY FILE GEODATABASE) FROM AGO
+   for copy_job in the_job.get("shards", [the_job]):
+      gdb_name = copy_job["gdb_name"]
+      gdb_item_id = copy_job.get("gdb_item_id")
+      if gdb_item_id != None:
          make_note("Deleting temporary file geodatabase " + gdb_name + " from AGO...", True)
-         gdb_item = gis.content.get(gdb_item_id)
-         the_result = gdb_item.delete()
+         try:
+            with measure_step(the_job, "delete"):
+               the_result = ago_call(lambda gis: gis._con.post(get_user_content_url() + "/items/" + gdb_item_id + "/delete", {"f": "json"}).get("success"))
+         except Exception as e:
+            the_result = repr(e)
          if the_result != True:
             make_note("ALERT - A problem occurred w/ deleting temporary file geodatabase " + gdb_name + " from AGO. This isn't a show stopper; however, it should be cleaned up.", True, True)
+   #KEEP FINGERPRINT (AND, IN "delta" MODE, SNAPSHOT) OF EGDB SOURCE
+   #(ONLY IF RECORD COUNTS MATCH, SO THAT A SHORT LOAD GETS A FULL RELOAD NEXT RUN)
+   if post_append_feature_layer_count == the_job["source_count"]:
+      if "row_hashes" in the_job:
+         save_snapshot(i[4], the_job["row_hashes"])
+      if "fingerprint" in the_job:
+         save_state(i[4], {"source": i[len(i) - 1], "fingerprint": the_job["fingerprint"], "reloaded": tell_the_time()})
+   else:
+      make_note("ALERT - Record count of feature layer doesn't match record count of EGDB source. The feature layer will be fully reloaded next time, even if its EGDB source doesn't change.", True, True)
+      if "row_hashes" in the_job:
+         save_snapshot(i[4], None)
+   return True
+
+#THE STAGES OF RELOADING 1 FEATURE LAYER, IN ORDER (NAME OF STAGE, FUNCTION OF STAGE).
+reload_stages = [("export", export_stage), ("zip", zip_stage), ("upload", upload_stage), ("load", load_stage)]
+
+#THIS FUNCTION RUNS 1 STAGE OF A JOB. WHILE THE STAGE RUNS, THE NOTES THAT ARE EMAILED GO
+#   INTO THE JOB'S OWN SECTION OF THE EMAIL REPORT. A STAGE THAT WAS FINISHED BY AN INTERRUPTED RUN (SEE restore_checkpoint)
+#   ISN'T RUN AGAIN. AFTER THE STAGE, THE JOB'S PROGRESS IS KEPT IN THE JOURNAL FILE (SEE save_checkpoint).
+#   THE STAGE IS MEASURED (SEE measure_step), AND PROFILED IF IT'S THE FEATURE LAYER CHOSEN W/ profile_item_id. (cProfile ONLY
+#   PROFILES THE WORKER THAT RUNS THE STAGE, SO WORK DONE IN OTHER WORKERS--THE STAGE'S SHARDS IN shard_pool, AND FILES
+#   COMPRESSED BY build_zip--ISN'T IN THE PROFILE; IT SHOWS UP AS TIME SPENT WAITING FOR THEM.)
+#   THE FIRST ARGUMENT IS THE JOB. THE SECOND ARGUMENT IS THE NAME OF THE STAGE. THE THIRD ARGUMENT IS THE FUNCTION OF THE STAGE.
+#   RETURNS True IF THE STAGE SUCCEEDED. RETURNS False (AND MARKS THE JOB AS FAILED) IF IT FAILED.
+def run_stage(the_job, the_stage_name, the_stage_function):
+   i = the_job["layer"]
+   if the_stage_name in the_job["stages_done"]:
+      return True
+   layer_context.prefix = "[" + i[3] + "] "
+   layer_context.report = the_job["report"]
+   #(PROFILE THE STAGE IF IT'S THE FEATURE LAYER CHOSEN W/ profile_item_id)
+   the_profile = None
+   if profile_item_id != "" and i[4] == profile_item_id:
+      the_profile = cProfile.Profile()
+      the_job.setdefault("profiles", []).append(the_profile)
+   try:
+      with measure_step(the_job, the_stage_name):
+         if the_profile != None:
+            the_profile.enable()
+         try:
+            success = the_stage_function(the_job)
+         finally:
+            if the_profile != None:
+               the_profile.disable()
+   except Exception as e:
+      make_note("Something unexpected went wrong while reloading feature service " + i[3] + " (" + repr(e) + "). Reload given up.", True, True)
+      success = False
+   layer_context.prefix = ""
+   layer_context.report = None
+   if success == False:
+      the_job["success"] = False
+   else:
+      the_job["stages_done"].append(the_stage_name)
+   try:
+      save_checkpoint(the_job)
+   except Exception as e:
+      make_note("ALERT - A problem occurred w/ writing the journal file (" + repr(e) + "). This isn't a show stopper, but this run can't be resumed from here.", True, True)
+   return success
+
+#THIS FUNCTION RUNS ALL STAGES OF A JOB, 1 AFTER THE OTHER. IT'S RUN BY EACH WORKER OF THE POOL
+#   OF max_workers WORKERS WHEN pipeline IS False.
+def run_job(the_job):
+   for stage_name, stage_function in reload_stages:
+      if run_stage(the_job, stage_name, stage_function) == False:
+         return
+      #(A SKIPPED JOB NEEDS NO MORE STAGES)
+      if the_job.get("skipped") == True:
+         break
+   the_job["success"] = True
+
+#THIS FUNCTION RUNS THE GIVEN JOBS THROUGH A PIPELINE OF STAGES (USED WHEN pipeline IS True).
+#   EACH STAGE HAS ITS OWN WORKERS (SEE pipeline_workers) AND ITS OWN QUEUE OF JOBS WAITING FOR IT.
+#   WHEN A WORKER FINISHES A STAGE OF A JOB, IT PUTS THE JOB IN THE NEXT STAGE'S QUEUE. SO, FOR
+#   EXAMPLE, EXPORTING LAYER N+1 HAPPENS WHILE LAYER N IS UPLOADED AND LAYER N-1 IS APPENDED.
+#   EACH QUEUE HOLDS UP TO pipeline_queue_size JOBS; A WORKER WAITS WHEN THE NEXT QUEUE IS FULL, SO
+#   THAT A FAST STAGE DOESN'T PILE UP STAGED DATA IN FRONT OF A SLOW STAGE.
+def run_pipeline(jobs):
+   the_queues = [queue.Queue(maxsize = pipeline_queue_size) for a_stage in reload_stages]
+   #THIS INNER FUNCTION IS RUN BY EACH WORKER OF STAGE k. A None IN THE QUEUE TELLS THE WORKER TO STOP.
+   def stage_worker(k):
+      stage_name, stage_function = reload_stages[k]
+      while True:
+         the_job = the_queues[k].get()
+         if the_job == None:
+            break
+         if run_stage(the_job, stage_name, stage_function) == True:
+            #(A SKIPPED JOB NEEDS NO MORE STAGES)
+            if the_job.get("skipped") == True:
+               the_job["success"] = True
+            elif k + 1 < len(reload_stages):
+               the_queues[k + 1].put(the_job)
+            else:
+               the_job["success"] = True
+   #START EACH STAGE'S WORKERS
+   the_workers = []
+   k = 0
+   while k < len(reload_stages):
+      stage_threads = []
+      for j in range(pipeline_workers.get(reload_stages[k][0], 1)):
+         a_thread = threading.Thread(target = stage_worker, args = (k,), daemon = True)
+         a_thread.start()
+         stage_threads.append(a_thread)
+      the_workers.append(stage_threads)
+      k += 1
+   #FEED THE JOBS TO THE FIRST STAGE
+   for the_job in jobs:
+      the_queues[0].put(the_job)
+   #WHEN ALL WORKERS OF A STAGE HAVE STOPPED, TELL THE WORKERS OF THE NEXT STAGE TO STOP
+   k = 0
+   while k < len(reload_stages):
+      for a_thread in the_workers[k]:
+         the_queues[k].put(None)
+      for a_thread in the_workers[k]:
+         a_thread.join()
+      k += 1
+
+#THIS FUNCTION ADDS EACH OF THE GIVEN (FINISHED) JOBS' SECTION TO THE EMAIL REPORT (IN THE ORDER OF THE JOBS), AND WRITES
+#   THE JOBS' METRICS (AND PROFILE) INTO THE SCRIPT'S FOLDER.
+#   THE FIRST ARGUMENT IS THE LIST OF JOBS. THE SECOND ARGUMENT IS WHEN THE JOBS WERE STARTED (time.time()).
+#   RETURNS A LIST OF THE TITLES OF THE FEATURE SERVICES THAT FAILED TO RELOAD.
+def report_jobs(jobs, run_start):
+   global email_content
+   failed_layers = []
+   for the_job in jobs:
+      email_content += "".join(the_job["report"])
+      if the_job["success"] != True:
+         failed_layers.append(the_job["layer"][3])
+   skipped_count = len([the_job for the_job in jobs if the_job.get("skipped") == True])
+   #WRITE METRICS (AND PROFILE) INTO THE SCRIPT'S FOLDER
+   try:
+      write_metrics(jobs, run_start)
+      write_profile(jobs)
+   except Exception as e:
+      make_note("ALERT - A problem occurred w/ writing metrics of this run (" + repr(e) + "). This isn't a show stopper.", True, True)
+   if skipped_count > 0:
+      make_note(str(skipped_count) + " of " + str(len(jobs)) + " feature services were skipped because their EGDB sources haven't changed.", True, True)
+   return failed_layers
+
+#THIS FUNCTION RETURNS THE VALUES (A SET OF INTEGERS) THAT 1 PART OF A CRON EXPRESSION MATCHES (E.G., "*/15" OF THE MINUTE
+#   PART MATCHES 0, 15, 30, AND 45). THE FIRST ARGUMENT IS THE PART. THE SECOND AND THIRD ARGUMENTS ARE THE LOWEST AND HIGHEST
+#   VALUES OF THE PART. RAISES AN EXCEPTION IF THE PART ISN'T VALID.
+def parse_cron_part(the_part, lowest, highest):
+   the_values = set()
+   for a_piece in the_part.split(","):
+      the_step = 1
+      if "/" in a_piece:
+         a_piece, the_step = a_piece.split("/", 1)
+         the_step = int(the_step)
+      if a_piece == "*":
+         first, last = lowest, highest
+      elif "-" in a_piece:
+         first, last = [int(a_value) for a_value in a_piece.split("-", 1)]
+      elif "/" in the_part:
+         #(E.G., "5/15" MEANS EVERY 15, STARTING AT 5)
+         first, last = int(a_piece), highest
       else:
-         pass
+         first = last = int(a_piece)
+      if first < lowest or last > highest or first > last or the_step < 1:
+         raise Exception("\"" + the_part + "\" isn't in range " + str(lowest) + "-" + str(highest) + ".")
+      the_values.update(range(first, last + 1, the_step))
+   return the_values
+
+#THIS FUNCTION RETURNS THE SCHEDULE OF A FEATURE LAYER WHEN THIS SCRIPT RUNS AS A SERVICE: ITS "schedule" OPTION (A CRON
+#   EXPRESSION), OR, IF IT HAS NONE, ITS DAYS OF WEEK (ITEM 5) AT daemon_default_time. THE SCHEDULE IS A DICTIONARY OF THE SETS
+#   OF MINUTES, HOURS, DAYS OF MONTH, MONTHS, AND DAYS OF WEEK (0 IS SUNDAY) THAT IT MATCHES (SEE is_scheduled).
+#   TAKES THE LAYER'S LIST FROM layers. RAISES AN EXCEPTION IF THE SCHEDULE ISN'T VALID.
+def get_schedule(i):
+   the_expression = i[6].get("schedule")
+   if the_expression == None:
+      day_numbers = {"U": "0", "M": "1", "T": "2", "W": "3", "R": "4", "F": "5", "S": "6"}
+      the_hour, the_minute = daemon_default_time.split(":")
+      the_days = [day_numbers[a_day.upper().strip()] for a_day in i[5].split(",") if a_day.upper().strip() in day_numbers]
+      if len(the_days) == 0:
+         #(NO VALID DAYS OF WEEK: NEVER RELOADED, LIKE IN A RUN W/OUT --daemon)
+         return {"expression": "never", "minutes": set(), "hours": set(), "days": set(), "months": set(), "weekdays": set(), "either_day": False}
+      the_expression = str(int(the_minute)) + " " + str(int(the_hour)) + " * * " + ",".join(the_days)
+   the_parts = the_expression.split()
+   if len(the_parts) != 5:
+      raise Exception("\"" + the_expression + "\" doesn't have 5 parts.")
+   the_schedule = {"expression": the_expression, "minutes": parse_cron_part(the_parts[0], 0, 59), "hours": parse_cron_part(the_parts[1], 0, 23),
+                   "days": parse_cron_part(the_parts[2], 1, 31), "months": parse_cron_part(the_parts[3], 1, 12),
+                   "weekdays": set(a_day % 7 for a_day in parse_cron_part(the_parts[4], 0, 7))}
+   #(LIKE cron, WHEN BOTH DAY OF MONTH AND DAY OF WEEK ARE GIVEN, A DAY THAT MATCHES EITHER 1 IS SCHEDULED)
+   the_schedule["either_day"] = the_parts[2] != "*" and the_parts[4] != "*"
+   return the_schedule
+
+#THIS FUNCTION RETURNS True IF A SCHEDULE (SEE get_schedule) SAYS TO RELOAD AT A GIVEN MINUTE.
+#   THE FIRST ARGUMENT IS THE SCHEDULE. THE SECOND ARGUMENT IS THE MINUTE (A time.struct_time).
+def is_scheduled(the_schedule, the_time):
+   day_matches = the_time.tm_mday in the_schedule["days"]
+   weekday_matches = (the_time.tm_wday + 1) % 7 in the_schedule["weekdays"]
+   if the_schedule["either_day"] == True:
+      day_matches = day_matches or weekday_matches
+   else:
+      day_matches = day_matches and weekday_matches
+   return the_time.tm_min in the_schedule["minutes"] and the_time.tm_hour in the_schedule["hours"] and the_time.tm_mon in the_schedule["months"] and day_matches
+
+#THIS FUNCTION RETURNS A TIME-OF-DAY WINDOW ("HH:MM-HH:MM"; SEE daemon_window) AS A TUPLE OF ITS START AND END, IN MINUTES
+#   AFTER MIDNIGHT. RETURNS None IF THE WINDOW IS "" (ANY TIME). RAISES AN EXCEPTION IF THE WINDOW ISN'T VALID.
+def get_window(the_window):
+   if the_window == "":
+      return None
+   the_times = the_window.split("-")
+   if len(the_times) != 2:
+      raise Exception("\"" + the_window + "\" isn't HH:MM-HH:MM.")
+   the_minutes = []
+   for a_time in the_times:
+      the_hour, the_minute = [int(a_value) for a_value in a_time.strip().split(":")]
+      if the_hour < 0 or the_hour > 24 or the_minute < 0 or the_minute > 59:
+         raise Exception("\"" + the_window + "\" isn't HH:MM-HH:MM.")
+      the_minutes.append(the_hour * 60 + the_minute)
+   return tuple(the_minutes)
+
+#THIS FUNCTION RETURNS True IF A FEATURE LAYER'S RELOAD CAN BE STARTED AT A GIVEN TIME (SEE daemon_window AND THE "window" OPTION).
+#   THE FIRST ARGUMENT IS THE LAYER'S LIST FROM layers. THE SECOND ARGUMENT IS THE TIME (A time.struct_time).
+def is_in_window(i, the_time):
+   the_window = get_window(i[6].get("window", daemon_window))
+   if the_window == None:
+      return True
+   now = the_time.tm_hour * 60 + the_time.tm_min
+   if the_window[0] <= the_window[1]:
+      return the_window[0] <= now < the_window[1]
+   #(THE WINDOW WRAPS PAST MIDNIGHT)
+   return now >= the_window[0] or now < the_window[1]
+
+#THIS FUNCTION DELETES WHAT A FINISHED JOB LEFT IN THE TEMPORARY SUBFOLDER (SEE delete_job_files) AND, IF IT FAILED, THE ITEMS
+#   IT UPLOADED TO AGO. USED WHEN THIS SCRIPT RUNS AS A SERVICE, WHICH KEEPS 1 TEMPORARY SUBFOLDER FOR ALL ITS RELOADS.
+#   TAKES THE JOB.
+def clean_up_job(the_job):
+   if the_job["success"] != True:
+      for copy_job in the_job.get("shards", [the_job]):
+         delete_upload(copy_job)
+   delete_job_files(the_job)
+
+#THIS FUNCTION RUNS THIS SCRIPT AS A SERVICE (W/ --daemon), INSTEAD OF RELOADING TODAY'S FEATURE LAYERS ONCE. EVERY
+#   daemon_check_seconds, IT FINDS THE FEATURE LAYERS WHOSE SCHEDULES (SEE get_schedule) FELL DUE SINCE THE LAST CHECK, AND
+#   HANDS THEM TO A POOL OF max_workers WORKERS THAT STAYS UP WHILE THE SERVICE RUNS, SO THAT arcpy AND arcgis ARE IMPORTED,
+#   THE CHECKS OF layers ARE DONE, AND EACH WORKER LOGS IN TO AGO ONCE (NOT ONCE PER RELOAD; SEE get_gis AND get_layer_info).
+#      -A FEATURE LAYER THAT FALLS DUE OUTSIDE ITS WINDOW (SEE is_in_window) WAITS UNTIL THE WINDOW OPENS.
+#      -A FEATURE LAYER THAT FALLS DUE WHILE IT'S STILL BEING RELOADED IS RELOADED AGAIN (ONCE) AFTER THAT RELOAD IS DONE.
+#      -THE RELOADS THAT ARE DONE BY A CHECK ARE REPORTED IN 1 EMAIL (AND THEIR METRICS ARE WRITTEN).
+#   RUNS UNTIL A FILE NAMED EGDB_To_OpenData.stop IS PUT IN THE SCRIPT'S FOLDER (OR CTRL+C IS PRESSED); THEN IT STARTS NO MORE
+#   RELOADS, WAITS FOR THE ONES UNDERWAY, AND STOPS.
+#   THE FIRST ARGUMENT IS THE GUID OF THE TEMPORARY SUBFOLDER. THE SECOND ARGUMENT IS THE TEMPORARY SUBFOLDER.
+def run_daemon(the_GUID, temp_subfolder):
+   global email_content
+   stop_path = os.path.join(sys.path[0], "EGDB_To_OpenData.stop")
+   if os.path.exists(stop_path):
+      os.remove(stop_path)
+   schedules = {}
+   for i in layers:
+      schedules[i[4]] = get_schedule(i)
+      make_note("Feature service " + i[3] + " is reloaded on schedule \"" + schedules[i[4]]["expression"] + "\"" + (" in window " + i[6].get("window", daemon_window) if i[6].get("window", daemon_window) != "" else "") + ".", True)
+   #START THE JOURNAL OF THE SERVICE, AND READ WHAT WAS KEPT FROM PREVIOUS RUNS (FINGERPRINTS OF EGDB SOURCES)
+   run_journal.clear()
+   run_journal.update({"guid": the_GUID, "day": "daemon", "started": tell_the_time(), "layers": {}})
+   save_journal()
+   load_state()
+   make_note("Running as a service (w/ up to " + str(max_workers) + " workers at the same time). To stop, put a file named EGDB_To_OpenData.stop in the script's folder.", True, True)
+   #(due_layers HOLDS THE FEATURE LAYERS THAT FELL DUE AND HAVEN'T BEEN STARTED; running HOLDS, FOR EACH FEATURE LAYER BEING
+   #RELOADED, ITS JOB, ITS FUTURE, AND WHEN IT WAS STARTED; last_jobs HOLDS EACH FEATURE LAYER'S LAST FINISHED JOB)
+   due_layers = {}
+   running = {}
+   last_jobs = {}
+   last_minute = int(time.time() // 60)
+   stopping = False
+   with ThreadPoolExecutor(max_workers = max_workers) as executor:
+      while stopping == False or len(running) > 0:
+         try:
+            if stopping == False and os.path.exists(stop_path):
+               make_note("Found EGDB_To_OpenData.stop. Starting no more reloads; waiting for " + str(len(running)) + " reload(s) underway...", True, True)
+               os.remove(stop_path)
+               stopping = True
+            #FIND THE FEATURE LAYERS THAT FELL DUE SINCE THE LAST CHECK (EACH MINUTE SINCE THEN IS CHECKED, SO NONE IS MISSED)
+            #(IF A CHECK FAILS, THE TRACEBACK IS LOGGED AND THE SERVICE KEEPS RUNNING; THE CHECK IS DONE AGAIN NEXT TIME)
+            try:
+               this_minute = int(time.time() // 60)
+               for a_minute in range(last_minute + 1, this_minute + 1):
+                  for i in layers:
+                     if i[4] not in due_layers and is_scheduled(schedules[i[4]], time.localtime(a_minute * 60)) == True:
+                        due_layers[i[4]] = i
+               last_minute = this_minute
+            except Exception:
+               make_note("ALERT - Something went wrong w/ checking which feature services are due. The service keeps running.\n" + traceback.format_exc(), True, True)
+            #START THE DUE FEATURE LAYERS THAT ARE IN THEIR WINDOWS AND AREN'T BEING RELOADED ALREADY
+            now = time.localtime()
+            for item_id in list(due_layers):
+               i = due_layers[item_id]
+               try:
+                  if stopping == False and item_id not in running and is_in_window(i, now) == True:
+                     del due_layers[item_id]
+                     #(CLEAN UP AFTER THE FEATURE LAYER'S LAST RELOAD, IF IT FAILED OR ITS CLEAN-UP FAILED; IT WAS KEPT UNTIL NOW)
+                     if item_id in last_jobs:
+                        clean_up_job(last_jobs.pop(item_id))
+                     make_note("Feature service " + i[3] + " is due. Starting its reload...", True)
+                     the_job = make_job(i, temp_subfolder)
+                     running[item_id] = (the_job, executor.submit(run_job, the_job), time.time())
+               except Exception:
+                  make_note("ALERT - Something went wrong w/ starting the reload of feature service " + i[3] + ". It's started again when it's next due. The service keeps running.\n" + traceback.format_exc(), True, True)
+            #REPORT THE RELOADS THAT ARE DONE (IN 1 EMAIL)
+            #(IF THE REPORT OR EMAIL FAILS, THE TRACEBACK IS LOGGED, WHAT THE RELOADS LEFT BEHIND IS KEPT, AND THE SERVICE KEEPS RUNNING)
+            done_ids = [item_id for item_id in running if running[item_id][1].done() == True]
+            if len(done_ids) > 0:
+               done_jobs = [running[item_id][0] for item_id in done_ids]
+               run_start = min([running[item_id][2] for item_id in done_ids])
+               for item_id in done_ids:
+                  del running[item_id]
+               #(A JOB THAT ISN'T CLEANED UP AFTER, BECAUSE IT FAILED OR ITS CLEAN-UP FAILED, IS KEPT IN last_jobs AND CLEANED UP
+               #AFTER BEFORE ITS NEXT RELOAD)
+               cleaned_ids = []
+               try:
+                  failed_layers = report_jobs(done_jobs, run_start)
+                  for the_job in done_jobs:
+                     if the_job["success"] == True:
+                        try:
+                           clean_up_job(the_job)
+                           cleaned_ids.append(the_job["layer"][4])
+                        except Exception:
+                           make_note("ALERT - Something went wrong w/ cleaning up after the reload of feature service " + the_job["layer"][3] + ". It's cleaned up after before its next reload.\n" + traceback.format_exc(), True, True)
+                  if len(failed_layers) > 0:
+                     make_note("ALERT - " + str(len(failed_layers)) + " of " + str(len(done_jobs)) + " feature services failed to reload: " + ", ".join(failed_layers) + ". See each one's section above. What they left behind is kept for troubleshooting until they're reloaded again.", True, True)
+                     send_email("EGDB_To_OpenData.py - ERROR", email_content)
+                  elif False in [the_job.get("skipped") == True for the_job in done_jobs]:
+                     send_email("EGDB_To_OpenData.py - REPORT", email_content)
+                  else:
+                     make_note("No feature service was reloaded (all were skipped because their EGDB sources haven't changed). Not emailing report.", True)
+               except Exception:
+                  make_note("ALERT - Something went wrong w/ reporting the reload(s) of " + ", ".join([the_job["layer"][3] for the_job in done_jobs]) + ". The service keeps running.\n" + traceback.format_exc(), True)
+               for the_job in done_jobs:
+                  if the_job["layer"][4] not in cleaned_ids:
+                     last_jobs[the_job["layer"][4]] = the_job
+               email_content = ""
+            if stopping == False or len(running) > 0:
+               time.sleep(daemon_check_seconds)
+         except KeyboardInterrupt:
+            make_note("Stopping (Ctrl+C). Starting no more reloads; waiting for " + str(len(running)) + " reload(s) underway...", True, True)
+            stopping = True
+   #DELETE TEMPORARY SUBFOLDER AND JOURNAL (UNLESS A FEATURE LAYER'S LAST RELOAD FAILED; THE NEXT RUN CLEANS UP AFTER IT)
+   if len(last_jobs) == 0:
+      make_note("Deleting temporary subfolder " + the_GUID + "...", True)
+      arcpy.management.Delete(temp_subfolder)
+      run_journal.clear()
+      save_journal()
+   else:
+      make_note("ALERT - The last reload of " + str(len(last_jobs)) + " feature service(s) failed (or wasn't cleaned up after). Temporary subfolder " + the_GUID + " was left in script's folder for troubleshooting (the next run cleans up after it).", True, True)
+
+#THIS FUNCTION RUNS THE SCRIPT: CHECKS THE GIVEN EGDB SOURCES AND FEATURE LAYERS, RELOADS THE FEATURE LAYERS THAT GET
+#   RELOADED TODAY, AND EMAILS THE REPORT (OR, W/ --daemon, KEEPS RELOADING FEATURE LAYERS ON THEIR SCHEDULES; SEE run_daemon). IT'S CALLED WHEN THE SCRIPT IS RUN (EGDB_To_OpenData_Benchmark.py IMPORTS
+#   THE SCRIPT AND CALLS IT INSTEAD).
+def main():
+   try:
+      #MAKE SURE GIVEN EGDB-SOURCES EXIST
+      #(ALL PROBLEMS FOUND ARE REPORTED TOGETHER BEFORE THE SCRIPT IS TERMINATED)
+      make_note("Making sure given EGDB sources exist...", True)
+      problems = check_egdb_sources()
          
-   #DELETE TEMPORARY SUBFOLDER
-   make_note("Deleting temporary subfolder " + the_GUID + "...", True)
-   arcpy.management.Delete(temp_subfolder)
+      #CONNECT TO ARCGIS ONLINE
+      make_note("Connecting to AGO...", True)   
+      ago_call(lambda gis: gis)
+
+      #MAKE SURE GIVEN FEATURE LAYERS EXIST AND ARE IN 1-LAYER FEATURE SERVICES
+      make_note("Making sure given feature layers exist and are in 1-layer feature services...", True)
+      problems += check_feature_layers()
+      if len(problems) > 0:
+         for a_problem in problems:
+            make_note(a_problem, True, True)
+         make_note(str(len(problems)) + " problem(s) found w/ given EGDB sources and feature layers. Script terminated.", True, True)
+         sys.exit()
+   
+      #READ THE JOURNAL OF THE LAST RUN, IF IT WAS INTERRUPTED OR HAD FEATURE LAYERS FAIL TO RELOAD
+      #(W/ --resume, THAT RUN IS PICKED UP; OTHERWISE, WHAT IT LEFT BEHIND IS CLEANED UP)
+      last_journal = load_journal()
+      daemon_mode = "--daemon" in sys.argv[1:]
+      resuming = "--resume" in sys.argv[1:] and last_journal != None and daemon_mode == False
+      if "--resume" in sys.argv[1:] and daemon_mode == True:
+         make_note("Can't resume an interrupted run when running as a service (--daemon). Starting a new run.", True, True)
+      elif "--resume" in sys.argv[1:] and last_journal == None:
+         make_note("Asked to resume, but there's no journal of an interrupted run. Starting a new run.", True, True)
+      elif last_journal != None and resuming == False:
+         make_note("Found journal of an interrupted run (started " + last_journal["started"] + "). Cleaning up after it and starting a new run (run w/ --resume to pick it up instead)...", True, True)
+         clean_up_journal(last_journal)
+
+      #CREATE A TEMPORARY GUID-NAMED SUBFOLDER IN SCRIPT'S FOLDER TO ASSEMBLE EGDB-SOURCE DATA FOR UPLOAD TO AGO
+      #(W/ --resume, REUSE THE TEMPORARY SUBFOLDER OF THE INTERRUPTED RUN)
+      if resuming == True:
+         the_GUID = last_journal["guid"]
+         make_note("Resuming run started " + last_journal["started"] + ".", True, True)
+      else:
+         make_note("Creating temporary subfolder to assemble EGDB-source data to be loaded...", True)
+         the_GUID = str(uuid.uuid4())
+      temp_subfolder = os.path.join(sys.path[0], the_GUID)
+      if os.path.exists(temp_subfolder) == False:
+         os.mkdir(temp_subfolder)
+      make_note("Temporary subfolder for assembly of EGDB-source data is " + the_GUID + ".", True)
+
+      #W/ --daemon, RUN AS A SERVICE THAT RELOADS EACH FEATURE LAYER ON ITS SCHEDULE (UNTIL IT'S STOPPED)
+      if daemon_mode == True:
+         run_daemon(the_GUID, temp_subfolder)
+         make_note("-----SCRIPT COMPLETED.", True)
+         return
 
-   #EMAIL REPORT
-   make_note("Emailing report...", True)
-   send_email("EGDB_To_OpenData.py - REPORT", email_content)
+      #GET CURRENT DAY OF WEEK
+      s = time.localtime()
+      the_day = s.tm_wday
+      if the_day == 0:
+         the_day = "M"
+      elif the_day == 1:
+         the_day = "T"
+      elif the_day == 2:
+         the_day = "W"
+      elif the_day == 3:
+         the_day = "R"
+      elif the_day == 4:
+         the_day = "F"
+      elif the_day == 5:
+         the_day = "S"
+      else:
+         the_day = "U"
+      #(W/ --resume, RELOAD THE FEATURE SERVICES OF THE DAY OF THE INTERRUPTED RUN, EVEN IF IT'S NOW THE NEXT DAY; IF THE
+      #INTERRUPTED RUN RAN AS A SERVICE, ITS "day" IS "daemon", AND THE FEATURE SERVICES IT STARTED RELOADING ARE RELOADED)
+      if resuming == True:
+         the_day = last_journal["day"]
+      if the_day == "daemon":
+         make_note("The interrupted run ran as a service (--daemon).", True)
+      else:
+         make_note("Today is day " + the_day + ".", True)
+
+      #FIND OUT WHICH FEATURE SERVICES GET RELOADED TODAY
+      todays_layers = []
+      for i in layers:
+         if the_day == "daemon":
+            if i[4] in last_journal["layers"]:
+               todays_layers.append(i)
+            continue
+         okay_days = i[5].split(",")
+         j = 0
+         while j < len(okay_days):
+            okay_days[j] = okay_days[j].upper().strip()
+            j += 1
+         if the_day.upper() in okay_days:
+            todays_layers.append(i)
+      make_note(str(len(todays_layers)) + " of " + str(len(layers)) + " feature services get reloaded today.", True)
+      if resuming == True:
+         done_count = len(todays_layers)
+         todays_layers = [i for i in todays_layers if last_journal["layers"].get(i[4], {}).get("done") != True]
+         done_count -= len(todays_layers)
+         make_note(str(done_count) + " of them were already reloaded by the interrupted run. Reloading the other " + str(len(todays_layers)) + ".", True, True)
+
+      #START THE JOURNAL OF THIS RUN (OR, W/ --resume, GO ON W/ THE JOURNAL OF THE INTERRUPTED RUN)
+      run_journal.clear()
+      if resuming == True:
+         run_journal.update(last_journal)
+      else:
+         run_journal.update({"guid": the_GUID, "day": the_day, "started": tell_the_time(), "layers": {}})
+      save_journal()
+
+      #READ WHAT WAS KEPT FROM PREVIOUS RUNS (FINGERPRINTS OF EGDB SOURCES)
+      load_state()
+
+      #RELOAD EACH FEATURE LAYER
+      run_start = time.time()
+      jobs = [make_job(i, temp_subfolder) for i in todays_layers]
+      if resuming == True:
+         for the_job in jobs:
+            if the_job["layer"][4] in last_journal["layers"]:
+               restore_checkpoint(the_job, last_journal["layers"][the_job["layer"][4]])
+            else:
+               #(THE INTERRUPTED RUN MAY HAVE STARTED EXPORTING IT BEFORE IT WAS KEPT IN THE JOURNAL)
+               delete_job_files(the_job)
+      if pipeline == True:
+         #(EACH STAGE OF RELOADING IS WORKED BY ITS OWN WORKERS, SO STAGES OF DIFFERENT FEATURE LAYERS OVERLAP)
+         make_note("Entering pipeline to reload each feature layer (workers per stage: " + str(pipeline_workers) + ")...", True)
+         run_pipeline(jobs)
+      else:
+         #(EACH FEATURE LAYER IS RELOADED BY A WORKER IN A POOL OF max_workers WORKERS)
+         make_note("Entering loop to reload each feature layer (using up to " + str(max_workers) + " workers at the same time)...", True)
+         with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            list(executor.map(run_job, jobs))
+      #(ADD EACH FEATURE LAYER'S SECTION TO EMAIL REPORT IN ORDER OF layers, AND WRITE METRICS OF THIS RUN)
+      failed_layers = report_jobs(jobs, run_start)
+
+      if len(failed_layers) == 0:
+         #DELETE TEMPORARY SUBFOLDER AND JOURNAL (THERE'S NOTHING LEFT TO RESUME)
+         make_note("Deleting temporary subfolder " + the_GUID + "...", True)
+         arcpy.management.Delete(temp_subfolder)
+         run_journal.clear()
+         save_journal()
+
+         #EMAIL REPORT
+         make_note("Emailing report...", True)
+         send_email("EGDB_To_OpenData.py - REPORT", email_content)
+      else:
+         make_note("ALERT - " + str(len(failed_layers)) + " of " + str(len(todays_layers)) + " feature services failed to reload: " + ", ".join(failed_layers) + ". See each one's section above. Temporary subfolder " + the_GUID + " was left in script's folder for troubleshooting. Run the script w/ --resume to reload only those feature services (or the next run cleans up after this one).", True, True)
 
-   make_note("-----SCRIPT COMPLETED.", True)
+         #EMAIL REPORT
+         make_note("Emailing report...", True)
+         send_email("EGDB_To_OpenData.py - ERROR", email_content)
+
+      make_note("-----SCRIPT COMPLETED.", True)
+
+   except SystemExit:
+      #(THE SCRIPT TERMINATED ITSELF, E.G., ON PROBLEMS W/ GIVEN EGDB SOURCES AND FEATURE LAYERS; THERE'S NOTHING TO RESUME)
+      #EMAIL REPORT
+      send_email("EGDB_To_OpenData.py - ERROR", email_content)
+      raise
+   except:
+      #(SUGGEST --resume ONLY IF THIS RUN STARTED ITS JOURNAL, WHICH IS CLEARED ONCE EVERY FEATURE LAYER IS DONE)
+      if len(run_journal) > 0:
+         make_note("-----Script terminated due to error condition. Run the script w/ --resume to pick up where it left off (feature services already reloaded aren't reloaded again), or the next run cleans up what this run left behind.", True, True)
+      else:
+         make_note("-----Script terminated due to error condition.", True, True)
+      #EMAIL REPORT
+      send_email("EGDB_To_OpenData.py - ERROR", email_content)
 
-except:
-   make_note("-----Script terminated due to error condition. Check script's folder for temporary GUID-named subfolders that should be deleted (after possibly using them for troubleshooting).", True, True)
-   #EMAIL REPORT
-   send_email("EGDB_To_OpenData.py - ERROR", email_content)
+if __name__ == "__main__":
+   main()
@@ -0,0 +1,806 @@
+#PURPOSE
+#   Benchmarks EGDB_To_OpenData.py w/out an EGDB or AGO, so that changes to it (e.g., to concurrency, compression, or retries) can be
+#   measured and compared on any machine (including a plain Linux box w/out ArcGIS Pro).
+#   Runs the real reload loop of EGDB_To_OpenData.py (its main function) end to end against local stand-ins for arcpy and AGO.
+
+#TERMINOLOGY USED IN COMMENTS:
+#   stand-in arcpy: A fake arcpy module (installed in place of arcpy) that makes synthetic EGDB sources w/ given row counts and row
+#                   sizes, and copies them into file-geodatabase-like folders.
+#
+#   stand-in AGO: A local HTTP server (on 127.0.0.1) that implements the AGO endpoints that EGDB_To_OpenData.py uses: content
+#                 (add w/ parts, get, search, delete, analyze), truncate, append (from a file geodatabase, .csv, or .geojson),
+#                 query (count), updateDefinition, views (deleteFromDefinition, addToDefinition), and background jobs. It
+#                 waits ago_latency_ms on each request, and fails, throttles, or hangs on given shares of requests.
+#
+#   stand-in arcgis: A fake arcgis module (installed in place of the ArcGIS API for Python) that talks to the stand-in AGO over HTTP.
+#
+#   scenario: A named set of EGDB_To_OpenData.py major variables (e.g., {"max_workers": 4}) to benchmark.
+
+#HOW IT WORKS (PSEUDO CODE)
+#   Install stand-in arcpy and stand-in arcgis in place of arcpy and arcgis.
+#   Start stand-in AGO.
+#   For each scenario (repeats times):
+#      Reset stand-in AGO (1 feature service for each synthetic EGDB source, each w/ no rows).
+#      Load EGDB_To_OpenData.py, set its major variables (layers for the synthetic EGDB sources, then the scenario's), and run its
+#      main function in a new temporary folder (the script's log, metrics, and state files are written there).
+#      Read the metrics that EGDB_To_OpenData.py wrote (see EGDB_To_OpenData_metrics.json) and total each stage's seconds.
+#   Print a table of the results and write them into EGDB_To_OpenData_Benchmark.csv (added each run) in this script's folder.
+
+#README NOTES
+#   -Stand-in arcpy and stand-in arcgis are installed only in this script's process. Stand-in AGO only listens on 127.0.0.1.
+#
+#   -The synthetic EGDB sources are made from a fixed random seed, so each run benchmarks the same data. Set row_bytes of an EGDB
+#    source to change how much data each row has (and so, the size of its file geodatabase, .zip, and upload).
+#
+#   -Stand-in AGO takes time to append rows and rebuild spatial indexes (see ago_append_rows_per_second and
+#    ago_index_rows_per_second), and to receive uploads (see ago_upload_mb_per_second), so that those stages aren't free.
+#
+#   -Stand-in AGO counts rows by ID, so record counts, upserts, and deletes of "delta" reloads behave like they do in AGO.
+#
+#   -An EGDB source w/ option {"mode": "swap"} gets a view in stand-in AGO (its feature service) of the first of 2 hidden
+#    feature services, which are given to EGDB_To_OpenData.py as the "staging_items" option.
+
+#HOW TO USE
+#   1) Set major variables in section of this script commented as ***** SET MAJOR VARIABLES HERE *****.
+#
+#   2) Run w/ Python 3 in the folder of EGDB_To_OpenData.py (no ArcGIS Pro or ArcGIS API for Python needed):
+#         python EGDB_To_OpenData_Benchmark.py
+
+#******************** SET MAJOR VARIABLES HERE ***********
+
+#sources
+#   Set to a list of dictionaries, 1 for each synthetic EGDB source (and its feature service in stand-in AGO):
+#      "name" -Name of the EGDB source (w/out schema prefix).
+#      "rows" -Row count.
+#      "row_bytes" -About how many bytes of data each row has.
+#      "spatial" -True for a feature class (w/ a spatial index in AGO), False for a non-spatial table.
+#      "options" -(Optional) Dictionary of options for reloading (item 6 of a list in layers of EGDB_To_OpenData.py).
+sources = []
+sources.append({"name": "parcels", "rows": 200000, "row_bytes": 400, "spatial": True})
+sources.append({"name": "streets", "rows": 50000, "row_bytes": 300, "spatial": True})
+sources.append({"name": "addresses", "rows": 100000, "row_bytes": 150, "spatial": True})
+sources.append({"name": "permits", "rows": 20000, "row_bytes": 250, "spatial": False})
+
+#scenarios
+#   Set to a list of lists, each w/ a name and a dictionary of EGDB_To_OpenData.py major variables to set for that scenario
+#   (major variables not given keep the values set in EGDB_To_OpenData.py).
+scenarios = []
+scenarios.append(["1 worker", {"max_workers": 1}])
+scenarios.append(["4 workers", {"max_workers": 4}])
+scenarios.append(["pipeline", {"pipeline": True}])
+scenarios.append(["4 workers, stored .zip", {"max_workers": 4, "zip_compression": "stored"}])
+scenarios.append(["4 workers, sharded", {"max_workers": 4, "shard_rows": 50000}])
+scenarios.append(["4 workers, file geodatabases only", {"max_workers": 4, "staging_engine": "fgdb"}])
+
+#repeats
+#   Set to an integer to indicate how many times each scenario is run.
+repeats = 1
+
+#ago_latency_ms
+#   Set to a number to indicate how many milliseconds stand-in AGO waits before answering each request.
+ago_latency_ms = 50
+
+#ago_failure_rate
+#   Set to a number between 0 and 1 to indicate the share of requests that stand-in AGO fails (w/ an HTTP 500 error).
+ago_failure_rate = 0.0
+
+#ago_throttle_rate
+#   Set to a number between 0 and 1 to indicate the share of requests that stand-in AGO turns away as throttled (w/ an HTTP 429 error).
+ago_throttle_rate = 0.0
+
+#ago_timeout_rate, ago_timeout_seconds, client_timeout_seconds
+#   Set ago_timeout_rate to a number between 0 and 1 to indicate the share of requests that stand-in AGO hangs on for
+#   ago_timeout_seconds before answering (it still does what was asked, like AGO does). Stand-in arcgis gives up waiting
+#   on a request after client_timeout_seconds.
+ago_timeout_rate = 0.0
+ago_timeout_seconds = 10
+client_timeout_seconds = 5
+
+#ago_upload_mb_per_second, ago_append_rows_per_second, ago_index_rows_per_second
+#   Set to numbers to indicate how fast stand-in AGO receives uploads, appends rows, and rebuilds spatial indexes.
+ago_upload_mb_per_second = 20
+ago_append_rows_per_second = 50000
+ago_index_rows_per_second = 200000
+
+#keep_work_folders
+#   Set to True to keep each run's temporary folder (w/ the script's log, metrics, and state files) for troubleshooting.
+keep_work_folders = False
+
+#quiet
+#   Set to True to hide what EGDB_To_OpenData.py prints while it runs (it's still written into its log file).
+quiet = True
+
+#******************** END SECTION FOR MAJOR VARIABLES ****
+
+#MODULES
+import os
+import sys
+import io
+import re
+import json
+import time
+import types
+import uuid
+import random
+import shutil
+import struct
+import zipfile
+import tempfile
+import threading
+import contextlib
+import csv
+import importlib.util
+import urllib.parse
+import urllib.request
+import urllib.error
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+#GLOBAL VARIABLES
+
+#script_path is the path of the script that's benchmarked
+script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "EGDB_To_OpenData.py")
+
+#stand_in_ago_url is the base URL of stand-in AGO (see start_stand_in_ago)
+stand_in_ago_url = ""
+
+#ago_state holds what's in stand-in AGO (items, feature services, background jobs); ago_lock guards it
+ago_state = {}
+ago_lock = threading.Lock()
+
+#STAND-IN ARCPY
+
+#THIS FUNCTION RETURNS THE SYNTHETIC EGDB SOURCE (DICTIONARY FROM sources) OF A GIVEN PATH, OR None IF THERE'S NONE.
+#   (THE PATH ENDS W/ THE EGDB SOURCE'S NAME, W/ OR W/OUT SCHEMA PREFIX.)
+def find_source(the_path):
+   the_name = os.path.basename(the_path).split(".")[-1].lower()
+   for a_source in sources:
+      if a_source["name"].lower() == the_name:
+         return a_source
+   return None
+
+#THIS FUNCTION RETURNS THE ROWS OF A SYNTHETIC EGDB SOURCE, AS DICTIONARIES OF FIELD NAME TO VALUE (OBJECTID, NAME, CATEGORY,
+#   VALUE, NOTES, AND, IF IT'S SPATIAL, SHAPE@WKB). THE ROWS ARE THE SAME EACH TIME (FIXED RANDOM SEED).
+def make_rows(the_source):
+   the_random = random.Random(the_source["name"])
+   notes_length = max(the_source["row_bytes"] - 60, 0)
+   the_words = ["north", "south", "east", "west", "main", "river", "hill", "park", "school", "farm", "road", "lake"]
+   #(NOTES OF EACH ROW ARE A RANDOM SLICE OF 1 LONG MADE-UP TEXT, WHICH IS MUCH FASTER THAN MAKING UP TEXT FOR EACH ROW)
+   the_text = " ".join(the_random.choice(the_words) + " " + str(the_random.randint(0, 9999)) for k in range(20000))
+   for k in range(1, the_source["rows"] + 1):
+      the_row = {"OBJECTID": k, "NAME": "Name " + str(the_random.randint(1, 999999)), "CATEGORY": the_random.choice(the_words),
+                 "VALUE": round(the_random.random() * 1000, 3)}
+      text_start = the_random.randint(0, max(len(the_text) - notes_length, 0))
+      the_row["NOTES"] = the_text[text_start:text_start + notes_length]
+      if the_source["spatial"] == True:
+         the_row["SHAPE@WKB"] = struct.pack("<BIdd", 1, 1, 400000 + the_random.random() * 100000, 20000 + the_random.random() * 200000)
+      yield the_row
+
+#THIS FUNCTION RETURNS THE IDS (OBJECTIDS) IN A SQL WHERE-CLAUSE MADE BY make_where_clauses OF EGDB_To_OpenData.py
+#   (E.G., "OBJECTID IN (1,2,3)"), AN EMPTY SET FOR "1=0" (NO ROWS), OR None IF THE WHERE-CLAUSE IS EMPTY (ALL ROWS) OR HAS NO
+#   IN-LIST.
+def get_where_ids(where_clause):
+   if where_clause == "1=0":
+      return set()
+   if where_clause == None or " IN (" not in where_clause:
+      return None
+   the_ids = set()
+   for a_list in re.findall(r"IN \(([^)]*)\)", where_clause):
+      for a_value in a_list.split(","):
+         the_ids.add(a_value.strip().strip("'"))
+   return the_ids
+
+#THIS FUNCTION RETURNS THE OBJECTID RANGE IN A SQL WHERE-CLAUSE MADE BY get_shard_ranges OF EGDB_To_OpenData.py
+#   (E.G., "OBJECTID >= 1 AND OBJECTID < 1001"), AS A TUPLE (LOWEST OBJECTID, OBJECTID PAST THE HIGHEST), OR None IF THE
+#   WHERE-CLAUSE HAS NO RANGE.
+def get_where_range(where_clause):
+   if where_clause == None:
+      return None
+   the_bounds = re.findall(r"OBJECTID (>=|<) (\d+)", where_clause)
+   if len(the_bounds) == 0:
+      return None
+   the_range = [0, float("inf")]
+   for the_operator, the_value in the_bounds:
+      the_range[0 if the_operator == ">=" else 1] = int(the_value)
+   return tuple(the_range)
+
+#THIS FUNCTION RETURNS True IF A ROW OF A SYNTHETIC EGDB SOURCE IS SELECTED BY A SQL WHERE-CLAUSE (GIVEN AS WHAT get_where_ids
+#   AND get_where_range RETURN FOR IT).
+def is_selected(the_row, where_ids, where_range):
+   if where_ids != None and str(the_row["OBJECTID"]) not in where_ids:
+      return False
+   if where_range != None and (the_row["OBJECTID"] < where_range[0] or the_row["OBJECTID"] >= where_range[1]):
+      return False
+   return True
+
+#THIS CLASS IS WHAT arcpy.Describe RETURNS FOR A SYNTHETIC EGDB SOURCE.
+class FakeDescription:
+   def __init__(self, the_source):
+      self.dataType = "FeatureClass" if the_source["spatial"] == True else "Table"
+      self.shapeType = "Point" if the_source["spatial"] == True else None
+      self.OIDFieldName = "OBJECTID"
+      self.editorTrackingEnabled = False
+      self.editedAtFieldName = ""
+      self.spatialReference = None
+
+#THIS CLASS IS WHAT arcpy.ListFields RETURNS (A LIST OF THESE) FOR A SYNTHETIC EGDB SOURCE.
+class FakeField:
+   def __init__(self, name, type):
+      self.name = name
+      self.type = type
+
+#THIS CLASS IS arcpy.da.SearchCursor FOR A SYNTHETIC EGDB SOURCE. GIVES THE ROWS (AS TUPLES OF THE GIVEN FIELDS) IN OBJECTID
+#   ORDER (OR, IF sql_clause SORTS DESCENDING, IN REVERSE ORDER). SHAPE@XY IS READ FROM SHAPE@WKB (NOT PROJECTED).
+class FakeSearchCursor:
+   def __init__(self, the_path, the_fields, where_clause = None, spatial_reference = None, explode_to_points = False, sql_clause = (None, None)):
+      self.the_source = find_source(the_path)
+      self.the_fields = ["OBJECTID" if a_field == "OID@" else a_field for a_field in the_fields]
+      self.where_ids = get_where_ids(where_clause)
+      self.where_range = get_where_range(where_clause)
+      self.descending = sql_clause != None and "DESC" in str(sql_clause[1]).upper()
+   def __iter__(self):
+      the_rows = make_rows(self.the_source)
+      if self.descending == True:
+         the_rows = reversed(list(the_rows))
+      for the_row in the_rows:
+         if is_selected(the_row, self.where_ids, self.where_range) == True:
+            if "SHAPE@XY" in self.the_fields:
+               the_row["SHAPE@XY"] = struct.unpack("<BIdd", the_row["SHAPE@WKB"])[2:]
+            yield tuple(the_row.get(a_field) for a_field in self.the_fields)
+   def __enter__(self):
+      return self
+   def __exit__(self, *the_exception):
+      return False
+
+#THIS CLASS IS arcpy.da.InsertCursor FOR A FEATURE CLASS OR TABLE COPIED (W/ fake_copy) FROM A SYNTHETIC EGDB SOURCE. ADDS EACH
+#   ROW TO THE .gdbtable FILE, AND ITS ID TO THE <name>.ids FILE. (A ROW'S ID IS FOUND BY LOOKING UP ITS VALUES IN THE EGDB SOURCE.)
+class FakeInsertCursor:
+   def __init__(self, the_path, the_fields):
+      self.gdb_path, self.the_name = os.path.split(the_path)
+      self.the_ids = {}
+      for the_row in make_rows(find_source(the_path)):
+         self.the_ids[tuple(the_row.get(a_field) for a_field in the_fields)] = str(the_row["OBJECTID"])
+      self.the_rows = []
+   def insertRow(self, the_row):
+      self.the_rows.append(tuple(the_row))
+   def __enter__(self):
+      return self
+   def __exit__(self, *the_exception):
+      with open(os.path.join(self.gdb_path, "a00000009.gdbtable"), "ab") as table_file:
+         for the_row in self.the_rows:
+            table_file.write(repr(the_row).encode("utf-8") + b"\n")
+      with open(os.path.join(self.gdb_path, self.the_name + ".ids"), "a") as ids_file:
+         ids_file.write("\n" + "\n".join(self.the_ids[the_row] for the_row in self.the_rows))
+      return False
+
+#THIS FUNCTION IS arcpy.conversion.FeatureClassToFeatureClass (AND TableToTable) FOR A SYNTHETIC EGDB SOURCE. IT WRITES THE
+#   ROWS (OR THE ROWS SELECTED BY where_clause) INTO A .gdbtable FILE IN THE FILE-GEODATABASE FOLDER, AND THEIR IDS INTO A
+#   <name>.ids FILE (WHICH STAND-IN AGO READS WHEN APPENDING FROM THE UPLOADED .zip).
+def fake_copy(in_data, out_path, out_name, where_clause = "", *more_arguments, **more_keywords):
+   the_source = find_source(in_data)
+   where_ids = get_where_ids(where_clause)
+   where_range = get_where_range(where_clause)
+   the_ids = []
+   with open(os.path.join(out_path, "a00000009.gdbtable"), "wb") as table_file:
+      for the_row in make_rows(the_source):
+         if is_selected(the_row, where_ids, where_range) == True:
+            the_ids.append(str(the_row["OBJECTID"]))
+            table_file.write(repr(tuple(the_row.values())).encode("utf-8") + b"\n")
+   with open(os.path.join(out_path, out_name + ".ids"), "w") as ids_file:
+      ids_file.write("\n".join(the_ids))
+
+#THIS FUNCTION IS arcpy.management.CreateFileGDB. MAKES A FILE-GEODATABASE-LIKE FOLDER W/ A FEW SMALL SYSTEM FILES.
+def fake_create_file_gdb(out_folder_path, out_name, *more_arguments):
+   gdb_path = os.path.join(out_folder_path, out_name)
+   os.makedirs(gdb_path)
+   for a_file in ["gdb", "timestamps", "a00000001.gdbtable", "a00000001.gdbtablx"]:
+      with open(os.path.join(gdb_path, a_file), "wb") as system_file:
+         system_file.write(b"\0" * 1024)
+
+#THIS FUNCTION IS arcpy.GetCount_management (AND arcpy.management.GetCount). RETURNS A LIST W/ THE ROW COUNT (AS STRING).
+def fake_get_count(the_path):
+   return [str(find_source(the_path)["rows"])]
+
+#THIS FUNCTION IS arcpy.ListFields FOR A SYNTHETIC EGDB SOURCE.
+def fake_list_fields(the_path, *more_arguments):
+   the_fields = [FakeField("OBJECTID", "OID"), FakeField("NAME", "String"), FakeField("CATEGORY", "String"), FakeField("VALUE", "Double"), FakeField("NOTES", "String")]
+   if find_source(the_path)["spatial"] == True:
+      the_fields.append(FakeField("SHAPE", "Geometry"))
+   return the_fields
+
+#THIS FUNCTION INSTALLS STAND-IN ARCPY (IN PLACE OF arcpy) IN THIS SCRIPT'S PROCESS.
+def install_stand_in_arcpy():
+   arcpy = types.ModuleType("arcpy")
+   arcpy.Exists = lambda the_path: find_source(the_path) != None or os.path.exists(the_path)
+   arcpy.Describe = lambda the_path: FakeDescription(find_source(the_path))
+   arcpy.ListFields = fake_list_fields
+   arcpy.SpatialReference = lambda the_code: the_code
+   arcpy.EnvManager = lambda **the_settings: contextlib.nullcontext()
+   arcpy.GetCount_management = fake_get_count
+   arcpy.management = types.SimpleNamespace(CreateFileGDB = fake_create_file_gdb, GetCount = fake_get_count,
+                                            Delete = lambda the_path, *more_arguments: shutil.rmtree(the_path, ignore_errors = True))
+   arcpy.conversion = types.SimpleNamespace(FeatureClassToFeatureClass = fake_copy, TableToTable = fake_copy)
+   arcpy.da = types.SimpleNamespace(SearchCursor = FakeSearchCursor, InsertCursor = FakeInsertCursor)
+   sys.modules["arcpy"] = arcpy
+
+#STAND-IN AGO
+
+#THIS FUNCTION RESETS STAND-IN AGO: 1 FEATURE SERVICE (W/ NO ROWS) FOR EACH SYNTHETIC EGDB SOURCE, AND NO OTHER ITEMS OR JOBS.
+#   RETURNS A DICTIONARY OF EGDB-SOURCE NAME TO ITEM ID OF ITS FEATURE SERVICE.
+def reset_stand_in_ago():
+   item_ids = {}
+   with ago_lock:
+      ago_state.clear()
+      ago_state.update({"items": {}, "services": {}, "jobs": {}})
+      for a_source in sources:
+         #(IN "swap" MODE, THE FEATURE SERVICE IS A VIEW OF THE FIRST OF 2 HIDDEN FEATURE SERVICES, <name>_a AND <name>_b)
+         service_names = [a_source["name"]]
+         if a_source.get("options", {}).get("mode") == "swap":
+            service_names += [a_source["name"] + "_a", a_source["name"] + "_b"]
+         for service_name in service_names:
+            item_id = uuid.uuid5(uuid.NAMESPACE_URL, service_name).hex
+            ago_state["items"][item_id] = {"id": item_id, "title": "Benchmark " + service_name, "type": "Feature Service", "service": service_name}
+            ago_state["services"][service_name] = {"spatial": a_source["spatial"], "ids": set()}
+            item_ids[service_name] = item_id
+         if len(service_names) > 1:
+            ago_state["services"][a_source["name"]]["view_of"] = service_names[1]
+   return item_ids
+
+#THIS FUNCTION STARTS A BACKGROUND JOB IN STAND-IN AGO THAT RUNS A GIVEN FUNCTION (WHICH RAISES AN EXCEPTION IF THE JOB FAILS).
+#   RETURNS THE JOB'S ID.
+def start_ago_job(the_function):
+   job_id = uuid.uuid4().hex
+   with ago_lock:
+      ago_state["jobs"][job_id] = {"status": "Pending"}
+   def run_ago_job():
+      ago_state["jobs"][job_id]["status"] = "InProgress"
+      try:
+         the_function()
+         ago_state["jobs"][job_id]["status"] = "Completed"
+      except Exception:
+         ago_state["jobs"][job_id]["status"] = "Failed"
+   threading.Thread(target = run_ago_job, daemon = True).start()
+   return job_id
+
+#THIS FUNCTION RETURNS THE ROWS OF AN UPLOADED .csv OR .geojson (AS DICTIONARIES OF COLUMN NAME TO VALUE).
+#   THE FIRST ARGUMENT IS THE ITEM ID OF THE UPLOADED FILE. THE SECOND ARGUMENT IS "csv" OR "geojson".
+def read_rows(item_id, upload_format):
+   the_text = ago_state["items"][item_id]["data"].decode("utf-8")
+   if upload_format == "csv":
+      return list(csv.DictReader(io.StringIO(the_text)))
+   return [a_feature["properties"] for a_feature in json.loads(the_text)["features"]]
+
+#THIS FUNCTION APPENDS (OR UPSERTS) THE ROWS OF AN UPLOADED .zip (OR .csv OR .geojson) INTO A FEATURE SERVICE OF STAND-IN AGO,
+#   TAKING AS LONG AS AGO WOULD (SEE ago_append_rows_per_second). ROWS OF A .zip ARE COUNTED BY THEIR IDS IN THE EGDB SOURCE;
+#   ROWS OF A .csv OR .geojson ARE COUNTED BY THEIR VALUE IN upsertMatchingField (OR, IF IT'S NOT AN UPSERT, EACH AS A NEW ROW).
+#   THE FIRST ARGUMENT IS THE FEATURE SERVICE (FROM ago_state). THE SECOND ARGUMENT IS A DICTIONARY OF THE APPEND'S PARAMETERS.
+def append_rows(the_service, the_params):
+   item_id = the_params["appendItemId"]
+   upload_format = the_params.get("appendUploadFormat", "filegdb")
+   if upload_format == "filegdb":
+      source_table_name = the_params["sourceTableName"]
+      with zipfile.ZipFile(io.BytesIO(ago_state["items"][item_id]["data"])) as the_zip:
+         the_names = [a_name for a_name in the_zip.namelist() if a_name.endswith("/" + source_table_name + ".ids")]
+         if len(the_names) == 0:
+            raise Exception("Source table " + source_table_name + " isn't in the uploaded file geodatabase.")
+         the_ids = [an_id for an_id in the_zip.read(the_names[0]).decode("utf-8").split("\n") if an_id != ""]
+   else:
+      if upload_format == "csv" and "appendSourceInfo" not in the_params:
+         raise Exception("appendSourceInfo is required to append from a .csv.")
+      the_rows = read_rows(item_id, upload_format)
+      if str(the_params.get("upsert", "false")).lower() == "true":
+         the_ids = [str(a_row[the_params["upsertMatchingField"]]) for a_row in the_rows]
+      else:
+         the_ids = [item_id + ":" + str(k) for k in range(len(the_rows))]
+   time.sleep(len(the_ids) / ago_append_rows_per_second)
+   with ago_lock:
+      the_service["ids"].update(the_ids)
+
+#THIS FUNCTION REBUILDS THE SPATIAL INDEX OF A FEATURE SERVICE OF STAND-IN AGO, TAKING AS LONG AS AGO WOULD (SEE
+#   ago_index_rows_per_second).
+def rebuild_index(the_service):
+   time.sleep(len(the_service["ids"]) / ago_index_rows_per_second)
+
+#THIS FUNCTION RETURNS WHAT STAND-IN AGO ANSWERS ABOUT AN ITEM (ITS id, title, type, AND, FOR A FEATURE SERVICE, url).
+#   THE FIRST ARGUMENT IS THE ITEM (FROM ago_state). THE SECOND ARGUMENT IS THE BASE URL OF STAND-IN AGO.
+def describe_item(the_item, base_url):
+   the_answer = {"id": the_item["id"], "title": the_item["title"], "type": the_item["type"]}
+   if "service" in the_item:
+      the_answer["url"] = base_url + "/rest/services/" + the_item["service"] + "/FeatureServer"
+   return the_answer
+
+#THIS FUNCTION ANSWERS A REQUEST TO STAND-IN AGO.
+#   THE FIRST ARGUMENT IS THE PATH OF THE URL (E.G., /sharing/rest/content/items/<ID>). THE SECOND ARGUMENT IS A DICTIONARY
+#   OF THE REQUEST'S PARAMETERS. THE THIRD ARGUMENT IS A DICTIONARY OF THE REQUEST'S FILES (NAME TO BYTES). THE FOURTH ARGUMENT
+#   IS THE BASE URL OF STAND-IN AGO.
+#   RETURNS A DICTIONARY (ANSWERED AS JSON).
+def answer_request(the_path, the_params, the_files, base_url):
+   the_parts = [urllib.parse.unquote(a_part) for a_part in the_path.strip("/").split("/")]
+   is_async = str(the_params.get("async", "false")).lower() == "true"
+   #(SHARING API: USER, CONTENT, SEARCH)
+   if the_parts[:3] == ["sharing", "rest", "community"]:
+      return {"username": "benchmark"}
+   if the_parts[:3] == ["sharing", "rest", "search"]:
+      the_ids = re.findall(r"id:(\w+)", the_params.get("q", ""))
+      return {"results": [describe_item(ago_state["items"][an_id], base_url) for an_id in the_ids if an_id in ago_state["items"]]}
+   if the_parts[:5] == ["sharing", "rest", "content", "features", "analyze"]:
+      the_fields = [{"name": a_name, "type": "esriFieldTypeString"} for a_name in read_rows(the_params["itemid"], "csv")[0]]
+      return {"publishParameters": {"type": "csv", "locationType": "none", "layerInfo": {"fields": the_fields}}}
+   if the_parts[:4] == ["sharing", "rest", "content", "items"]:
+      the_item = ago_state["items"].get(the_parts[4])
+      if the_item == None:
+         return {"error": {"code": 400, "message": "Item does not exist or is inaccessible."}}
+      return describe_item(the_item, base_url)
+   if the_parts[:4] == ["sharing", "rest", "content", "users"]:
+      the_operation = the_parts[-1]
+      if len(the_parts) == 5:
+         return {"folders": [{"id": "benchmarkfolder", "title": "benchmark"}]}
+      if the_operation == "addItem":
+         item_id = uuid.uuid4().hex
+         with ago_lock:
+            ago_state["items"][item_id] = {"id": item_id, "title": the_params.get("title", ""), "type": the_params.get("type", ""), "parts": {}, "status": "partial"}
+         return {"success": True, "id": item_id}
+      the_item = ago_state["items"].get(the_parts[-2])
+      if the_item == None:
+         return {"error": {"code": 400, "message": "Item does not exist or is inaccessible."}}
+      if the_operation == "addPart":
+         the_bytes = list(the_files.values())[0]
+         time.sleep(len(the_bytes) / 1048576 / ago_upload_mb_per_second)
+         the_item["parts"][int(the_params["partNum"])] = the_bytes
+         return {"success": True}
+      if the_operation == "commit":
+         the_item["data"] = b"".join(the_item["parts"][k] for k in sorted(the_item["parts"]))
+         the_item["status"] = "completed"
+         return {"success": True}
+      if the_operation == "status":
+         return {"status": the_item["status"]}
+      if the_operation == "delete":
+         with ago_lock:
+            ago_state["items"].pop(the_parts[-2], None)
+         return {"success": True}
+   #(BACKGROUND JOBS)
+   if the_parts[0] == "jobs":
+      return {"status": ago_state["jobs"][the_parts[1]]["status"]}
+   #(FEATURE SERVICES: rest/services/<name>/FeatureServer[/0[/<operation>]], rest/admin/services/<name>/FeatureServer/0/<operation>)
+   if the_parts[:2] == ["rest", "services"] or the_parts[:3] == ["rest", "admin", "services"]:
+      is_admin = the_parts[1] == "admin"
+      if is_admin == True:
+         the_parts = the_parts[1:]
+      the_service = ago_state["services"][the_parts[2]]
+      #(A VIEW ANSWERS W/ THE ROWS OF THE FEATURE SERVICE IT'S A VIEW OF; IT HAS NO LAYER BETWEEN deleteFromDefinition AND addToDefinition)
+      the_rows = the_service
+      if "view_of" in the_service:
+         if the_service["view_of"] == None and len(the_parts) > 4 and the_parts[4] != "addToDefinition":
+            return {"error": {"code": 400, "message": "Invalid or missing input parameters."}}
+         the_rows = ago_state["services"].get(the_service["view_of"], the_service)
+      if len(the_parts) == 5 and is_admin == True and the_parts[4] == "deleteFromDefinition":
+         with ago_lock:
+            the_service["view_of"] = None
+         return {"success": True}
+      if len(the_parts) == 5 and is_admin == True and the_parts[4] == "addToDefinition":
+         view_definition = json.loads(the_params["addToDefinition"])["layers"][0]["adminLayerInfo"]["viewLayerDefinition"]
+         with ago_lock:
+            the_service["view_of"] = view_definition.get("table", view_definition)["sourceServiceName"]
+         return {"success": True}
+      if len(the_parts) == 4:
+         the_layers = [{"id": 0, "name": the_parts[2]}]
+         if the_service["spatial"] == True:
+            return {"layers": the_layers, "tables": []}
+         return {"layers": [], "tables": the_layers}
+      if len(the_parts) == 5:
+         the_properties = {"id": 0, "name": the_parts[2], "supportsReturningQueryExtent": True, "indexes": [{"name": "OBJECTID_idx", "fields": "OBJECTID", "indexType": "Attribute"}]}
+         if the_service["spatial"] == True:
+            the_properties["type"] = "Feature Layer"
+            the_properties["indexes"].append({"name": "Shape_idx", "fields": "Shape", "indexType": "Spatial"})
+         else:
+            the_properties["type"] = "Table"
+         if "view_of" in the_service:
+            the_properties["isView"] = True
+            if is_admin == True:
+               the_properties["adminLayerInfo"] = {"viewLayerDefinition": {"table": {"name": the_parts[2], "sourceServiceName": the_service["view_of"], "sourceLayerId": 0, "sourceLayerFields": []}}}
+         return the_properties
+      the_operation = the_parts[5]
+      if the_operation == "query":
+         if str(the_params.get("returnExtentOnly", "false")).lower() == "true":
+            return {"extent": {"xmin": 400000, "ymin": 20000, "xmax": 500000, "ymax": 220000}, "count": len(the_rows["ids"])}
+         return {"count": len(the_rows["ids"])}
+      if the_rows != the_service:
+         return {"error": {"code": 400, "message": "Stand-in AGO doesn't " + the_operation + " views."}}
+      if the_operation == "append":
+         the_append = lambda: append_rows(the_service, the_params)
+         if is_async == True:
+            return {"statusUrl": base_url + "/jobs/" + start_ago_job(the_append)}
+         the_append()
+         return {"success": True}
+      if the_operation == "deleteFeatures":
+         the_ids = get_where_ids(the_params.get("where", ""))
+         with ago_lock:
+            the_service["ids"].difference_update(the_ids)
+         return {"deleteResults": [{"objectId": an_id, "success": True} for an_id in the_ids]}
+      if the_operation == "truncate" and is_admin == True:
+         with ago_lock:
+            the_service["ids"].clear()
+         return {"success": True}
+      if the_operation == "updateDefinition" and is_admin == True:
+         if is_async == True:
+            return {"statusURL": base_url + "/jobs/" + start_ago_job(lambda: rebuild_index(the_service))}
+         rebuild_index(the_service)
+         return {"success": True}
+   return {"error": {"code": 404, "message": "Stand-in AGO doesn't have " + the_path + "."}}
+
+#THIS CLASS HANDLES REQUESTS TO STAND-IN AGO: WAITS ago_latency_ms, FAILS ago_failure_rate OF REQUESTS, THROTTLES ago_throttle_rate
+#   OF REQUESTS, HANGS ON ago_timeout_rate OF REQUESTS, AND ANSWERS THE REST (SEE answer_request).
+class StandInAgoHandler(BaseHTTPRequestHandler):
+   def do_GET(self):
+      the_url = urllib.parse.urlparse(self.path)
+      self.answer(the_url.path, dict(urllib.parse.parse_qsl(the_url.query)), {})
+   def do_POST(self):
+      the_url = urllib.parse.urlparse(self.path)
+      the_body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+      the_params = dict(urllib.parse.parse_qsl(the_url.query))
+      the_files = {}
+      content_type = self.headers.get("Content-Type", "")
+      if content_type.startswith("multipart/form-data"):
+         the_boundary = content_type.split("boundary=")[1].encode("utf-8")
+         for a_part in the_body.split(b"--" + the_boundary)[1:-1]:
+            the_headers, the_value = a_part[2:-2].split(b"\r\n\r\n", 1)
+            the_name = re.search(rb'name="([^"]*)"', the_headers).group(1).decode("utf-8")
+            if b"filename=" in the_headers:
+               the_files[the_name] = the_value
+            else:
+               the_params[the_name] = the_value.decode("utf-8")
+      else:
+         the_params.update(urllib.parse.parse_qsl(the_body.decode("utf-8")))
+      self.answer(the_url.path, the_params, the_files)
+   def answer(self, the_path, the_params, the_files):
+      time.sleep(ago_latency_ms / 1000)
+      #(STATUS CHECKS OF BACKGROUND JOBS AREN'T FAILED OR HUNG, SO THAT A JOB'S OUTCOME IS WHAT'S BENCHMARKED)
+      if the_path.startswith("/jobs/") == False:
+         if random.random() < ago_timeout_rate:
+            time.sleep(ago_timeout_seconds)
+         if random.random() < ago_failure_rate:
+            self.send_answer(500, {"error": {"code": 500, "message": "Stand-in AGO failed this request on purpose."}})
+            return
+         if random.random() < ago_throttle_rate:
+            self.send_answer(429, {"error": {"code": 429, "message": "Too many requests. Stand-in AGO throttled this request on purpose."}})
+            return
+      try:
+         self.send_answer(200, answer_request(the_path, the_params, the_files, "http://" + self.headers["Host"]))
+      except Exception as e:
+         self.send_answer(500, {"error": {"code": 500, "message": repr(e)}})
+   def send_answer(self, the_code, the_answer):
+      the_bytes = json.dumps(the_answer).encode("utf-8")
+      try:
+         self.send_response(the_code)
+         self.send_header("Content-Type", "application/json")
+         self.send_header("Content-Length", str(len(the_bytes)))
+         self.end_headers()
+         self.wfile.write(the_bytes)
+      except (BrokenPipeError, ConnectionResetError):
+         #(THE CLIENT GAVE UP WAITING; SEE client_timeout_seconds)
+         pass
+   def log_message(self, *more_arguments):
+      pass
+
+#THIS FUNCTION STARTS STAND-IN AGO ON A FREE PORT OF 127.0.0.1. RETURNS ITS BASE URL (E.G., http://127.0.0.1:50123).
+def start_stand_in_ago():
+   the_server = ThreadingHTTPServer(("127.0.0.1", 0), StandInAgoHandler)
+   the_server.daemon_threads = True
+   threading.Thread(target = the_server.serve_forever, daemon = True).start()
+   return "http://127.0.0.1:" + str(the_server.server_address[1])
+
+#STAND-IN ARCGIS
+
+#THIS CLASS IS THE CONNECTION (gis._con) OF STAND-IN ARCGIS. SENDS REQUESTS FOR https://www.arcgis.com TO STAND-IN AGO.
+#   LIKE THE ArcGIS API FOR PYTHON, RAISES AN EXCEPTION (W/ THE ERROR'S MESSAGE AND CODE) WHEN A REQUEST FAILS OR ITS ANSWER HAS AN ERROR.
+class FakeConnection:
+   def __init__(self, base_url):
+      self.base_url = base_url
+   def send(self, the_url, the_params, the_files = None, is_post = True):
+      the_url = the_url.replace("https://www.arcgis.com", self.base_url)
+      the_params = {a_key: str(a_value) for a_key, a_value in (the_params or {}).items()}
+      if is_post == False:
+         the_request = urllib.request.Request(the_url + "?" + urllib.parse.urlencode(the_params))
+      elif the_files:
+         the_boundary = uuid.uuid4().hex
+         the_body = b""
+         for a_key, a_value in the_params.items():
+            the_body += ("--" + the_boundary + "\r\nContent-Disposition: form-data; name=\"" + a_key + "\"\r\n\r\n" + a_value + "\r\n").encode("utf-8")
+         for a_key, (file_name, the_bytes) in the_files.items():
+            the_body += ("--" + the_boundary + "\r\nContent-Disposition: form-data; name=\"" + a_key + "\"; filename=\"" + file_name + "\"\r\n\r\n").encode("utf-8") + the_bytes + b"\r\n"
+         the_body += ("--" + the_boundary + "--\r\n").encode("utf-8")
+         the_request = urllib.request.Request(the_url, the_body, {"Content-Type": "multipart/form-data; boundary=" + the_boundary})
+      else:
+         the_request = urllib.request.Request(the_url, urllib.parse.urlencode(the_params).encode("utf-8"))
+      try:
+         with urllib.request.urlopen(the_request, timeout = client_timeout_seconds) as the_response:
+            the_answer = json.loads(the_response.read())
+      except urllib.error.HTTPError as e:
+         the_answer = json.loads(e.read())
+      if "error" in the_answer:
+         raise Exception(the_answer["error"]["message"] + "\n(Error Code: " + str(the_answer["error"]["code"]) + ")")
+      return the_answer
+   def get(self, the_url, params = None, **more_keywords):
+      return self.send(the_url, params, is_post = False)
+   def post(self, the_url, params = None, files = None, **more_keywords):
+      return self.send(the_url, params, files)
+
+#THIS CLASS IS arcgis.features.FeatureLayer (AND Table) OF STAND-IN ARCGIS.
+class FakeFeatureLayer:
+   def __init__(self, url, gis = None):
+      self.url = url
+      self._gis = gis
+      self._properties = None
+      admin_url = url.replace("/rest/services/", "/rest/admin/services/")
+      self.manager = types.SimpleNamespace(truncate = lambda: gis._con.post(admin_url + "/truncate", {"f": "json"}),
+                                           update_definition = lambda the_definition: gis._con.post(admin_url + "/updateDefinition", {"f": "json", "updateDefinition": json.dumps(the_definition)}))
+   @property
+   def properties(self):
+      if self._properties == None:
+         self._properties = self._gis._con.get(self.url, {"f": "json"})
+      return self._properties
+   def query(self, where = "1=1", return_count_only = False, return_extent_only = False, **more_keywords):
+      the_answer = self._gis._con.get(self.url + "/query", {"f": "json", "where": where, "returnCountOnly": str(return_count_only).lower(), "returnExtentOnly": str(return_extent_only).lower()})
+      if return_extent_only == True:
+         return the_answer["extent"]
+      return the_answer["count"]
+   def append(self, item_id = None, upload_format = None, source_table_name = None, upsert = False, upsert_matching_field = None, source_info = None, **more_keywords):
+      the_params = {"f": "json", "appendItemId": item_id, "appendUploadFormat": upload_format, "upsert": str(upsert).lower()}
+      if source_table_name != None:
+         the_params["sourceTableName"] = source_table_name
+      if upsert_matching_field != None:
+         the_params["upsertMatchingField"] = upsert_matching_field
+      if source_info != None:
+         the_params["appendSourceInfo"] = json.dumps(source_info)
+      return self._gis._con.post(self.url + "/append", the_params).get("success") == True
+   def delete_features(self, where = None, **more_keywords):
+      return self._gis._con.post(self.url + "/deleteFeatures", {"f": "json", "where": where})
+
+#THIS CLASS IS AN ITEM (arcgis.gis.Item) OF STAND-IN ARCGIS.
+class FakeItem:
+   def __init__(self, gis, the_info):
+      self._gis = gis
+      self.id = the_info["id"]
+      self.title = the_info["title"]
+      self.url = the_info.get("url")
+      self.layers = []
+      self.tables = []
+      if self.url != None:
+         the_service = gis._con.get(self.url, {"f": "json"})
+         self.layers = [FakeFeatureLayer(self.url + "/" + str(a_layer["id"]), gis) for a_layer in the_service["layers"]]
+         self.tables = [FakeFeatureLayer(self.url + "/" + str(a_table["id"]), gis) for a_table in the_service["tables"]]
+
+#THIS CLASS IS arcgis.gis.GIS OF STAND-IN ARCGIS. LOGGING IN IS 1 REQUEST TO STAND-IN AGO.
+class FakeGIS:
+   def __init__(self, url = None, username = None, password = None, **more_keywords):
+      self._con = FakeConnection(stand_in_ago_url)
+      self._con.get("https://www.arcgis.com/sharing/rest/community/self", {"f": "json"})
+      self.content = types.SimpleNamespace(get = self.get_item, search = self.search_items)
+   def get_item(self, item_id):
+      try:
+         return FakeItem(self, self._con.get("https://www.arcgis.com/sharing/rest/content/items/" + item_id, {"f": "json"}))
+      except Exception as e:
+         #(LIKE ARCGIS, ONLY AN ITEM THAT DOESN'T EXIST GIVES None; OTHER ERRORS ARE RAISED)
+         if "does not exist" in str(e):
+            return None
+         raise
+   def search_items(self, query = "", max_items = 10, **more_keywords):
+      the_results = self._con.get("https://www.arcgis.com/sharing/rest/search", {"f": "json", "q": query, "num": max_items})["results"]
+      return [FakeItem(self, a_result) for a_result in the_results]
+
+#THIS FUNCTION INSTALLS STAND-IN ARCGIS (IN PLACE OF arcgis) IN THIS SCRIPT'S PROCESS.
+def install_stand_in_arcgis():
+   arcgis = types.ModuleType("arcgis")
+   arcgis.gis = types.ModuleType("arcgis.gis")
+   arcgis.gis.GIS = FakeGIS
+   arcgis.features = types.ModuleType("arcgis.features")
+   arcgis.features.FeatureLayer = FakeFeatureLayer
+   arcgis.features.Table = FakeFeatureLayer
+   sys.modules["arcgis"] = arcgis
+   sys.modules["arcgis.gis"] = arcgis.gis
+   sys.modules["arcgis.features"] = arcgis.features
+
+#BENCHMARK
+
+#THIS FUNCTION RUNS EGDB_To_OpenData.py ONCE (ITS main FUNCTION) W/ THE MAJOR VARIABLES OF A GIVEN SCENARIO, IN A NEW TEMPORARY
+#   FOLDER, AGAINST A FRESHLY RESET STAND-IN AGO.
+#   RETURNS A DICTIONARY W/ THE RUN'S SECONDS, COUNTS OF FEATURE LAYERS (ALL, RELOADED, FAILED), AND TOTAL SECONDS OF EACH STEP
+#   (ADDED UP OVER ALL FEATURE LAYERS; FROM EGDB_To_OpenData_metrics.json).
+def run_scenario(scenario_settings):
+   item_ids = reset_stand_in_ago()
+   the_spec = importlib.util.spec_from_file_location("EGDB_To_OpenData_benchmarked", script_path)
+   the_script = importlib.util.module_from_spec(the_spec)
+   work_folder = tempfile.mkdtemp(prefix = "EGDB_To_OpenData_Benchmark_")
+   the_output = io.StringIO()
+   with contextlib.redirect_stdout(the_output if quiet == True else sys.stdout):
+      the_spec.loader.exec_module(the_script)
+      the_script.layers = []
+      for a_source in sources:
+         the_layer = ["Benchmark.sde", "", "Benchmark.gisadmin." + a_source["name"], "Benchmark " + a_source["name"], item_ids[a_source["name"]], "U,M,T,W,R,F,S"]
+         if "options" in a_source:
+            the_layer.append(dict(a_source["options"]))
+            if a_source["options"].get("mode") == "swap":
+               the_layer[6]["staging_items"] = [item_ids[a_source["name"] + "_a"], item_ids[a_source["name"] + "_b"]]
+         the_script.layers.append(the_layer)
+      the_script.u = "benchmark"
+      the_script.p = "benchmark"
+      the_script.content_folder = "benchmark"
+      for a_key, a_value in scenario_settings.items():
+         setattr(the_script, a_key, a_value)
+      the_script.send_email = lambda the_subject = "", the_message = "": None
+      #(EGDB_To_OpenData.py KEEPS ITS FILES IN ITS OWN FOLDER, sys.path[0]; POINT IT AT THE TEMPORARY FOLDER)
+      script_folder = sys.path[0]
+      sys.path[0] = work_folder
+      start_time = time.perf_counter()
+      try:
+         the_script.main()
+      finally:
+         sys.path[0] = script_folder
+   the_result = {"seconds": round(time.perf_counter() - start_time, 2), "layers": len(sources), "reloaded": 0, "failed": 0, "steps": {}}
+   metrics_path = os.path.join(work_folder, "EGDB_To_OpenData_metrics.json")
+   if os.path.exists(metrics_path):
+      with open(metrics_path, "r") as metrics_file:
+         the_metrics = json.load(metrics_file)
+      for a_layer in the_metrics["layers"]:
+         if a_layer["success"] == True:
+            the_result["reloaded"] += 1
+         else:
+            the_result["failed"] += 1
+         for step_name, the_step in a_layer["steps"].items():
+            the_total = the_result["steps"].setdefault(step_name, {"seconds": 0.0, "bytes": 0, "retries": 0})
+            for a_key in the_total:
+               the_total[a_key] += the_step[a_key]
+   else:
+      #(THE SCRIPT STOPPED BEFORE RELOADING; SEE ITS LOG FILE)
+      the_result["failed"] = len(sources)
+   if keep_work_folders == True:
+      print("Kept temporary folder " + work_folder + ".")
+   else:
+      shutil.rmtree(work_folder, ignore_errors = True)
+   return the_result
+
+#THIS FUNCTION PRINTS A TABLE OF THE RESULTS AND ADDS THEM INTO EGDB_To_OpenData_Benchmark.csv IN THIS SCRIPT'S FOLDER
+#   (1 ROW PER STEP OF EACH RUN OF EACH SCENARIO, PLUS 1 ROW W/ STEP "run" FOR THE WHOLE RUN).
+#   TAKES A LIST OF [SCENARIO NAME, RUN NUMBER, RESULT (SEE run_scenario)].
+def report_results(the_results):
+   step_names = []
+   for scenario_name, run_number, the_result in the_results:
+      for step_name in the_result["steps"]:
+         if step_name not in step_names:
+            step_names.append(step_name)
+   the_header = ["scenario", "run", "seconds", "reloaded", "failed"] + [step_name + "_seconds" for step_name in step_names] + ["upload_mb", "retries"]
+   the_rows = []
+   for scenario_name, run_number, the_result in the_results:
+      the_steps = the_result["steps"]
+      the_row = [scenario_name, run_number, the_result["seconds"], the_result["reloaded"], the_result["failed"]]
+      the_row += [round(the_steps.get(step_name, {}).get("seconds", 0), 2) for step_name in step_names]
+      the_row += [round(the_steps.get("upload", {}).get("bytes", 0) / 1048576, 1), sum(the_step["retries"] for the_step in the_steps.values())]
+      the_rows.append(the_row)
+   the_widths = [max(len(str(a_row[k])) for a_row in [the_header] + the_rows) for k in range(len(the_header))]
+   for a_row in [the_header] + the_rows:
+      print("  ".join(str(a_row[k]).rjust(the_widths[k]) for k in range(len(a_row))))
+   csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "EGDB_To_OpenData_Benchmark.csv")
+   is_new = os.path.exists(csv_path) == False
+   run_started = time.strftime("%Y-%m-%dT%H:%M:%S")
+   with open(csv_path, "a", newline = "") as csv_file:
+      the_writer = csv.writer(csv_file)
+      if is_new == True:
+         the_writer.writerow(["run_started", "scenario", "run", "step", "seconds", "bytes", "retries", "reloaded", "failed"])
+      for scenario_name, run_number, the_result in the_results:
+         the_writer.writerow([run_started, scenario_name, run_number, "run", the_result["seconds"], "", "", the_result["reloaded"], the_result["failed"]])
+         for step_name, the_step in the_result["steps"].items():
+            the_writer.writerow([run_started, scenario_name, run_number, step_name, round(the_step["seconds"], 3), the_step["bytes"], the_step["retries"], "", ""])
+   print("Results added into " + csv_path + ".")
+
+if __name__ == "__main__":
+   install_stand_in_arcpy()
+   install_stand_in_arcgis()
+   stand_in_ago_url = start_stand_in_ago()
+   print("Stand-in AGO is listening at " + stand_in_ago_url + ".")
+   the_results = []
+   for scenario_name, scenario_settings in scenarios:
+      for run_number in range(1, repeats + 1):
+         print("Running scenario " + scenario_name + " (run " + str(run_number) + " of " + str(repeats) + ")...")
+         the_result = run_scenario(scenario_settings)
+         print("...took " + str(the_result["seconds"]) + " seconds (" + str(the_result["reloaded"]) + " of " + str(the_result["layers"]) + " feature layers reloaded).")
+         the_results.append([scenario_name, run_number, the_result])
+   report_results(the_results)